@@ -2,13 +2,37 @@ import discord
 import os
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 import datetime
-import subprocess
 import logging
 from glob import glob
-import pandas as pd
 import asyncio
+import contextlib
+import functools
+import json
+import re
+import shlex
 import pytz
-from lotto_analyzer import check_latest_round_performance, generate_performance_report
+from lotto_analyzer import get_performance_report, render_jackpot_lines, render_performance_report
+from lotto_charts import CHARTS, get_chart_files, get_stats, render_stats_text
+from lotto_cooccurrence import generate_cooccurrence_report
+from lotto_fetcher import DrawFetcher, FetchError, next_round, write_latest
+from lotto_game import GAME
+from lotto_history import load_history
+from lotto_memory import (is_tracing, monitor_memory, render_memory_report, set_budget,
+                          start_tracing, stop_tracing, track)
+from lotto_metrics import (flush_metrics_periodically, monitor_event_loop_lag, registry,
+                           start_metrics_server, timed)
+from lotto_outbox import Outbox, ProgressMessage
+from lotto_pipeline import Pipeline
+from lotto_prewarm import prewarmer
+from lotto_profiler import ProfilerBusy, capture_profile, profiled, span
+from lotto_query import QueryError, query, render_query_help, render_query_result
+from lotto_rules import RULES_FILE, get_rules
+from lotto_store import read_block
+from lotto_tenants import (DEFAULT_TENANT, SCOPES, result_file_for, tenant_for_channel,
+                           tenant_for_message)
+from lotto_watcher import DropWatcher
+import lotto_generator
+import update_lotto
 
 # 파일로 로그 남기기
 logging.basicConfig(
@@ -34,19 +58,178 @@ def load_env_file():
 env_vars = load_env_file()
 TOKEN = env_vars.get('DISCORD_BOT_TOKEN')
 CHANNEL_ID = int(env_vars.get('DISCORD_CHANNEL_ID', '0'))  # num_gen 채널
+# 관리자 전용 명령(!profile 등)을 쓸 수 있는 사용자 ID (쉼표로 구분)
+ADMIN_IDS = {int(x) for x in env_vars.get('DISCORD_ADMIN_IDS', '').split(',') if x.strip().isdigit()}
 
-# 2. lotto_result.txt에서 최신 결과 블록만 읽는 함수
-def get_latest_lotto_result():
-    if not os.path.exists('lotto_result.txt'):
+# 로컬 메트릭 노출 (0/빈 값이면 사용 안 함)
+METRICS_PORT = int(env_vars.get('METRICS_PORT', '0') or 0)          # http://127.0.0.1:<포트>/metrics
+METRICS_FILE = env_vars.get('METRICS_FILE', '')                     # 주기적으로 기록할 파일
+METRICS_FLUSH_INTERVAL = int(env_vars.get('METRICS_FLUSH_INTERVAL', '60') or 60)
+
+# 메모리: 캐시 예산 (MB, 0 = 제한 없음) / 할당 추적 (tracemalloc 프레임 수, 0 = 끔) / RSS 기록 간격
+MEMORY_BUDGET_MB = float(env_vars.get('LOTTO_MEMORY_BUDGET_MB', '0') or 0)
+TRACEMALLOC_FRAMES = int(env_vars.get('LOTTO_TRACEMALLOC', '0') or 0)
+MEMORY_SAMPLE_INTERVAL = 60
+
+# n8n이 떨어뜨리는 당첨번호 JSON 감시 (LOTTO_WATCH=0이면 사용 안 함)
+WATCH_ENABLED = env_vars.get('LOTTO_WATCH', '1').strip().lower() not in ('0', 'false', 'no')
+WATCH_FILE = env_vars.get('LOTTO_WATCH_FILE', '') or update_lotto.JSON_FILE
+WATCH_POLL_INTERVAL = float(env_vars.get('LOTTO_WATCH_POLL_INTERVAL', '2') or 2)  # inotify 불가 시
+
+# 당첨번호 직접 조회 (동행복권 API 형식 주소, {round} = 회차 / 빈 값이면 사용 안 함)
+FETCH_URL = env_vars.get('LOTTO_FETCH_URL', '').strip()
+FETCH_INTERVAL = float(env_vars.get('LOTTO_FETCH_INTERVAL', '30') or 30)     # 조회 간격 (초)
+FETCH_START = env_vars.get('LOTTO_FETCH_START', '20:45').strip() or '20:45'  # 토요일 조회 시작
+FETCH_WINDOW = float(env_vars.get('LOTTO_FETCH_WINDOW', '120') or 120)       # 조회 지속 (분)
+
+# !num 추천번호 생성 명령 (부하 테스트 등에서는 대역 스크립트로 교체 가능)
+GENERATOR_CMD = shlex.split(env_vars.get('LOTTO_GENERATOR_CMD', '') or 'python3 lotto_generator.py')
+
+# 추천번호 생성 시간 제한 (초, 0 = 제한 없음) -> 넘으면 그때까지 만든 번호만 저장
+GENERATE_DEADLINE = float(env_vars.get('LOTTO_GENERATE_DEADLINE', '60') or 0)
+# 진행 상황 메시지: 이 시간(초) 안에 끝나면 보내지 않고, 이후 PROGRESS_EDIT_INTERVAL초마다 수정
+PROGRESS_SHOW_AFTER = 1.0
+PROGRESS_EDIT_INTERVAL = 2.0
+
+# A/B 비교 전략 (쉼표로 구분, 예: current,wide_sum,no_top5,random) -> 전략마다 추천 블록 1개
+STRATEGIES = env_vars.get('LOTTO_STRATEGIES', '').strip()
+
+# 추천 기록 분리 범위 (global: 하나의 lotto_result.txt / guild / channel / user)
+TENANT_SCOPE = env_vars.get('LOTTO_TENANT_SCOPE', 'global').strip().lower() or 'global'
+if TENANT_SCOPE not in SCOPES:
+    logging.warning(f'알 수 없는 LOTTO_TENANT_SCOPE: {TENANT_SCOPE} -> global 사용')
+    TENANT_SCOPE = 'global'
+
+# 메트릭 라벨로 쓰는 명령 목록 (그 외는 'other'로 묶음)
+KNOWN_COMMANDS = {'!num', '!update', '!status', '!anal', '!pair', '!query', '!rules', '!stats',
+                  '!cancel', '!help', '!test', '!profile', '!metrics', '!mem'}
+
+def is_admin(message):
+    """관리자 확인 (.env의 DISCORD_ADMIN_IDS 또는 서버 관리자 권한)"""
+    if message.author.id in ADMIN_IDS:
+        return True
+    perms = getattr(message.author, 'guild_permissions', None)
+    return bool(perms and perms.administrator)
+
+def generator_args(tenant=DEFAULT_TENANT):
+    """lotto_generator 인자 (테넌트 / 시간 제한)"""
+    args = []
+    if tenant != DEFAULT_TENANT:
+        args += ['--tenant', tenant]
+    if GENERATE_DEADLINE > 0:
+        args += ['--deadline', str(GENERATE_DEADLINE)]
+    if STRATEGIES:
+        args += ['--strategies', STRATEGIES]
+    return args
+
+def render_generation_progress(title, info):
+    """생성 진행 상황(lotto_generator progress 값) -> 진행 메시지"""
+    reason = info.get('reason')
+    if reason is not None:
+        mark = '✅' if reason == 'complete' else '⚠️'
+        return (f"{mark} {title} - {lotto_generator.STOP_REASONS.get(reason, reason)}: "
+                f"{info['found']}/{info['target']}세트 ({info['elapsed']:.1f}초)")
+    return (f"⏳ {title} 중... {info['found']}/{info['target']}세트 "
+            f"(시도 {info['tries']:,}회, {info['rate']:,}회/초, {info['elapsed']:.1f}초 경과)\n"
+            f"중단하려면 `!cancel` (그때까지 만든 번호만 저장)")
+
+async def read_generator_output(proc, on_progress=None):
+    """
+    생성기 하위 프로세스 출력 읽기 ([PROGRESS] 줄은 on_progress로, 나머지는 로그용으로 모음)
+    반환: (stdout, stderr)
+    """
+    stderr_task = asyncio.create_task(proc.stderr.read())
+    lines = []
+    async for raw in proc.stdout:
+        line = raw.decode('utf-8', errors='replace').rstrip()
+        if line.startswith('[PROGRESS] '):
+            try:
+                info = json.loads(line[len('[PROGRESS] '):])
+            except ValueError:
+                continue
+            if on_progress is not None:
+                on_progress(info)
+        else:
+            lines.append(line)
+    stderr = await stderr_task
+    await proc.wait()
+    return '\n'.join(lines), stderr.decode('utf-8', errors='replace')
+
+def saved_sequences(stdout):
+    """생성기 출력의 '[SAVED] 번호' 줄들 -> 이번 실행이 저장한 추천 번호 목록 (전략 비교면 여러 개)"""
+    return [int(n) for n in re.findall(r'^\[SAVED\] (\d+)$', stdout, re.M)]
+
+def render_saved_blocks(tenant, sequences):
+    """이번 실행이 저장한 블록들 (번호를 모르면 마지막 블록)"""
+    if not sequences:
+        return get_latest_lotto_result(tenant)
+    return '\n\n'.join(get_latest_lotto_result(tenant, sequence) for sequence in sequences)
+
+def terminate_process(proc):
+    """생성기 하위 프로세스에 SIGTERM (생성기는 그때까지 만든 번호를 저장하고 종료)"""
+    if proc.returncode is None:
+        with contextlib.suppress(ProcessLookupError):
+            proc.terminate()
+
+class RunningGeneration:
+    """!cancel 대상 (owner_id가 None이면 정기/파일 감지 작업 -> 관리자만 중단)"""
+    __slots__ = ('channel_id', 'owner_id', '_cancel', 'requested')
+
+    def __init__(self, channel_id, owner_id, cancel):
+        self.channel_id = channel_id
+        self.owner_id = owner_id
+        self._cancel = cancel
+        self.requested = False
+
+    def cancel(self):
+        self.requested = True
+        self._cancel()
+
+def render_jackpot_message(report):
+    """성과 리포트 객체 -> 업데이트 메시지의 1등 당첨 알림 부분"""
+    if report['jackpot_matches']:
+        return '\n🎊 **축하합니다! 1등 당첨번호 발견!**\n' + '\n'.join(render_jackpot_lines(report)) + '\n'
+    return '\n📝 누적 추천번호 중 1등 당첨번호는 아직 없습니다.\n'
+
+def render_latest_performance_message(report, title):
+    """성과 리포트 객체 -> 가장 최근 결과가 나온 추천의 적중 요약"""
+    msg = f'\n📊 {title}:\n'
+    performance = report['latest'] if report else None
+    if not performance:
+        return msg + "아직 분석할 수 있는 성과 데이터가 없습니다.\n"
+    
+    msg += f"✅ {performance['recommendation_no']:02d}번째 추천 → {performance['target_round']}회차 결과\n"
+    msg += f"🎯 최대 적중: {performance['max_matches']}개\n"
+    
+    # 3개 이상 적중한 라인들 표시
+    good_lines = [line for line in performance['line_results'] if line['matches'] >= 3]
+    if good_lines:
+        msg += f"🔥 3개 이상 적중 라인:\n"
+        for line in good_lines:
+            nums_str = ' '.join(map(str, line['numbers']))
+            msg += f"   {line['set']}세트-{line['line']}: {nums_str} ({line['matches']}개)\n"
+    else:
+        msg += "아쉽게도 3개 이상 적중한 라인은 없었습니다.\n"
+    return msg
+
+# 2. lotto_result.txt(또는 테넌트별 추천 기록)에서 최신 결과 블록만 읽는 함수
+def get_result_file(tenant=DEFAULT_TENANT):
+    return result_file_for(tenant) or GAME.result_file
+
+def get_latest_lotto_result(tenant=DEFAULT_TENANT, sequence=None):
+    """
+    추천 블록 텍스트 (sequence = 생성기가 발급받은 추천 번호, None이면 마지막 블록)
+    동시에 여러 생성이 저장해도 각 요청은 자기 블록을 받음 (lotto_store)
+    """
+    result_file = get_result_file(tenant)
+    if not os.path.exists(result_file):
         return '추천번호 결과 파일이 없습니다.'
-    with open('lotto_result.txt', encoding='utf-8') as f:
-        lines = f.read().strip().split('\n')
-    # 최근 블록 추출
-    idxs = [i for i, line in enumerate(lines) if '번째 추천 번호에요~' in line]
-    if not idxs:
+    block = read_block(result_file, sequence)
+    if block is None:
+        with open(result_file, encoding='utf-8') as f:
+            lines = f.read().strip().split('\n')
         return '\n'.join(lines[-17:])
-    last_idx = idxs[-1]
-    block = lines[last_idx:]
+    block = block.strip().split('\n')
     if len(block) < 5:
         return '\n'.join(block)
     title = block[0]
@@ -56,6 +239,153 @@ def get_latest_lotto_result():
     msg = f"{title}\n{round_line}\n" + "\n".join(numbers) + "\n" + footer
     return msg
 
+def get_last_recommended_round(tenant=DEFAULT_TENANT):
+    """마지막 추천 블록의 직전회차 (이 회차까지는 채점/새 추천이 끝난 상태)"""
+    result_file = get_result_file(tenant)
+    if not os.path.exists(result_file):
+        return 0
+    with open(result_file, encoding='utf-8') as f:
+        rounds = re.findall(r'\[직전회차 (\d+)회\]', f.read())
+    return int(rounds[-1]) if rounds else 0
+
+# 업데이트 파이프라인 (당첨번호 반영 -> 채점/생성 -> 메시지)
+#   ingest -> refresh -> survivors -> generate -> render
+#         \-> score -------------------/
+# 이전 추천 채점(score)과 다음 생성 준비(refresh/survivors)는 동시에 실행됩니다.
+# generate는 score를 기다림 -> 채점이 lotto_result.txt를 읽은 뒤에 새 추천을 추가
+# 채점/생성은 업데이트를 요청한 테넌트의 추천 기록 기준 (refresh/survivors는 공용)
+UPDATE_TIMEOUT = 60
+
+class AlreadyHandled(Exception):
+    """새 회차만 처리하는 실행(파일 감지/감시 중 정기 작업)에서 이미 처리한 회차"""
+
+class UpdateFailed(Exception):
+    """update_lotto가 'error'를 반환한 경우 (출력 메시지 포함)"""
+    def __init__(self, output):
+        super().__init__(output)
+        self.output = output
+
+def ingest_draw(json_file=update_lotto.JSON_FILE, only_new=False, tenant=DEFAULT_TENANT):
+    """
+    당첨번호 JSON의 최신 회차를 CSV에 반영
+    only_new: 그 회차 기준 추천이 이미 있으면 AlreadyHandled (채점/생성 생략)
+    """
+    lines = []
+    def log(line):
+        print(line)
+        lines.append(str(line))
+    status = update_lotto.update_csv(log=log, json_file=json_file)
+    output = '\n'.join(lines)
+    if status == 'error':
+        raise UpdateFailed(output)
+    # 새 이력 기준 생성 상태를 백그라운드에서 미리 준비 (이미 최신이면 그대로)
+    prewarmer.start()
+    if only_new:
+        round_no = update_lotto.read_lotto_json(json_file)['round']
+        if round_no <= get_last_recommended_round(tenant):
+            raise AlreadyHandled(f'{round_no}회는 이미 처리했습니다.')
+    return {'status': status, 'output': output}
+
+def refresh_indexes(ingest):
+    """
+    데이터 버전별 캐시(이력/유사성/동반 출현/생성 입력)를 새 CSV 기준으로 갱신
+    ingest 직후 시작한 미리 준비가 진행 중이면 끝나기를 기다려 그 결과를 사용
+    """
+    state = prewarmer.get()
+    if state is None:
+        return load_history(update_lotto.CSV_FILE)['version']
+    return state.version
+
+def score_recommendations(ingest, tenant=DEFAULT_TENANT):
+    """누적 추천번호 성과 리포트 (데이터 버전이 같으면 캐시 사용, 파이프라인이 스레드에서 실행)"""
+    return get_performance_report(result_file=result_file_for(tenant))
+
+def build_survivors(refresh):
+    """다음 추천 생성 입력 (과거 조합/직전 회차/필터 테이블, 미리 준비된 상태 사용)"""
+    state = prewarmer.get()
+    if state is None:
+        raise FileNotFoundError(GAME.data_file)
+    return state.inputs
+
+def generate_recommendations(survivors, score, tenant=DEFAULT_TENANT, cancel=None, progress=None):
+    combs = lotto_generator.generate_and_save(
+        survivors, lotto_generator.parse_args(generator_args(tenant)),
+        cancel=cancel, progress=progress)
+    sequences = getattr(combs, 'sequences', None) or []
+    if not sequences and not combs and getattr(combs, 'partial', False):
+        # 하나도 못 만들고 마감/중단 -> 저장된 것이 없으므로 이전 추천 대신 사유를 표시
+        raise RuntimeError(combs.describe())
+    logging.info(f'자동 추천번호 생성 완료 ({tenant})')
+    return render_saved_blocks(tenant, sequences)
+
+def render_latest_draw():
+    """lotto_total.csv 마지막 회차 요약"""
+    msg = ''
+    try:
+        # [주의] update_lotto.py는 lotto_total.csv만 갱신하므로 그 파일 기준
+        # 업데이트마다 CSV 전체를 DataFrame으로 읽지 않고 공용 이력 스냅샷 사용
+        history = load_history(update_lotto.CSV_FILE)
+        if len(history['rounds']):
+            nums = ' '.join(str(n) for n in history['numbers'][-1])
+            bonus = int(history['bonus'][-1]) or ''
+            msg += f"회차: {history['rounds'][-1]}\n날짜: {history['dates'][-1]}\n번호: {nums} + {bonus}"
+    except Exception as e:
+        logging.error(f'당첨번호 추출 중 오류: {e}')
+        msg += f"\n당첨번호 추출 중 오류: {e}"
+    return msg
+
+def render_update_message(ingest, score, generate):
+    """단계 결과(실패한 단계는 예외 객체) -> 디스코드 메시지 (보낼 것이 없으면 None)"""
+    if isinstance(ingest, AlreadyHandled):
+        return None
+    if isinstance(ingest, asyncio.TimeoutError):
+        return '업데이트가 1분 내에 끝나지 않았습니다.'
+    if isinstance(ingest, UpdateFailed):
+        return '업데이트 결과:\n' + ingest.output + '\n' + render_latest_draw()
+    if isinstance(ingest, Exception):
+        return f'당첨번호 데이터 최신화 실패!\n{ingest}'
+    
+    if ingest['status'] == 'exists':
+        msg = '현재는 이게 최신이에요!\n'
+        title = '최신 추천번호 성과 분석'
+    else:
+        msg = '🎉 최신 당첨번호가 업데이트되었습니다!\n'
+        title = '이전 추천번호 성과 분석'
+    
+    # 누적된 추천 번호 중 1등 당첨번호와 일치 여부 알림
+    if isinstance(score, Exception):
+        msg += f'\n1등 당첨번호 확인 중 오류가 발생했습니다: {score}\n'
+        score = None
+    else:
+        msg += render_jackpot_message(score)
+    
+    # 누적된 추천번호 성과 분석 (이전 추천번호 적중률)
+    msg += render_latest_performance_message(score, title)
+    
+    # 새로운 추천번호
+    if isinstance(generate, Exception):
+        msg += f'\n추천번호 생성 중 오류가 발생했습니다: {generate}\n'
+    else:
+        msg += '\n🎲 새로운 추천번호도 생성했어요!\n'
+        msg += f'\n```{generate}```\n'
+    
+    msg += '\n📈 오늘 기준 최신 당첨번호에요:\n'
+    return msg + render_latest_draw()
+
+def build_update_pipeline(json_file=update_lotto.JSON_FILE, only_new=False, tenant=DEFAULT_TENANT,
+                          cancel=None, progress=None):
+    pipeline = Pipeline('update')
+    pipeline.add('ingest', functools.partial(ingest_draw, json_file, only_new, tenant),
+                 timeout=UPDATE_TIMEOUT)
+    pipeline.add('refresh', refresh_indexes, requires=['ingest'])
+    pipeline.add('score', functools.partial(score_recommendations, tenant=tenant), requires=['ingest'])
+    pipeline.add('survivors', build_survivors, requires=['refresh'])
+    pipeline.add('generate', functools.partial(generate_recommendations, tenant=tenant,
+                                               cancel=cancel, progress=progress),
+                 requires=['survivors', 'score'])
+    pipeline.add('render', render_update_message, requires=['ingest', 'score', 'generate'], always=True)
+    return pipeline
+
 # 3. 디스코드 클라이언트 정의
 class MyClient(discord.Client):
     def __init__(self):
@@ -65,8 +395,53 @@ class MyClient(discord.Client):
         self.scheduler = None
         self.channel = None
         self.is_running = False
+        self.background_tasks = set()
+        # 모든 전송은 채널별 대기열로 (2,000자 분할 / 속도 제한 대기)
+        self.outbox = Outbox()
+        # 파일 감지 / !update / 정기 작업이 동시에 CSV를 고치지 않도록
+        self.update_lock = asyncio.Lock()
+        self.watcher = None
+        # 당첨번호 직접 조회 (세션 1개를 봇이 끝날 때까지 재사용)
+        self.fetcher = DrawFetcher(FETCH_URL) if FETCH_URL else None
+        # 진행 중인 추천번호 생성 (!cancel 대상)
+        self.generations = []
 
     async def setup_hook(self):
+        # 메트릭 수집 (이벤트 루프 지연 / 파일 기록 / 로컬 HTTP)
+        self._start_background(monitor_event_loop_lag())
+        if METRICS_FILE:
+            self._start_background(flush_metrics_periodically(METRICS_FILE, METRICS_FLUSH_INTERVAL))
+        # 메모리 (캐시 예산 / RSS 기록 / 선택: 할당 추적)
+        if MEMORY_BUDGET_MB > 0:
+            set_budget(MEMORY_BUDGET_MB)
+        if TRACEMALLOC_FRAMES > 0:
+            start_tracing(TRACEMALLOC_FRAMES)
+        self._start_background(monitor_memory(MEMORY_SAMPLE_INTERVAL))
+        if METRICS_PORT:
+            try:
+                await start_metrics_server(METRICS_PORT)
+                logging.info(f'메트릭 엔드포인트: http://127.0.0.1:{METRICS_PORT}/metrics')
+            except Exception as e:
+                logging.error(f'메트릭 서버 시작 실패: {e}')
+        
+        # 당첨번호 JSON 감시 (n8n이 파일을 쓰는 즉시 반영)
+        if WATCH_ENABLED:
+            try:
+                self.watcher = DropWatcher(WATCH_FILE, self.on_draw_file,
+                                           poll_interval=WATCH_POLL_INTERVAL)
+                mode = await self.watcher.start()
+                logging.info(f'당첨번호 파일 감시 시작 ({mode}): {WATCH_FILE}')
+            except Exception as e:
+                self.watcher = None
+                logging.error(f'당첨번호 파일 감시 시작 실패: {e}')
+        
+        # 꺼져 있던 동안 발표된 회차가 있으면 바로 가져옴
+        if self.fetcher is not None:
+            self._start_background(self.fetch_draw())
+        
+        # 현재 이력 기준 생성 상태 미리 준비 (첫 업데이트/질의가 기다리지 않도록)
+        prewarmer.start()
+        
         # 스케줄러 설정
         self.scheduler = AsyncIOScheduler()
         # 한국 시간대 설정
@@ -83,6 +458,19 @@ class MyClient(discord.Client):
             id='lotto_update'
         )
         
+        # 매주 토요일 추첨 직후부터 당첨번호 직접 조회 (나올 때까지 FETCH_INTERVAL초마다)
+        if self.fetcher is not None:
+            hour, minute = (int(x) for x in FETCH_START.split(':'))
+            self.scheduler.add_job(
+                self.scheduled_fetch,
+                'cron',
+                day_of_week='sat',
+                hour=hour,
+                minute=minute,
+                timezone=seoul_tz,
+                id='draw_fetch'
+            )
+        
         # 매일 00:00에 스케줄러 상태 체크
         self.scheduler.add_job(
             self.check_scheduler_status,
@@ -93,6 +481,25 @@ class MyClient(discord.Client):
             id='status_check'
         )
 
+    def _start_background(self, coro):
+        task = asyncio.create_task(coro)
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+        return task
+
+    async def close(self):
+        # 종료 전에 대기열에 남은 메시지 전송 (최대 10초)
+        try:
+            await asyncio.wait_for(self.outbox.flush(), 10)
+        except Exception as e:
+            logging.error(f'남은 메시지 전송 실패: {e}')
+        await self.outbox.close()
+        if self.watcher is not None:
+            self.watcher.stop()
+        if self.fetcher is not None:
+            await self.fetcher.close()
+        await super().close()
+
     async def on_ready(self):
         print(f'Logged on as {self.user}!')
         logging.info(f'봇이 시작되었습니다: {self.user}')
@@ -126,18 +533,22 @@ class MyClient(discord.Client):
             self.is_running = True
             logging.info('스케줄러가 시작되었습니다.')
             try:
-                await self.channel.send('🎲 당첨번호생성 봇이 시작되었습니다. 매주 토요일 23:00에 자동으로 업데이트됩니다.')
+                self.outbox.send(self.channel, '🎲 당첨번호생성 봇이 시작되었습니다. 매주 토요일 23:00에 자동으로 업데이트됩니다.')
             except Exception as e:
                 logging.error(f'시작 메시지 전송 실패: {e}')
 
     async def check_scheduler_status(self):
+        with timed('lotto_scheduler_job_duration_seconds', job='status_check'):
+            await self._check_scheduler_status()
+
+    async def _check_scheduler_status(self):
         if not self.is_running:
             logging.warning('스케줄러가 중지되었습니다. 재시작을 시도합니다.')
             self.scheduler.start()
             self.is_running = True
             if self.channel:
                 try:
-                    await self.channel.send('⚠️ 스케줄러가 재시작되었습니다.')
+                    self.outbox.send(self.channel, '⚠️ 스케줄러가 재시작되었습니다.')
                 except Exception as e:
                     logging.error(f'재시작 메시지 전송 실패: {e}')
 
@@ -147,290 +558,378 @@ class MyClient(discord.Client):
             
         logging.info(f'메시지 수신: {message.content} from {message.author}')
         
-        if message.content == '!num':
+        command = message.content.split()[0] if message.content.strip() else ''
+        if not command.startswith('!'):
+            await self.handle_command(message, message.content)
+            return
+        
+        label = command if command in KNOWN_COMMANDS else 'other'
+        with span(f'command:{command}'), timed('lotto_command_duration_seconds', command=label), \
+                track(label):
+            try:
+                await self.handle_command(message, message.content)
+            except Exception:
+                registry.inc('lotto_command_errors_total', command=label)
+                raise
+        registry.inc('lotto_commands_total', command=label)
+
+    async def handle_command(self, message, content):
+        # 추천 기록 테넌트 (LOTTO_TENANT_SCOPE 기준 서버/채널/사용자별)
+        tenant = tenant_for_message(message, TENANT_SCOPE)
+        if content == '!num':
             # lotto_generator.py 실행 (추천번호 즉시 추출)
+            # 오래 걸리면 진행 상황 메시지를 수정해 가며 표시, !cancel로 중단 가능
+            cmd = GENERATOR_CMD + generator_args(tenant) + ['--progress']
+            progress = ProgressMessage(self.outbox, message.channel,
+                                       functools.partial(render_generation_progress, '추천번호 생성'),
+                                       show_after=PROGRESS_SHOW_AFTER,
+                                       interval=PROGRESS_EDIT_INTERVAL).start()
             try:
-                result = subprocess.run(['python3', 'lotto_generator.py'], 
-                                      capture_output=True, text=True, check=True)
-                logging.info(f'lotto_generator.py 실행 성공: {result.stdout}')
-            except subprocess.CalledProcessError as e:
-                logging.error(f'추천번호 생성 중 오류 발생: {e.stderr}')
-                await message.channel.send(f'추천번호 생성 중 오류 발생: {e.stderr}')
-                return
+                with span('stage:lotto_generator'), \
+                        timed('lotto_subprocess_duration_seconds', script='lotto_generator.py'):
+                    proc = await asyncio.create_subprocess_exec(
+                        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+                    with self.track_generation(message.channel, message.author.id,
+                                               functools.partial(terminate_process, proc)) as running:
+                        stdout, stderr = await read_generator_output(proc, progress.update)
+                logging.info(f'lotto_generator.py 실행 결과 ({proc.returncode}): {stdout}')
             except Exception as e:
                 logging.error(f'추천번호 생성 중 예상치 못한 오류: {e}')
-                await message.channel.send(f'추천번호 생성 중 오류 발생: {e}')
+                self.outbox.send(message.channel, f'추천번호 생성 중 오류 발생: {e}')
                 return
-                
-            result_text = get_latest_lotto_result()
-            await message.channel.send(f'```{result_text}```')
+            finally:
+                await progress.finish()
+            
+            if proc.returncode != 0:
+                if running.requested:
+                    self.outbox.send(message.channel, '추천번호 생성이 중단되었습니다.')
+                    return
+                logging.error(f'추천번호 생성 중 오류 발생: {stderr}')
+                self.outbox.send(message.channel, f'추천번호 생성 중 오류 발생: {stderr}')
+                return
+            
+            final = progress.info or {}
+            sequences = saved_sequences(stdout)
+            if not sequences and final.get('reason', 'complete') != 'complete' and not final.get('found'):
+                # 하나도 못 만들고 마감/중단 -> 저장된 것이 없음
+                self.outbox.send(message.channel, render_generation_progress('추천번호 생성', final))
+                return
+            result_text = render_saved_blocks(tenant, sequences)
+            self.outbox.send(message.channel, f'```{result_text}```')
             
-        elif message.content == '!update':
-            await self.run_update_and_send(message.channel)
+        elif content == '!cancel':
+            # 이 채널에서 진행 중인 추천번호 생성 중단 (본인 요청분, 관리자는 전부)
+            channel_id = getattr(message.channel, 'id', None)
+            targets = [g for g in self.generations if g.channel_id == channel_id and
+                       (g.owner_id == message.author.id or is_admin(message))]
+            if not targets:
+                self.outbox.send(message.channel, '이 채널에서 중단할 수 있는 추천번호 생성이 없습니다.')
+                return
+            for running in targets:
+                running.cancel()
+            self.outbox.send(message.channel,
+                             f'⏹️ 추천번호 생성 {len(targets)}건 중단을 요청했어요. 그때까지 만든 번호만 저장합니다.')
             
-        elif message.content == '!status':
+        elif content == '!update':
+            await self.run_update_and_send(message.channel, tenant=tenant,
+                                           owner_id=message.author.id)
+            
+        elif content == '!status':
             status = "실행 중" if self.is_running else "중지됨"
             next_run = None
             if self.is_running and self.scheduler.get_job('lotto_update'):
                 next_run = self.scheduler.get_job('lotto_update').next_run_time
-            await message.channel.send(f'봇 상태: {status}\n다음 실행 예정: {next_run}')
+            self.outbox.send(message.channel, f'봇 상태: {status}\n다음 실행 예정: {next_run}\n'
+                                              f'{prewarmer.describe()}')
             
-        elif message.content == '!anal':
+        elif content == '!anal':
             try:
                 # 디버깅 정보 추가
                 import os
                 current_dir = os.getcwd()
-                result_file_exists = os.path.exists('lotto_result.txt')
+                result_file = get_result_file(tenant)
+                result_file_exists = os.path.exists(result_file)
                 lotto_files = glob('lotto_*.csv')
                 
-                logging.info(f'분석 명령 실행 - 현재 디렉토리: {current_dir}')
-                logging.info(f'lotto_result.txt 존재: {result_file_exists}')
+                logging.info(f'분석 명령 실행 - 현재 디렉토리: {current_dir}, 테넌트: {tenant}')
+                logging.info(f'{result_file} 존재: {result_file_exists}')
                 logging.info(f'로또 파일들: {lotto_files}')
                 
-                report = generate_performance_report()
-                await message.channel.send(f'```{report}```')
+                # 테넌트의 첫 요청은 추천 기록 파싱/채점에 시간이 걸릴 수 있으므로 스레드에서 실행
+                report = await asyncio.to_thread(get_performance_report,
+                                                 result_file=result_file_for(tenant))
+                report = render_performance_report(report)
+                self.outbox.send(message.channel, f'```{report}```')
             except Exception as e:
                 logging.error(f'성과 분석 중 오류: {e}')
-                await message.channel.send(f'성과 분석 중 오류가 발생했습니다: {e}')
+                self.outbox.send(message.channel, f'성과 분석 중 오류가 발생했습니다: {e}')
                 
-        elif message.content == '!help':
+        elif content == '!pair' or content.startswith('!pair '):
+            # 동반 출현 분석 (!pair = 전체, !pair 100 = 최근 100회)
+            try:
+                args = content.split()
+                window = int(args[1]) if len(args) > 1 else None
+                if window is not None and window <= 0:
+                    raise ValueError('회차 수는 1 이상이어야 합니다.')
+                report = generate_cooccurrence_report(window=window)
+                self.outbox.send(message.channel, f'```{report}```')
+            except ValueError as e:
+                self.outbox.send(message.channel, f'사용법: `!pair` 또는 `!pair 100` (최근 N회) - {e}')
+            except Exception as e:
+                logging.error(f'동반 출현 분석 중 오류: {e}')
+                self.outbox.send(message.channel, f'동반 출현 분석 중 오류가 발생했습니다: {e}')
+                
+        elif content == '!query' or content.startswith('!query '):
+            # 조건식 질의 (!query 120 <= sum <= 180 and odd == 3)
+            expression = content[len('!query'):].strip()
+            if not expression:
+                self.outbox.send(message.channel, f'```{render_query_help()}```')
+                return
+            try:
+                # 첫 질의는 특성 열 계산에 수 초 걸릴 수 있으므로 스레드에서 실행
+                result = await asyncio.to_thread(query, expression)
+                self.outbox.send(message.channel, f'```{render_query_result(result)}```')
+            except QueryError as e:
+                self.outbox.send(message.channel, f'{e}\n`!query`만 입력하면 사용법을 볼 수 있습니다.')
+            except Exception as e:
+                logging.error(f'조건식 질의 중 오류: {e}')
+                self.outbox.send(message.channel, f'조건식 질의 중 오류가 발생했습니다: {e}')
+                
+        elif content == '!stats' or content.startswith('!stats '):
+            # 당첨 이력 분포 + 이 테넌트 추천 기록 비교 (!stats = 전체 차트, !stats sum odd = 일부)
+            names = content.split()[1:]
+            unknown = [name for name in names if name not in CHARTS]
+            if unknown:
+                self.outbox.send(message.channel,
+                                 f'사용법: `!stats` 또는 `!stats {" ".join(CHARTS)}` 중 일부')
+                return
+            try:
+                # 새 회차/새 추천 이후 첫 요청만 계산 + 렌더링, 그 뒤로는 캐시에서 바로 응답
+                stats = await asyncio.to_thread(get_stats, result_file=result_file_for(tenant))
+                files = await asyncio.to_thread(get_chart_files, stats, names)
+                text = f'```{render_stats_text(stats)}```'
+                if files:
+                    await self.outbox.post(message.channel, text,
+                                           files=lambda: [discord.File(path) for path in files])
+                else:
+                    self.outbox.send(message.channel, text + '\n(차트 이미지는 matplotlib 설치 시 제공)')
+            except Exception as e:
+                logging.error(f'분포 통계 중 오류: {e}')
+                self.outbox.send(message.channel, f'분포 통계 중 오류가 발생했습니다: {e}')
+                
+        elif content == '!rules':
+            # 현재 적용 중인 필터 규칙 (파일이 바뀌었으면 여기서 다시 읽음)
+            rules = get_rules()
+            self.outbox.send(message.channel,
+                             f'📐 **필터 규칙** (`{os.path.basename(RULES_FILE)}`)\n```{rules.summary()}```')
+                
+        elif content == '!help':
             help_text = """
 🎲 **당첨번호 생성기 명령어**
 
 **기본 명령어:**
 • `!num` - 새로운 추천번호 생성 (15개 조합)
 • `!update` - 최신 당첨번호 수동 업데이트
+• `!cancel` - 진행 중인 추천번호 생성 중단 (그때까지 만든 번호만 저장)
 • `!status` - 봇 상태 및 다음 자동 업데이트 시간 확인
 
 **분석 명령어:**
 • `!anal` - 전체 추천번호 성과 분석 리포트
+• `!pair [N]` - 함께 자주 나온 번호 쌍/3개 조합 (N: 최근 N회)
+• `!query <조건식>` - 조건을 만족하는 전체 조합 수/역대 당첨 횟수 (예: `!query 120 <= sum <= 180 and odd == 3`)
+• `!rules` - 현재 적용 중인 필터 규칙 (lotto_rules.json)
+• `!stats [sum odd zones gap frequency]` - 역대 당첨번호 분포 차트 (내 추천 기록과 비교)
 • `!help` - 이 도움말 표시
 • `!test` - 봇 작동 상태 테스트
+• `!profile [sample] <명령>` - (관리자) 명령 1회 실행 시간 프로파일
+• `!metrics` - (관리자) 명령 지연시간/이벤트 루프 지연 요약
+• `!mem [trace on|off]` - (관리자) 메모리 사용량/캐시/명령별 할당 상위 위치
 
 **자동 기능:**
 • 매주 토요일 23:00에 자동으로 최신 당첨번호 확인 및 추천번호 생성
 • 추천번호 적중률 자동 분석 및 알림
             """
-            await message.channel.send(help_text)
+            self.outbox.send(message.channel, help_text)
+            
+        elif content == '!test':
+            self.outbox.send(message.channel, '봇이 정상 작동 중입니다!')
             
-        elif message.content == '!test':
-            await message.channel.send('봇이 정상 작동 중입니다!')
+        elif content == '!metrics':
+            # 관리자 전용: 명령 지연/하위 프로세스/스케줄 작업/이벤트 루프 지연 요약
+            if not is_admin(message):
+                self.outbox.send(message.channel, '관리자만 사용할 수 있는 명령입니다.')
+                return
+            text = registry.summary()
+            if METRICS_PORT:
+                text += f'\n\n엔드포인트: http://127.0.0.1:{METRICS_PORT}/metrics'
+            self.outbox.send(message.channel, f'```{text}```')
+            
+        elif content == '!mem' or content.startswith('!mem '):
+            # 관리자 전용: RSS/캐시 크기/명령별 peak와 할당 위치 (!mem trace on|off)
+            if not is_admin(message):
+                self.outbox.send(message.channel, '관리자만 사용할 수 있는 명령입니다.')
+                return
+            option = content[len('!mem'):].strip()
+            if option == 'trace on':
+                start_tracing(TRACEMALLOC_FRAMES)
+            elif option == 'trace off':
+                stop_tracing()
+            elif option:
+                self.outbox.send(message.channel, '사용법: `!mem` 또는 `!mem trace on|off`')
+                return
+            text = await asyncio.to_thread(render_memory_report)
+            if option and is_tracing():
+                text = '할당 추적을 켰습니다. 다음 명령부터 기록됩니다.\n' + text
+            self.outbox.send(message.channel, f'```{text}```')
+            
+        elif content.startswith('!profile '):
+            # 관리자 전용: 명령 1회 프로파일 (!profile !update / !profile sample !anal)
+            if not is_admin(message):
+                self.outbox.send(message.channel, '관리자만 사용할 수 있는 명령입니다.')
+                return
+            target = content[len('!profile '):].strip()
+            mode = 'cprofile'
+            if target.startswith('sample '):
+                mode = 'sample'
+                target = target[len('sample '):].strip()
+            if not target.startswith('!') or target.startswith('!profile'):
+                self.outbox.send(message.channel, '사용법: `!profile !update` 또는 `!profile sample !anal`')
+                return
+            try:
+                with capture_profile(target, mode) as result:
+                    await self.handle_command(message, target)
+            except ProfilerBusy:
+                self.outbox.send(message.channel, '이미 프로파일링 중입니다. 끝난 뒤 다시 시도해 주세요.')
+                return
+            summary = result['summary'][:1500]
+            self.outbox.send(message.channel,
+                f"⏱️ `{target}` 프로파일 ({result['elapsed']:.2f}초, {mode})\n"
+                f"저장: {result['path']}\n```{summary}```")
+
+    @contextlib.contextmanager
+    def track_generation(self, channel, owner_id, cancel):
+        """생성 작업을 !cancel 대상으로 등록 (with 블록 동안)"""
+        running = RunningGeneration(getattr(channel, 'id', None), owner_id, cancel)
+        self.generations.append(running)
+        try:
+            yield running
+        finally:
+            self.generations.remove(running)
 
+    @profiled('scheduled_update')
     async def scheduled_update(self):
+        with timed('lotto_scheduler_job_duration_seconds', job='lotto_update'):
+            await self._scheduled_update()
+
+    async def _scheduled_update(self):
         logging.info('스케줄된 업데이트가 시작되었습니다.')
         if not self.channel:
             logging.error('채널을 찾을 수 없습니다.')
             return
             
         try:
-            await self.run_update_and_send(self.channel, is_scheduled=True)
+            # 파일 감시 중이면 정기 작업은 놓친 회차가 있을 때만 처리 (중복 생성 방지)
+            await self.run_update_and_send(self.channel, is_scheduled=True,
+                                           only_new=self.watcher is not None)
             logging.info('스케줄된 업데이트가 완료되었습니다.')
         except Exception as e:
             logging.error(f'스케줄된 업데이트 중 오류 발생: {e}')
             try:
-                await self.channel.send(f'⚠️ 자동 업데이트 중 오류가 발생했습니다: {e}')
+                self.outbox.send(self.channel, f'⚠️ 자동 업데이트 중 오류가 발생했습니다: {e}')
             except Exception as send_error:
                 logging.error(f'에러 메시지 전송 실패: {send_error}')
 
-    async def run_update_and_send(self, channel, is_scheduled=False):
+    async def scheduled_fetch(self):
+        with timed('lotto_scheduler_job_duration_seconds', job='draw_fetch'):
+            deadline = datetime.datetime.now().timestamp() + FETCH_WINDOW * 60
+            if not await self.fetch_draw(deadline):
+                logging.warning(f'{FETCH_WINDOW:.0f}분 동안 새 당첨번호가 발표되지 않았습니다.')
+
+    @profiled('fetch_draw')
+    async def fetch_draw(self, deadline=None):
+        """
+        CSV 다음 회차 조회 (deadline이 있으면 나올 때까지 반복)
+        -> 나오면 감시 위치에 JSON 기록 (감시 중이면 감시가, 아니면 여기서 바로 반영)
+        """
+        round_no = await asyncio.to_thread(next_round)
         try:
-            proc = await asyncio.create_subprocess_exec(
-                'python3', 'update_lotto.py',
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            try:
-                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=60)
-            except asyncio.TimeoutError:
-                proc.kill()
-                await proc.wait()
-                await channel.send('업데이트가 1분 내에 끝나지 않았습니다.')
-                return
-                
-            output = (stdout + stderr).decode().strip()
-            if proc.returncode == 0:
-                # [수정] update_lotto.py의 영어 출력 메시지에 맞춰 조건문 변경
-                if 'already exists' in output:
-                    msg = '현재는 이게 최신이에요!\n'
-                    
-                    # 수동 업데이트도 전체 분석 포함
-                    # 2. 누적된 추천 번호 중 1등 당첨번호와 일치 여부 알림
-                    try:
-                        from lotto_analyzer import generate_performance_report
-                        full_report = generate_performance_report()
-                        
-                        # 1등 당첨번호 발견 부분만 추출
-                        if "🎊 **1등 당첨번호 발견!**" in full_report:
-                            lines = full_report.split('\n')
-                            jackpot_section = []
-                            in_jackpot_section = False
-                            for line in lines:
-                                if "🎊 **1등 당첨번호 발견!**" in line:
-                                    in_jackpot_section = True
-                                    jackpot_section.append(line)
-                                elif in_jackpot_section:
-                                    if line.strip() == "" and jackpot_section:
-                                        break
-                                    jackpot_section.append(line)
-                            
-                            if jackpot_section:
-                                msg += '\n🎊 **축하합니다! 1등 당첨번호 발견!**\n'
-                                msg += '\n'.join(jackpot_section[1:]) + '\n'  # 첫 줄 제외하고 추가
-                        else:
-                            msg += '\n📝 누적 추천번호 중 1등 당첨번호는 아직 없습니다.\n'
-                    except Exception as e:
-                        logging.error(f'1등 당첨번호 확인 중 오류: {e}')
-                        msg += f'\n1등 당첨번호 확인 중 오류가 발생했습니다: {e}\n'
-                    
-                    # 3. 누적된 추천번호 성과 분석 (이전 추천번호 적중률)
-                    try:
-                        performance = check_latest_round_performance()
-                        if performance:
-                            msg += '\n📊 최신 추천번호 성과 분석:\n'
-                            msg += f"✅ {performance['recommendation_no']:02d}번째 추천 → {performance['target_round']}회차 결과\n"
-                            msg += f"🎯 최대 적중: {performance['max_matches']}개\n"
-                            
-                            # 3개 이상 적중한 라인들 표시
-                            good_lines = [line for line in performance['line_results'] if line['matches'] >= 3]
-                            if good_lines:
-                                msg += f"🔥 3개 이상 적중 라인:\n"
-                                for line in good_lines:
-                                    nums_str = ' '.join(map(str, line['numbers']))
-                                    msg += f"   {line['set']}세트-{line['line']}: {nums_str} ({line['matches']}개)\n"
-                            else:
-                                msg += "아쉽게도 3개 이상 적중한 라인은 없었습니다.\n"
-                        else:
-                            msg += '\n📊 최신 추천번호 성과 분석:\n'
-                            msg += "아직 분석할 수 있는 성과 데이터가 없습니다.\n"
-                    except Exception as e:
-                        logging.error(f'성과 분석 중 오류: {e}')
-                        msg += f'\n📊 성과 분석 중 오류가 발생했습니다: {e}\n'
-                    
-                    # 4. 새로운 추천번호 생성
-                    try:
-                        result = subprocess.run(['python3', 'lotto_generator.py'], 
-                                              capture_output=True, text=True, check=True)
-                        msg += '\n🎲 새로운 추천번호도 생성했어요!\n'
-                        
-                        # 생성된 추천번호 표시
-                        result_text = get_latest_lotto_result()
-                        msg += f'\n```{result_text}```\n'
-                        
-                        logging.info('자동 추천번호 생성 완료')
-                    except Exception as e:
-                        logging.error(f'추천번호 생성 중 오류 발생: {e}')
-                        msg += f'\n추천번호 생성 중 오류가 발생했습니다: {e}\n'
-                    
-                    # 현재 최신 당첨번호 정보만 표시 (새로운 추천번호 생성 없음)
-                    msg += '\n📈 오늘 기준 최신 당첨번호에요:\n'
-                
-                # [수정] 성공 메시지도 영어 출력에 맞춰 변경
-                elif 'Successfully updated' in output:
-                    msg = '🎉 최신 당첨번호가 업데이트되었습니다!\n'
-                    
-                    # 2. 누적된 추천 번호 중 1등 당첨번호와 일치 여부 알림
-                    try:
-                        from lotto_analyzer import generate_performance_report
-                        full_report = generate_performance_report()
-                        
-                        # 1등 당첨번호 발견 부분만 추출
-                        if "🎊 **1등 당첨번호 발견!**" in full_report:
-                            lines = full_report.split('\n')
-                            jackpot_section = []
-                            in_jackpot_section = False
-                            for line in lines:
-                                if "🎊 **1등 당첨번호 발견!**" in line:
-                                    in_jackpot_section = True
-                                    jackpot_section.append(line)
-                                elif in_jackpot_section:
-                                    if line.strip() == "" and jackpot_section:
-                                        break
-                                    jackpot_section.append(line)
-                            
-                            if jackpot_section:
-                                msg += '\n🎊 **축하합니다! 1등 당첨번호 발견!**\n'
-                                msg += '\n'.join(jackpot_section[1:]) + '\n'  # 첫 줄 제외하고 추가
-                        else:
-                            msg += '\n📝 누적 추천번호 중 1등 당첨번호는 아직 없습니다.\n'
-                    except Exception as e:
-                        logging.error(f'1등 당첨번호 확인 중 오류: {e}')
-                        msg += f'\n1등 당첨번호 확인 중 오류가 발생했습니다: {e}\n'
-                    
-                    # 3. 누적된 추천번호 성과 분석 (이전 추천번호 적중률)
-                    try:
-                        performance = check_latest_round_performance()
-                        if performance:
-                            msg += '\n📊 이전 추천번호 성과 분석:\n'
-                            msg += f"✅ {performance['recommendation_no']:02d}번째 추천 → {performance['target_round']}회차 결과\n"
-                            msg += f"🎯 최대 적중: {performance['max_matches']}개\n"
-                            
-                            # 3개 이상 적중한 라인들 표시
-                            good_lines = [line for line in performance['line_results'] if line['matches'] >= 3]
-                            if good_lines:
-                                msg += f"🔥 3개 이상 적중 라인:\n"
-                                for line in good_lines:
-                                    nums_str = ' '.join(map(str, line['numbers']))
-                                    msg += f"   {line['set']}세트-{line['line']}: {nums_str} ({line['matches']}개)\n"
-                            else:
-                                msg += "아쉽게도 3개 이상 적중한 라인은 없었습니다.\n"
-                        else:
-                            msg += '\n📊 이전 추천번호 성과 분석:\n'
-                            msg += "아직 분석할 수 있는 성과 데이터가 없습니다.\n"
-                    except Exception as e:
-                        logging.error(f'성과 분석 중 오류: {e}')
-                        msg += f'\n📊 성과 분석 중 오류가 발생했습니다: {e}\n'
-                    
-                    # 4. 새로운 추천번호 생성
-                    try:
-                        result = subprocess.run(['python3', 'lotto_generator.py'], 
-                                              capture_output=True, text=True, check=True)
-                        msg += '\n🎲 새로운 추천번호도 생성했어요!\n'
-                        
-                        # 생성된 추천번호 표시
-                        result_text = get_latest_lotto_result()
-                        msg += f'\n```{result_text}```\n'
-                        
-                        logging.info('자동 추천번호 생성 완료')
-                    except Exception as e:
-                        logging.error(f'추천번호 생성 중 오류 발생: {e}')
-                        msg += f'\n추천번호 생성 중 오류가 발생했습니다: {e}\n'
-                    
-                    # 현재 최신 당첨번호 정보만 표시 (새로운 추천번호 생성 없음)
-                    msg += '\n📈 오늘 기준 최신 당첨번호에요:\n'
-                else:
-                    msg = '업데이트 결과:\n' + output + '\n'
-                    
-                # 최신 당첨번호 추출 (lotto_total.csv 기준)
-                try:
-                    # [주의] lotto_total.csv만 사용하는 경우를 대비해 예외처리
-                    # update_lotto.py는 lotto_total.csv만 갱신하므로, 개별 파일을 찾는 glob 로직이
-                    # 최신 번호를 못 가져올 수 있습니다. 이 경우 lotto_total.csv를 직접 읽습니다.
-                    target_file = 'lotto_total.csv'
-                    if os.path.exists(target_file):
-                        df = pd.read_csv(target_file)
-                        if not df.empty:
-                            last_row = df.iloc[-1]
-                            # 컬럼명이 1,2,3,4,5,6 인지 확인
-                            try:
-                                nums = [str(last_row[str(i)]) for i in range(1,7)]
-                                bonus = str(last_row['보너스']) if '보너스' in last_row else ''
-                                msg += f"회차: {last_row['회차']}\n날짜: {last_row['추첨일']}\n번호: {' '.join(nums)} + {bonus}"
-                            except:
-                                # 컬럼명이 다를 경우 예외 처리 (인덱스로 접근 등)
-                                pass
-                except Exception as e:
-                    logging.error(f'당첨번호 추출 중 오류: {e}')
-                    msg += f"\n당첨번호 추출 중 오류: {e}"
+            if deadline is None:
+                draw = await self.fetcher.fetch(round_no)
             else:
-                msg = f'당첨번호 데이터 최신화 실패!\n{output}'
+                draw = await self.fetcher.poll(round_no, FETCH_INTERVAL, deadline)
+        except FetchError as e:
+            logging.warning(f'당첨번호 조회 실패: {e}')
+            return False
+        if draw is None:
+            return False
+        logging.info(f"당첨번호 조회: {draw['round']}회 {draw['numbers']} + {draw['bonus']}")
+        await asyncio.to_thread(write_latest, WATCH_FILE, draw)
+        if self.watcher is None:
+            await self.on_draw_file(WATCH_FILE)
+        return True
+
+    @profiled('on_draw_file')
+    async def on_draw_file(self, path):
+        """
+        감시 중인 당첨번호 JSON이 새로 쓰임 -> 바로 반영/채점/생성
+        실패하면 False -> 감시가 이 내용을 처리됨으로 기록하지 않고 나중에 다시 시도
+        """
+        logging.info(f'당첨번호 파일 감지: {path}')
+        await self.wait_until_ready()
+        if not self.channel:
+            logging.error('채널을 찾을 수 없습니다.')
+            return False
+        return await self.run_update_and_send(self.channel, label='새 당첨번호 반영',
+                                              only_new=True, json_file=path)
+
+    @profiled('run_update_and_send')
+    async def run_update_and_send(self, channel, is_scheduled=False, label=None,
+                                  only_new=False, json_file=update_lotto.JSON_FILE, tenant=None,
+                                  owner_id=None):
+        """
+        업데이트 파이프라인 실행 + 결과 전송 (오류도 채널로 알림)
+        반환: 새 추천까지 만들었거나 이미 처리한 회차면 True, 실패하면 False
+        """
+        # 정기 작업/파일 감지는 채널 기준 테넌트 (user 범위면 기본 테넌트)
+        if tenant is None:
+            tenant = tenant_for_channel(channel, TENANT_SCOPE)
+        # 새 추천번호 생성 단계: 시간 제한 + 진행 상황 메시지 + !cancel
+        cancel = lotto_generator.CancelToken()
+        progress = ProgressMessage(self.outbox, channel,
+                                   functools.partial(render_generation_progress, '새 추천번호 생성'),
+                                   show_after=PROGRESS_SHOW_AFTER,
+                                   interval=PROGRESS_EDIT_INTERVAL).start()
+        try:
+            async with self.update_lock:
+                try:
+                    with self.track_generation(channel, owner_id, cancel.cancel):
+                        run = await build_update_pipeline(json_file, only_new, tenant, cancel=cancel,
+                                                          progress=progress.update).run()
+                finally:
+                    await progress.finish()
+            logging.info(f'업데이트 파이프라인: {run.summary()}')
+            for name, error in run.errors.items():
+                if name not in run.skipped and not isinstance(error, AlreadyHandled):
+                    logging.error(f'업데이트 단계 {name} 오류: {error}')
+            ok = run.ok('generate') or isinstance(run.errors.get('ingest'), AlreadyHandled)
+            if not run.ok('render'):
+                raise run.errors['render']
+            msg = run.get('render')
+            if msg is None:
+                logging.info(f'업데이트 생략: {run.errors.get("ingest")}')
+                return ok
         except Exception as e:
+            ok = False
             msg = f'당첨번호 데이터 최신화 중 오류 발생: {e}'
             logging.error(f'업데이트 중 오류 발생: {e}')
             
         now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M')
         if is_scheduled:
-            msg = f'[{now} 자동업데이트]\n' + msg
-        await channel.send(msg)
+            label = label or '자동업데이트'
+        if label:
+            msg = f'[{now} {label}]\n' + msg
+        self.outbox.send(channel, msg)
+        return ok
 
 # 4. 봇 실행
 if __name__ == "__main__":
@@ -1,18 +1,36 @@
 import re
 import os
+import sys
+import json
+import datetime
 from collections import defaultdict
 import pandas as pd
 
+from lotto_probability import (TIER_NAMES, TICKET_PRICE, block_probabilities,
+                               cached_block_probabilities, expected_value, get_tier,
+                               line_tier_probabilities, poisson_interval,
+                               random_block_probabilities)
+from lotto_game import GAME
+from lotto_history import get_history_version
+from lotto_memory import BudgetCache
+from lotto_profiler import profiled
+from lotto_strategies import DEFAULT_STRATEGY, STRATEGIES, strategy_title
+
 # ==========================================
 # [설정] 파일 경로 및 CSV 파일명
 # ==========================================
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-TOTAL_CSV = "lotto_total.csv"
+TOTAL_CSV = GAME.data_file
 
 def get_file_path(filename):
     """현재 스크립트 위치 기준 절대 경로 반환"""
     return os.path.join(BASE_DIR, filename)
 
+def get_result_file(result_file=None):
+    """추천 기록 파일 (None = 기본 테넌트의 lotto_result.txt)"""
+    return result_file or get_file_path(GAME.result_file)
+
+@profiled()
 def load_lotto_data():
     """lotto_total.csv 파일을 읽어서 DataFrame으로 반환"""
     csv_path = get_file_path(TOTAL_CSV)
@@ -39,9 +57,10 @@ def load_lotto_data():
         print(f"Error loading CSV: {e}")
         return None
 
-def parse_recommendation_history():
-    """lotto_result.txt에서 모든 추천번호 기록을 파싱"""
-    result_file = get_file_path('lotto_result.txt')
+@profiled()
+def parse_recommendation_history(result_file=None):
+    """lotto_result.txt(또는 테넌트별 추천 기록)에서 모든 추천번호 기록을 파싱"""
+    result_file = get_result_file(result_file)
     if not os.path.exists(result_file):
         return []
     
@@ -75,6 +94,10 @@ def parse_recommendation_history():
         block = blocks[i + 1]
         
         # 회차 정보 추출
+        # A/B 비교 전략 (표시 없는 블록은 기본 전략)
+        strategy_match = re.search(r'\[전략 (\S+)\]', block)
+        strategy = strategy_match.group(1) if strategy_match else DEFAULT_STRATEGY
+        
         round_match = re.search(r'\[직전회차 (\d+)회\]', block)
         if round_match:
             round_no = int(round_match.group(1))
@@ -84,36 +107,36 @@ def parse_recommendation_history():
             target_round = latest_round + rec_no - 5 
         
         numbers = []
+        bonuses = []
         lines = block.split('\n')
-        current_set = []
         
         for line in lines:
             line = line.strip()
             if not line: continue
             
-            line_match = re.match(r'^([A-E]): ([\d\s]+)', line)
+            # 보너스 볼을 따로 고르는 게임은 '1 2 3 4 5 + 7' 형식 (lotto_game)
+            line_match = re.match(r'^([A-E]): ([\d\s+]+)', line)
             if line_match:
-                nums = [int(x) for x in line_match.group(2).split()]
-                if len(nums) == 6:
-                    current_set.append(nums)
-                    if len(current_set) == 5:
-                        numbers.extend(current_set)
-                        current_set = []
-        
-        if current_set: numbers.extend(current_set)
+                parsed = GAME.parse_line(line_match.group(2))
+                if parsed is not None:
+                    numbers.append(parsed[0])
+                    bonuses.append(parsed[1])
         
         if numbers:
             recommendations.append({
                 'recommendation_no': rec_no,
                 'target_round': target_round,
-                'numbers': numbers
+                'numbers': numbers,
+                'bonuses': bonuses,
+                'strategy': strategy
             })
     
     return recommendations
 
-def get_winning_numbers(round_no):
-    """lotto_total.csv에서 특정 회차 당첨번호 찾기"""
-    df = load_lotto_data()
+@profiled()
+def get_winning_numbers(round_no, df=None):
+    """lotto_total.csv에서 특정 회차 당첨번호 찾기 (df를 넘기면 CSV를 다시 읽지 않음)"""
+    if df is None: df = load_lotto_data()
     if df is None: return None
     
     try:
@@ -131,17 +154,17 @@ def get_winning_numbers(round_no):
             
         row = round_data.iloc[0]
         
-        # 당첨번호 추출 (컬럼명 '1'~'6' 또는 인덱스 3~8)
+        # 당첨번호 추출 (컬럼명 '1'~'6' 또는 인덱스 3~8, 게임의 번호 개수만큼)
         winning_nums = []
         # 컬럼명으로 시도
-        if '1' in df.columns and '6' in df.columns:
-            for k in range(1, 7):
-                winning_nums.append(int(row[str(k)]))
+        if all(c in df.columns for c in GAME.number_columns):
+            for c in GAME.number_columns:
+                winning_nums.append(int(row[c]))
         else:
             # 인덱스로 시도 (보통 4번째~9번째가 번호)
             # update_lotto.py: date, round, date, 1, 2, 3, 4, 5, 6, bonus
             # indices: 0, 1, 2, 3, 4, 5, 6, 7, 8, 9
-            for k in range(3, 9):
+            for k in range(3, 3 + GAME.pick):
                 winning_nums.append(int(row.iloc[k]))
 
         # 보너스 번호
@@ -151,7 +174,7 @@ def get_winning_numbers(round_no):
         elif '보너스' in df.columns:
             bonus = int(row['보너스'])
         else:
-            bonus = int(row.iloc[9])
+            bonus = int(row.iloc[3 + GAME.pick])
 
         # 날짜
         date_val = str(row.iloc[0]) # 첫번째 컬럼이 보통 날짜
@@ -168,27 +191,49 @@ def get_winning_numbers(round_no):
 def count_matches(recommended_nums, winning_nums):
     return len(set(recommended_nums) & set(winning_nums))
 
-def analyze_recommendations():
-    recommendations = parse_recommendation_history()
+def bonus_hit(rec_nums, rec_bonus, bonus):
+    """보너스 적중 (로또6/45: 보너스 번호 포함, 보너스 볼을 고르는 게임: 보너스 볼 일치)"""
+    if GAME.bonus_pool:
+        return rec_bonus is not None and rec_bonus == bonus
+    return bonus in rec_nums
+
+def is_jackpot(line, winning_nums, bonus):
+    """1등 (번호 전부 일치, 보너스 볼을 고르는 게임은 보너스 볼까지)"""
+    if line['matches'] != GAME.pick or set(line['numbers']) != set(winning_nums):
+        return False
+    return not GAME.bonus_pool or line.get('bonus') == bonus
+
+@profiled()
+def analyze_recommendations(result_file=None):
+    recommendations = parse_recommendation_history(result_file)
     results = []
+    df = load_lotto_data()
     
     for rec in recommendations:
         target_round = rec['target_round']
-        winning_data = get_winning_numbers(target_round)
+        winning_data = get_winning_numbers(target_round, df)
         
         if not winning_data:
             continue
             
         winning_nums = winning_data['numbers']
+        bonus = winning_data['bonus']
         line_results = []
         for i, rec_nums in enumerate(rec['numbers']):
             matches = count_matches(rec_nums, winning_nums)
-            line_results.append({
+            rec_bonus = rec['bonuses'][i]
+            hit = bonus_hit(rec_nums, rec_bonus, bonus)
+            line = {
                 'line': chr(65 + (i % 5)),
                 'set': i // 5 + 1,
                 'numbers': rec_nums,
-                'matches': matches
-            })
+                'matches': matches,
+                # 등수 기준(lotto_probability)이 있는 게임만 등수 표시
+                'tier': get_tier(matches, hit) if GAME.tiers else None
+            }
+            if GAME.bonus_pool:
+                line.update(bonus=rec_bonus, bonus_hit=hit)
+            line_results.append(line)
         
         max_matches = max(line['matches'] for line in line_results) if line_results else 0
         
@@ -196,21 +241,25 @@ def analyze_recommendations():
             'recommendation_no': rec['recommendation_no'],
             'target_round': target_round,
             'winning_numbers': winning_nums,
+            'bonus': bonus,
             'winning_date': winning_data['date'],
             'line_results': line_results,
             'max_matches': max_matches,
-            'total_lines': len(line_results)
+            'total_lines': len(line_results),
+            'strategy': rec['strategy']
         })
     
     return results
 
-def check_latest_round_performance():
-    recommendations = parse_recommendation_history()
+@profiled()
+def check_latest_round_performance(result_file=None):
+    recommendations = parse_recommendation_history(result_file)
     if not recommendations: return None
+    df = load_lotto_data()
     
     for rec in reversed(recommendations):
         target_round = rec['target_round']
-        winning_data = get_winning_numbers(target_round)
+        winning_data = get_winning_numbers(target_round, df)
         if not winning_data: continue
         
         winning_nums = winning_data['numbers']
@@ -238,8 +287,8 @@ def check_latest_round_performance():
         }
     return None
 
-def get_recommendation_date(recommendation_no):
-    result_file = get_file_path('lotto_result.txt')
+def get_recommendation_date(recommendation_no, result_file=None):
+    result_file = get_result_file(result_file)
     if not os.path.exists(result_file): return "날짜 정보 없음"
     
     with open(result_file, encoding='utf-8') as f:
@@ -256,59 +305,303 @@ def get_recommendation_date(recommendation_no):
             break
     return "날짜 정보 없음"
 
-def generate_performance_report():
-    results = analyze_recommendations()
-    if not results: return "분석할 추천번호 데이터가 없습니다."
+def _format_expected(value):
+    """아주 작은 기대 횟수는 지수 표기"""
+    return f"{value:.2f}" if value >= 0.01 or value == 0 else f"{value:.1e}"
+
+@profiled()
+def build_baseline(results, exact=False):
+    """
+    관측 결과 vs 무작위 구매 기대값 비교 데이터 (lotto_probability)
+    - 등수별: 전체 줄 수 x 1줄 확률 (95% 범위)
+    - 최고 적중 개수별: 추천 세트마다 정확 확률(겹침 반영) 합산 / 무작위 세트 기준
+      정확 확률은 세트당 전체 추첨 결과 열거(약 1초)가 필요하므로 이미 계산된 세트만 쓰고,
+      없는 세트는 무작위 세트 공식으로 대신합니다. (exact=True면 없는 세트도 계산)
+    """
+    line_probs = line_tier_probabilities()
+    all_lines = [line for result in results for line in result['line_results']]
+    n_lines = len(all_lines)
     
-    total_recommendations = len(results)
-    match_counts = defaultdict(int)
-    jackpot_matches = []
+    observed_tiers = defaultdict(int)
+    for line in all_lines:
+        observed_tiers[line['tier']] += 1
+    
+    tiers = []
+    for tier in [1, 2, 3, 4, 5]:
+        expected = n_lines * float(line_probs[tier])
+        low, high = poisson_interval(expected)
+        tiers.append({'tier': tier, 'observed': observed_tiers[tier],
+                      'expected': expected, 'low': low, 'high': high})
     
+    # 세트별 최고 적중 개수: 실제 추천 세트의 정확 확률 합산 vs 무작위 세트
+    expected_best = defaultdict(float)
+    random_best = defaultdict(float)
+    observed_best = defaultdict(int)
+    exact_blocks = 0
+    for result in results:
+        lines = [line['numbers'] for line in result['line_results']]
+        random_matches, _ = random_block_probabilities(len(lines))
+        cached = block_probabilities(lines) if exact else cached_block_probabilities(lines)
+        if cached is None:
+            matches = random_matches
+        else:
+            matches = cached[0]
+            exact_blocks += 1
+        for m in range(7):
+            expected_best[m] += matches.get(m, 0)
+            random_best[m] += random_matches.get(m, 0)
+        observed_best[result['max_matches']] += 1
+    
+    best = []
+    for m in range(6, 1, -1):
+        low, high = poisson_interval(expected_best[m])
+        best.append({'matches': m, 'observed': observed_best[m], 'expected': expected_best[m],
+                     'low': low, 'high': high, 'random': random_best[m]})
+    
+    return {
+        'n_lines': n_lines,
+        'tiers': tiers,
+        'line_ev': expected_value(line_probs),
+        'best': best,
+        'blocks': len(results),
+        'exact_blocks': exact_blocks,
+    }
+
+@profiled()
+def build_strategy_breakdown(results, exact=False):
+    """
+    A/B 전략별 성과 (lotto_strategies): 추천 수, 최고 적중 분포,
+    등수별 관측 vs 무작위 구매 기대값 (전략마다 build_baseline)
+    """
+    groups = defaultdict(list)
+    for result in results:
+        groups[result.get('strategy', DEFAULT_STRATEGY)].append(result)
+    order = list(STRATEGIES)
+    breakdown = []
+    for name in sorted(groups, key=lambda n: (order.index(n) if n in order else len(order), n)):
+        group = groups[name]
+        best = defaultdict(int)
+        for result in group:
+            best[result['max_matches']] += 1
+        breakdown.append({
+            'strategy': name,
+            'title': strategy_title(name),
+            'recommendations': len(group),
+            'n_lines': sum(len(result['line_results']) for result in group),
+            'match_distribution': [[m, best[m]] for m in sorted(best, reverse=True)],
+            'baseline': build_baseline(group, exact) if GAME.tiers else None,
+        })
+    return breakdown
+
+def render_strategy_section(breakdown):
+    report = ["🧪 전략별 성과 (A/B, 관측 / 무작위 기대):"]
+    for row in breakdown:
+        report.append(f"  [{row['strategy']}] {row['title']}: 추천 {row['recommendations']}회, "
+                      f"{row['n_lines']}줄")
+        best = ', '.join(f"{m}개 {count}회" for m, count in row['match_distribution'])
+        report.append(f"    최고 적중: {best}")
+        if row['baseline']:
+            tiers = ' / '.join(f"{TIER_NAMES[t['tier']]} {t['observed']}회 (기대 {_format_expected(t['expected'])})"
+                               for t in reversed(row['baseline']['tiers']))
+            report.append(f"    {tiers}")
+    return report
+
+def render_baseline_section(baseline):
+    report = []
+    report.append(f"📐 무작위 구매 대비 등수별 적중 (총 {baseline['n_lines']}줄):")
+    for row in baseline['tiers']:
+        report.append(f"  {TIER_NAMES[row['tier']]}: 관측 {row['observed']}회 / "
+                      f"기대 {_format_expected(row['expected'])}회 (95% 범위 {row['low']}~{row['high']})")
+    report.append(f"  1줄 기대 당첨금: 약 {baseline['line_ev']:,.0f}원 (구매가 {TICKET_PRICE:,}원)")
+    
+    report.append("")
+    report.append("📐 세트 최고 적중 개수: 관측 vs 기대 (추천 세트 / 무작위 세트):")
+    if baseline.get('exact_blocks', 0) < baseline.get('blocks', 0):
+        report.append(f"  (정확 계산 {baseline['exact_blocks']}/{baseline['blocks']}세트, "
+                      f"나머지는 무작위 세트 공식)")
+    for row in baseline['best']:
+        report.append(f"  {row['matches']}개: 관측 {row['observed']}회 / 기대 {_format_expected(row['expected'])}회 "
+                      f"(95% 범위 {row['low']}~{row['high']}) / 무작위 {_format_expected(row['random'])}회")
+    return report
+
+# =========================================================
+#  성과 리포트 객체 (데이터 버전별 1회 계산 -> 메모리/디스크 캐시)
+#  테넌트(추천 기록 파일)마다 따로 캐시 -> 한 테넌트의 기록 변경이
+#  다른 테넌트의 캐시를 무효화하지 않음
+# =========================================================
+
+REPORT_FORMAT = 3
+REPORT_CACHE_FILE = get_file_path('lotto_report_cache.json')
+
+# 메모리 캐시 (추천 기록 파일별, 메모리 예산 LRU -> 버리면 디스크 캐시에서 다시 읽음)
+_report_cache = BudgetCache('reports')
+
+def get_report_cache_file(result_file=None):
+    """기본 테넌트는 기존 위치, 그 외에는 추천 기록 옆에 저장"""
+    if result_file is None:
+        return REPORT_CACHE_FILE
+    return os.path.join(os.path.dirname(result_file), 'lotto_report_cache.json')
+
+def get_report_versions(result_file=None):
+    """리포트가 의존하는 데이터 버전 (당첨 이력 + 추천 기록)"""
+    return {
+        'format': REPORT_FORMAT,
+        'history': get_history_version(get_file_path(TOTAL_CSV)),
+        'recommendations': get_history_version(get_result_file(result_file)),
+    }
+
+@profiled()
+def build_performance_report(result_file=None, exact=False):
+    """추천번호 성과 분석 결과를 구조화된 dict로 생성 (JSON 저장 가능)"""
+    results = analyze_recommendations(result_file)
+    report = {
+        'versions': get_report_versions(result_file),
+        'generated_at': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'total_recommendations': len(results),
+        'jackpot_matches': [],
+        'match_distribution': [],
+        'recent': [],
+        'latest': None,
+        'baseline': None,
+        'strategies': [],
+    }
+    if not results:
+        return report
+    
+    match_counts = defaultdict(int)
     for result in results:
         match_counts[result['max_matches']] += 1
         winning_nums = result['winning_numbers']
         for line in result['line_results']:
-            if line['matches'] == 6 and set(line['numbers']) == set(winning_nums):
-                jackpot_matches.append({
+            if is_jackpot(line, winning_nums, result['bonus']):
+                report['jackpot_matches'].append({
                     'recommendation_no': result['recommendation_no'],
-                    'target_round': result['target_round'],
+                    'target_round': int(result['target_round']),
                     'winning_date': result['winning_date'],
-                    'line': line,
-                    'numbers': line['numbers']
+                    'numbers': line['numbers'],
+                    'recommendation_date': get_recommendation_date(result['recommendation_no'],
+                                                                   result_file)
                 })
     
-    report = []
-    report.append("🎯 추천번호 성과 분석 리포트")
-    report.append("=" * 30)
-    report.append(f"총 추천 횟수: {total_recommendations}회")
-    report.append("")
+    report['match_distribution'] = [[m, match_counts[m]] for m in sorted(match_counts, reverse=True)]
+    report['recent'] = [{
+        'recommendation_no': result['recommendation_no'],
+        'target_round': int(result['target_round']),
+        'max_matches': result['max_matches']
+    } for result in results[-5:]]
     
-    if jackpot_matches:
-        report.append("🎊 **1등 당첨번호 발견!**")
-        for match in jackpot_matches:
-            rec_date = get_recommendation_date(match['recommendation_no'])
-            nums_str = ' '.join(map(str, match['numbers']))
-            report.append(f"  🏆 {match['recommendation_no']:02d}번째 추천 → {match['target_round']}회차 1등!")
-            report.append(f"      번호: {nums_str}")
-            report.append(f"      추천생성: {rec_date}")
-            report.append(f"      당첨발표: {match['winning_date']}")
+    # 가장 최근에 결과가 나온 추천 (check_latest_round_performance와 동일한 대상)
+    latest = results[-1]
+    report['latest'] = {
+        'recommendation_no': latest['recommendation_no'],
+        'target_round': int(latest['target_round']),
+        'winning_numbers': latest['winning_numbers'],
+        'winning_date': latest['winning_date'],
+        'max_matches': latest['max_matches'],
+        'line_results': latest['line_results']
+    }
+    # 무작위 구매 기대값 비교는 등수/당첨금 기준이 있는 게임만
+    if GAME.tiers:
+        report['baseline'] = build_baseline(results, exact)
+    report['strategies'] = build_strategy_breakdown(results, exact)
+    return report
+
+def _load_report_cache(cache_file=REPORT_CACHE_FILE):
+    try:
+        with open(cache_file, encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def _save_report_cache(report, cache_file=REPORT_CACHE_FILE):
+    try:
+        tmp = cache_file + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False)
+        os.replace(tmp, cache_file)
+    except Exception as e:
+        print(f"[WARN] 리포트 캐시 저장 실패: {e}")
+
+@profiled()
+def get_performance_report(force=False, result_file=None, exact=False):
+    """
+    성과 리포트 객체 반환 (result_file: 테넌트별 추천 기록, None = 기본)
+    당첨 이력/추천 기록이 그대로면 메모리 -> 디스크 캐시 순으로 재사용하고,
+    바뀐 경우에만 다시 계산합니다.
+    exact=True: 세트별 정확 확률을 모두 계산해서 다시 만듦 (오프라인용, 세트당 약 1초)
+    """
+    key = get_result_file(result_file)
+    cache_file = get_report_cache_file(result_file)
+    versions = get_report_versions(result_file)
+    if not force and not exact:
+        cached = _report_cache.get(key)
+        if cached is not None and cached['versions'] == versions:
+            return cached
+        cached = _load_report_cache(cache_file)
+        if cached is not None and cached.get('versions') == versions:
+            _report_cache[key] = cached
+            return cached
+    
+    report = build_performance_report(result_file, exact)
+    _report_cache[key] = report
+    _save_report_cache(report, cache_file)
+    return report
+
+def render_performance_report(report):
+    """리포트 객체 -> !anal 텍스트"""
+    total_recommendations = report['total_recommendations']
+    if not total_recommendations: return "분석할 추천번호 데이터가 없습니다."
+    
+    lines = []
+    lines.append("🎯 추천번호 성과 분석 리포트")
+    lines.append("=" * 30)
+    lines.append(f"총 추천 횟수: {total_recommendations}회")
+    lines.append("")
+    
+    if report['jackpot_matches']:
+        lines.append("🎊 **1등 당첨번호 발견!**")
+        lines.extend(render_jackpot_lines(report))
     else:
-        report.append("📝 **1등 당첨번호 현황**")
-        report.append("  아직까지 누적 추천번호 중에 1등 당첨번호는 없었습니다.")
+        lines.append("📝 **1등 당첨번호 현황**")
+        lines.append("  아직까지 누적 추천번호 중에 1등 당첨번호는 없었습니다.")
     
-    report.append("")
-    report.append("📊 최고 적중 개수별 분포:")
-    for matches in sorted(match_counts.keys(), reverse=True):
-        count = match_counts[matches]
+    lines.append("")
+    lines.append("📊 최고 적중 개수별 분포:")
+    for matches, count in report['match_distribution']:
         percentage = (count / total_recommendations) * 100
-        report.append(f"  {matches}개 적중: {count}회 ({percentage:.1f}%)")
+        lines.append(f"  {matches}개 적중: {count}회 ({percentage:.1f}%)")
     
-    report.append("")
-    report.append("📈 최근 5회 성과:")
-    for result in results[-5:]:
-        report.append(f"  {result['recommendation_no']:02d}번째 → {result['target_round']}회차: 최대 {result['max_matches']}개 적중")
+    lines.append("")
+    lines.append("📈 최근 5회 성과:")
+    for result in report['recent']:
+        lines.append(f"  {result['recommendation_no']:02d}번째 → {result['target_round']}회차: 최대 {result['max_matches']}개 적중")
+    
+    if report['baseline']:
+        lines.append("")
+        lines.extend(render_baseline_section(report['baseline']))
     
-    return "\n".join(report)
+    # 전략 비교(--strategies)로 만든 블록이 있을 때만 전략별 집계 표시
+    if len(report.get('strategies') or []) > 1:
+        lines.append("")
+        lines.extend(render_strategy_section(report['strategies']))
+    
+    return "\n".join(lines)
+
+def render_jackpot_lines(report):
+    """1등 당첨 추천 목록 (리포트/업데이트 메시지 공용)"""
+    lines = []
+    for match in report['jackpot_matches']:
+        nums_str = ' '.join(map(str, match['numbers']))
+        lines.append(f"  🏆 {match['recommendation_no']:02d}번째 추천 → {match['target_round']}회차 1등!")
+        lines.append(f"      번호: {nums_str}")
+        lines.append(f"      추천생성: {match['recommendation_date']}")
+        lines.append(f"      당첨발표: {match['winning_date']}")
+    return lines
+
+@profiled()
+def generate_performance_report(result_file=None, exact=False):
+    return render_performance_report(get_performance_report(result_file=result_file, exact=exact))
 
 if __name__ == "__main__":
-    print(generate_performance_report())
\ No newline at end of file
+    # --exact: 추천 세트별 정확 확률을 모두 계산해 캐시에 채움 (봇 밖에서 실행)
+    print(generate_performance_report(exact='--exact' in sys.argv[1:]))
\ No newline at end of file
@@ -0,0 +1,211 @@
+"""
+===============================================================================
+        추천번호 일괄 생성 (여러 블록을 한 번에, JSON Lines 스트리밍)
+===============================================================================
+1. generate_batch(n_blocks, args): 15줄 블록을 n개 만들어 만드는 대로 하나씩 전달
+   - 전역 중복 제거: 과거 당첨 번호 + 추천 기록 + 이번 실행에서 이미 만든 줄
+   - workers > 1: 프로세스 여러 개로 병렬 생성, 결과는 블록 번호 순서대로 전달
+     (조합 공간을 hash % workers로 나눠 맡기므로 작업끼리는 겹치지 않음)
+     이력/빈출 순위/제외 비트맵(열거형이면 유효 조합 인덱스까지)은 부모가 한 번만
+     공유 메모리에 올리고 작업은 복사 없이 연결 (lotto_shared)
+     -> 작업마다 CSV를 다시 읽거나 제외 집합을 pickle로 받지 않음
+     실행 중 새 회차가 반영되면 작업은 공유 스냅샷을 끊고 새 CSV 기준으로 계속
+   - seed 지정 시 블록마다 (seed, 블록 번호)로 난수를 초기화
+     (같은 seed + 같은 workers면 같은 결과)
+2. CLI: python lotto_generator.py batch 1000 [--workers 4] [--output tickets.jsonl]
+   - 한 줄에 블록 하나: {"block": 1, "base_round": 1206, "lines": [[...], ...]}
+     (보너스 볼을 따로 고르는 게임은 줄별 "bonuses": [...] 추가, lotto_game)
+   - 블록이 완성될 때마다 바로 기록 (stdout 출력 시 생성 로그는 stderr 또는 생략)
+   - 끝나면 처리량(블록/초, 줄/초)을 stderr에 출력
+3. lotto_result.txt(추천 기록)에는 기록하지 않습니다. (대량 발급/오프라인 분석용)
+===============================================================================
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import time
+
+import lotto_generator
+from lotto_game import GAME
+from lotto_profiler import profiled
+from lotto_shared import attach, publish
+
+def _log_target(verbose):
+    """generate_combinations의 print 출력 위치 (JSON 출력과 섞이지 않도록)"""
+    if verbose:
+        return contextlib.redirect_stdout(sys.stderr)
+    return contextlib.redirect_stdout(open(os.devnull, 'w'))
+
+def _base_round(csv_file):
+    """직전 회차 번호 (save_lotto_result와 같은 방식)"""
+    try:
+        with open(csv_file, encoding='utf-8') as f:
+            lines = f.readlines()
+        return int(lines[-1].split(',')[1])
+    except Exception:
+        return None
+
+def _generate_block(inputs, args, excluded, index, seed=None, verbose=False, partition=None):
+    if seed is not None:
+        random.seed(f'{seed}:{index}')
+    with _log_target(verbose) as target:
+        try:
+            return lotto_generator.generate_combinations(
+                excluded, inputs['last_draw'], n_sets=15,
+                cooccurrence_rule=lotto_generator.get_cooccurrence_rule(args),
+                sampler=args.sampler, wheel=args.wheel, pool_size=args.pool_size,
+                time_budget=args.time_budget, result_file=None, partition=partition)
+        finally:
+            if target is not sys.stderr:
+                target.close()
+
+def _block_bonuses(lines, index, seed=None):
+    """줄별 보너스 볼 (seed 지정 시 블록 번호별로 재현 가능)"""
+    rng = random.Random(f'{seed}:{index}:bonus') if seed is not None else random
+    return [GAME.sample_bonus(rng) for _ in lines]
+
+def _worker_main(k, workers, n_blocks, inputs, args, descriptor, seed, verbose, results):
+    """k번째 작업: 블록 k+1, k+1+workers, ... 을 조합 공간의 k번째 몫에서 생성"""
+    lotto_generator.SIMILARITY_WINDOW = args.similarity_window or None
+    if seed is None:
+        random.seed()   # fork로 복사된 난수 상태를 프로세스마다 새로 초기화
+    shared = None
+    try:
+        # 부모가 올린 이력 스냅샷에 연결 (CSV 다시 읽지 않음)
+        shared = attach(descriptor).install()
+        excluded = shared.exclusion
+        for index in range(k + 1, n_blocks + 1, workers):
+            if shared.attached and not shared.refresh():
+                print(f"[INFO] 작업 {k}: 이력이 바뀌어 공유 스냅샷 연결 해제 -> 새 CSV 기준으로 계속",
+                      file=sys.stderr)
+            lines = _generate_block(inputs, args, excluded, index, seed, verbose,
+                                    partition=(k, workers))
+            excluded.update(tuple(line) for line in lines)
+            results.put((index, lines))
+    except Exception as e:
+        results.put((-k - 1, repr(e)))
+    finally:
+        if shared is not None:
+            shared.close()
+
+@profiled()
+def generate_batch(n_blocks, args, workers=1, seed=None, verbose=False, stats=None,
+                   start_method=None):
+    """
+    (블록 번호, 15줄 목록)을 블록 번호 순서대로 yield
+    stats(dict)를 넘기면 base_round / regenerated(겹쳐서 다시 만든 블록 수)를 채웁니다.
+    start_method: 작업 프로세스 시작 방식 (None = 플랫폼 기본, fork / spawn / forkserver)
+    """
+    lotto_generator.SIMILARITY_WINDOW = args.similarity_window or None
+    inputs = lotto_generator.prepare_generation(args)
+    if inputs is None:
+        raise FileNotFoundError(lotto_generator.find_latest_lotto_file())
+    stats = stats if stats is not None else {}
+    stats.update(base_round=_base_round(inputs['csv_file']), regenerated=0)
+
+    # 제외 집합 하나를 계속 키워 나감 (블록마다 복사하지 않음)
+    excluded = set(inputs['past_combs'])
+    excluded |= lotto_generator.load_past_recommended_combinations(lotto_generator.get_result_file(args))
+
+    if workers <= 1:
+        for index in range(1, n_blocks + 1):
+            lines = _generate_block(inputs, args, excluded, index, seed, verbose)
+            excluded.update(tuple(line) for line in lines)
+            yield index, lines
+        return
+
+    # 병렬: 작업마다 조합 공간을 나눠 맡음 (hash % workers) -> 작업끼리는 겹칠 수 없음
+    # 부모는 블록 번호 순서로 다시 정렬해 전달하고, 만일을 대비해 중복만 다시 확인
+    # 작업에는 공유 메모리 descriptor만 넘김 (과거 조합/제외 집합은 비트맵으로 공유)
+    ctx = multiprocessing.get_context(start_method)
+    results = ctx.Queue(maxsize=workers * 4)
+    shared = publish(inputs['csv_file'], excluded,
+                     sampler=lotto_generator.resolve_sampler(args.sampler))
+    worker_inputs = {key: value for key, value in inputs.items() if key != 'past_combs'}
+    procs = [ctx.Process(target=_worker_main, daemon=True,
+                         args=(k, workers, n_blocks, worker_inputs, args, shared.descriptor,
+                               seed, verbose, results))
+             for k in range(workers)]
+    pending = {}
+    try:
+        for proc in procs:
+            proc.start()
+        for index in range(1, n_blocks + 1):
+            while index not in pending:
+                try:
+                    done, lines = results.get(timeout=1.0)
+                except queue.Empty:
+                    owner = procs[(index - 1) % workers]
+                    if not owner.is_alive() and results.empty():
+                        raise RuntimeError(f'작업 프로세스가 종료됨 (exit code {owner.exitcode})')
+                    continue
+                if done < 0:
+                    raise RuntimeError(f'작업 {-done - 1} 오류: {lines}')
+                pending[done] = lines
+            lines = pending.pop(index)
+            if any(tuple(line) in excluded for line in lines):
+                stats['regenerated'] += 1
+                lines = _generate_block(inputs, args, excluded, index, seed, verbose)
+            excluded.update(tuple(line) for line in lines)
+            yield index, lines
+    finally:
+        for proc in procs:
+            if proc.is_alive():
+                proc.terminate()
+            if proc.pid is not None:
+                proc.join()
+        shared.close()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='lotto_generator.py batch',
+                                     description='추천번호 블록 일괄 생성 (JSON Lines)')
+    parser.add_argument('blocks', type=int, help='생성할 블록(15줄) 수')
+    parser.add_argument('--workers', type=int, default=1, help='병렬 생성 프로세스 수')
+    parser.add_argument('--output', default='-', help='출력 파일 (기본: stdout)')
+    parser.add_argument('--seed', default=None, help='재현용 난수 시드')
+    parser.add_argument('--verbose', action='store_true', help='블록별 생성 로그를 stderr로 출력')
+    parser.add_argument('--start-method', choices=multiprocessing.get_all_start_methods(),
+                        default=None, help='작업 프로세스 시작 방식 (기본: 플랫폼 기본값)')
+    lotto_generator.add_generation_options(parser)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.blocks <= 0:
+        print("[ERROR] 블록 수는 1 이상이어야 합니다.", file=sys.stderr)
+        return
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    stats = {}
+    n_lines = 0
+    started = time.perf_counter()
+    try:
+        for index, lines in generate_batch(args.blocks, args, args.workers, args.seed,
+                                           args.verbose, stats, args.start_method):
+            record = {'block': index, 'base_round': stats['base_round'], 'lines': lines}
+            if GAME.bonus_pool:
+                record['bonuses'] = _block_bonuses(lines, index, args.seed)
+            out.write(json.dumps(record) + '\n')
+            out.flush()
+            n_lines += len(lines)
+    except BrokenPipeError:
+        # 받는 쪽이 먼저 끝남 (예: | head) -> 남은 생성 중단, 조용히 종료
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - started
+    print(f"[INFO] 일괄 생성 완료: {args.blocks}블록 / {n_lines}줄 / {elapsed:.2f}초 -> "
+          f"{args.blocks / elapsed:.1f}블록/초, {n_lines / elapsed:.0f}줄/초 "
+          f"(작업 프로세스 {args.workers}, 중복으로 다시 생성 {stats.get('regenerated', 0)}블록)",
+          file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
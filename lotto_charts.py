@@ -0,0 +1,264 @@
+"""
+===============================================================================
+        당첨 이력 분포 통계 / 차트 (!stats, 이력 버전별 캐시)
+===============================================================================
+1. 역대 당첨번호(lotto_history 스냅샷)의 분포를 numpy로 한 번에 계산
+   - 번호 합계, 홀수 개수, 구간 배치(규칙 ranges 기준, 예: 2-2-2),
+     인접 번호 간격, 번호별 출현 횟수
+   - 추천 기록(lotto_result.txt 또는 테넌트별 기록)의 같은 분포를 함께 계산해
+     비율로 비교 (필터 기준이 실제 당첨 분포와 어떻게 다른지)
+2. PNG 차트는 matplotlib(선택 설치)로 화면 없이 렌더링
+   - pyplot 대신 Figure 객체를 직접 써서 스레드에서 불러도 안전
+   - matplotlib가 없으면 텍스트 요약만 제공 (pip install matplotlib)
+   - 한글 글꼴이 없는 서버가 많아 차트 안의 글자는 영문
+3. 캐시 키 = 게임 + 이력 버전 + 추천 기록 버전 + 규칙 ranges digest
+   - 메모리: 분포 dict (추천 기록 파일별 1개)
+   - 디스크: CHARTS_DIR/<키>/<차트>.png (봇을 다시 시작해도 재사용)
+   -> 같은 버전이면 계산/렌더링 없이 바로 응답, 새 회차가 들어온 뒤 첫 요청만 다시 만듦
+===============================================================================
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+
+import numpy as np
+
+from lotto_game import GAME
+from lotto_history import TOTAL_CSV, get_history_version, load_history
+from lotto_memory import BudgetCache
+from lotto_metrics import registry
+from lotto_profiler import profiled
+from lotto_rules import get_rules
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CHARTS_DIR = os.environ.get('LOTTO_CHARTS_DIR', os.path.join(BASE_DIR, 'charts'))
+
+# 차트 모양이 바뀌면 올려서 예전 PNG 캐시를 쓰지 않게 함
+CHART_FORMAT = 1
+# 디스크에 남겨 둘 캐시 폴더 수 (테넌트/버전별, 오래된 것부터 삭제)
+MAX_CACHED_VERSIONS = 16
+
+SUM_BIN = 10
+MAX_GAP = 20
+TOP_PATTERNS = 10
+
+# 이름 -> 차트 제목
+CHARTS = {
+    'sum': 'Sum of numbers',
+    'odd': 'Odd numbers per line',
+    'zones': 'Zone split',
+    'gap': 'Gap between adjacent numbers',
+    'frequency': 'Draws per number',
+}
+
+# 캐싱 (추천 기록 파일별 (키, 분포), 메모리 예산 LRU)
+_stats_cache = BudgetCache('stats')
+
+# =========================================================
+#  분포 계산
+# =========================================================
+
+def compute_distribution(numbers, zones):
+    """(N, pick) 번호 배열 -> 분포 dict (개수, 배열은 회차/줄 단위 횟수)"""
+    numbers = np.sort(np.asarray(numbers, dtype=np.int16).reshape(-1, GAME.pick), axis=1)
+    max_sum = sum(range(GAME.pool - GAME.pick + 1, GAME.pool + 1))
+    sums = numbers.sum(axis=1)
+    zone_counts = np.stack([((numbers >= start) & (numbers <= end)).sum(axis=1)
+                            for start, end in zones], axis=1)
+    patterns, pattern_counts = np.unique(zone_counts, axis=0, return_counts=True)
+    return {
+        'n': len(numbers),
+        'sum': np.bincount(sums, minlength=max_sum + 1),
+        'sum_mean': float(sums.mean()) if len(numbers) else 0.0,
+        'sum_band': tuple(int(v) for v in np.percentile(sums, [10, 90])) if len(numbers) else (0, 0),
+        'odd': np.bincount((numbers % 2).sum(axis=1), minlength=GAME.pick + 1),
+        'gap': np.bincount(np.diff(numbers, axis=1).ravel(), minlength=GAME.pool),
+        'zones': {'-'.join(map(str, p)): int(c) for p, c in zip(patterns, pattern_counts)},
+        'frequency': np.bincount(numbers.ravel(), minlength=GAME.pool + 1)[1:],
+    }
+
+def _recommended_numbers(result_file):
+    from lotto_analyzer import parse_recommendation_history
+    lines = [nums for rec in parse_recommendation_history(result_file) for nums in rec['numbers']]
+    return np.array(lines, dtype=np.int16).reshape(-1, GAME.pick)
+
+def _cache_key(filename, result_file, rules):
+    from lotto_analyzer import get_result_file
+    parts = [GAME.name, CHART_FORMAT, get_history_version(filename),
+             get_history_version(get_result_file(result_file)), rules.digest('ranges')]
+    return hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()[:16]
+
+@profiled()
+def get_stats(filename=TOTAL_CSV, result_file=None):
+    """이력/추천 기록 분포 (버전이 그대로면 캐시)"""
+    rules = get_rules()
+    key = _cache_key(filename, result_file, rules)
+    cached = _stats_cache.get(result_file)
+    if cached is not None and cached['key'] == key:
+        registry.inc('lotto_stats_cache_total', result='hit')
+        return cached
+    registry.inc('lotto_stats_cache_total', result='miss')
+    history = load_history(filename)
+    stats = {
+        'key': key,
+        'rounds': (int(history['rounds'].min()), int(history['rounds'].max())) if len(history['rounds']) else None,
+        'zones': list(rules.ranges),
+        'history': compute_distribution(history['numbers'], rules.ranges),
+        'recommended': compute_distribution(_recommended_numbers(result_file), rules.ranges),
+    }
+    _stats_cache[result_file] = stats
+    return stats
+
+# =========================================================
+#  PNG 렌더링 (matplotlib 선택 설치)
+# =========================================================
+
+def _share(counts, n):
+    return np.asarray(counts, dtype=float) / n if n else np.zeros(len(counts))
+
+def _chart_series(stats, name):
+    """차트 이름 -> (x 라벨, 이력 비율, 추천 비율 또는 None)"""
+    history, recommended = stats['history'], stats['recommended']
+    if name == 'zones':
+        labels = sorted(history['zones'], key=history['zones'].get, reverse=True)[:TOP_PATTERNS]
+        values = [_share([d['zones'].get(p, 0) for p in labels], d['n']) for d in (history, recommended)]
+    elif name == 'sum':
+        size = -(-len(history['sum']) // SUM_BIN) * SUM_BIN
+        values = [_share(np.pad(d['sum'], (0, size - len(d['sum']))).reshape(-1, SUM_BIN).sum(axis=1), d['n'])
+                  for d in (history, recommended)]
+        labels = [str(i * SUM_BIN) for i in range(size // SUM_BIN)]
+        # 양 끝의 빈 구간은 생략
+        used = np.flatnonzero(values[0] + values[1])
+        if len(used):
+            keep = slice(used[0], used[-1] + 1)
+            labels, values = labels[keep], [v[keep] for v in values]
+    elif name == 'gap':
+        labels = [str(g) for g in range(1, MAX_GAP + 1)]
+        values = [_share(d['gap'][1:MAX_GAP + 1], d['n'] * (GAME.pick - 1)) for d in (history, recommended)]
+    elif name == 'odd':
+        labels = [str(k) for k in range(GAME.pick + 1)]
+        values = [_share(d['odd'], d['n']) for d in (history, recommended)]
+    else:
+        labels = [str(k) for k in GAME.numbers]
+        values = [_share(d['frequency'], d['n']) for d in (history, recommended)]
+    return labels, values[0], values[1] if recommended['n'] else None
+
+def _render_chart(stats, name, path):
+    from matplotlib.figure import Figure
+
+    labels, history, recommended = _chart_series(stats, name)
+    x = np.arange(len(labels))
+    width = 0.4 if recommended is not None else 0.8
+    fig = Figure(figsize=(10 if len(labels) > 20 else 7, 4), dpi=100)
+    ax = fig.add_subplot()
+    ax.bar(x - (width / 2 if recommended is not None else 0), history, width,
+           label=f"history ({stats['history']['n']} draws)")
+    if recommended is not None:
+        ax.bar(x + width / 2, recommended, width,
+               label=f"recommended ({stats['recommended']['n']} lines)")
+    ax.set_xticks(x)
+    ax.set_xticklabels(labels, fontsize=7 if len(labels) > 20 else 9,
+                       rotation=90 if len(labels) > 30 else 0)
+    ax.set_ylabel('share')
+    ax.set_title(f"{GAME.name}: {CHARTS[name]}")
+    ax.legend()
+    fig.tight_layout()
+    tmp = path + '.tmp.png'
+    fig.savefig(tmp)
+    os.replace(tmp, path)
+
+def _prune_chart_dirs(keep):
+    try:
+        dirs = [os.path.join(CHARTS_DIR, d) for d in os.listdir(CHARTS_DIR)]
+    except OSError:
+        return
+    dirs = sorted((d for d in dirs if os.path.isdir(d) and os.path.basename(d) != keep),
+                  key=os.path.getmtime, reverse=True)
+    for old in dirs[MAX_CACHED_VERSIONS - 1:]:
+        shutil.rmtree(old, ignore_errors=True)
+
+@profiled()
+def get_chart_files(stats, names=None):
+    """
+    차트 PNG 경로 목록 (이미 그린 버전이면 파일만 반환)
+    matplotlib가 없으면 [] (텍스트 요약만 사용)
+    """
+    names = list(names or CHARTS)
+    unknown = [name for name in names if name not in CHARTS]
+    if unknown:
+        raise ValueError(f'알 수 없는 차트: {", ".join(unknown)} (가능: {", ".join(CHARTS)})')
+    folder = os.path.join(CHARTS_DIR, stats['key'])
+    paths = [os.path.join(folder, f'{name}.png') for name in names]
+    missing = [(name, path) for name, path in zip(names, paths) if not os.path.exists(path)]
+    if not missing:
+        registry.inc('lotto_chart_cache_total', result='hit')
+        return paths
+    try:
+        import matplotlib
+    except ImportError:
+        return []
+    matplotlib.use('Agg')
+    registry.inc('lotto_chart_cache_total', result='miss')
+    os.makedirs(folder, exist_ok=True)
+    for name, path in missing:
+        _render_chart(stats, name, path)
+    _prune_chart_dirs(stats['key'])
+    return paths
+
+# =========================================================
+#  텍스트 요약
+# =========================================================
+
+def _pct(count, n):
+    return f"{count / n * 100:.1f}%" if n else '-'
+
+def render_stats_text(stats):
+    history, recommended = stats['history'], stats['recommended']
+    n, m = history['n'], recommended['n']
+    if not n:
+        return "당첨 이력이 없습니다."
+    first, last = stats['rounds']
+    lines = [f"📊 당첨 이력 분포 ({first}~{last}회, {n}회분)" +
+             (f" / 추천 기록 {m}줄" if m else ""),
+             f"합계: 평균 {history['sum_mean']:.1f}, 가운데 80% {history['sum_band'][0]}~{history['sum_band'][1]}" +
+             (f" (추천 평균 {recommended['sum_mean']:.1f}, "
+              f"{recommended['sum_band'][0]}~{recommended['sum_band'][1]})" if m else "")]
+    odd = ' / '.join(f"{k}개 {_pct(c, n)}" + (f"({_pct(recommended['odd'][k], m)})" if m else "")
+                     for k, c in enumerate(history['odd']))
+    lines.append(f"홀수 개수: {odd}")
+    top = sorted(history['zones'], key=history['zones'].get, reverse=True)[:5]
+    zones = ', '.join(f"{p} {_pct(history['zones'][p], n)}" +
+                      (f"({_pct(recommended['zones'].get(p, 0), m)})" if m else "") for p in top)
+    lines.append(f"구간 배치 상위 ({'/'.join(f'{s}~{e}' for s, e in stats['zones'])}): {zones}")
+    gaps = history['gap']
+    mean_gap = (gaps * np.arange(len(gaps))).sum() / gaps.sum() if gaps.sum() else 0
+    lines.append(f"인접 간격: 평균 {mean_gap:.1f}, 연속 번호(간격 1) {_pct(gaps[1], gaps.sum())}" +
+                 (f"({_pct(recommended['gap'][1], recommended['gap'].sum())})" if m else ""))
+    order = np.argsort(-history['frequency'], kind='stable')
+    lines.append("빈출: " + ' '.join(f"{i + 1}({history['frequency'][i]})" for i in order[:6]))
+    lines.append("저빈출: " + ' '.join(f"{i + 1}({history['frequency'][i]})" for i in order[::-1][:6]))
+    if m:
+        lines.append("(괄호 안은 추천 기록 비율)")
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='당첨 이력 분포 통계 / 차트')
+    parser.add_argument('charts', nargs='*', help=f'차트 이름 (기본: 전체, {", ".join(CHARTS)})')
+    parser.add_argument('--result-file', default=None, help='비교할 추천 기록 (기본: 공용 기록)')
+    args = parser.parse_args(argv)
+    stats = get_stats(result_file=args.result_file)
+    print(render_stats_text(stats))
+    try:
+        files = get_chart_files(stats, args.charts)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        return
+    if files:
+        print('\n'.join(files))
+    else:
+        print("[INFO] matplotlib가 없어 차트 이미지는 만들지 않았습니다 (pip install matplotlib).")
+
+if __name__ == '__main__':
+    main()
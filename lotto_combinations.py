@@ -0,0 +1,69 @@
+"""
+===============================================================================
+        전체 조합 공간 (로또6/45: 8,145,060개)
+===============================================================================
+1~45 중 6개(실행 중인 게임의 pool 중 pick개, lotto_game)를 고르는
+모든 조합을 numpy 배열로 한 번만 만들어 둡니다.
+- get_all_combinations(): (8145060, 6) 번호 배열 (사전식 순서, 1부터 시작)
+- get_combination_masks(): 조합별 비트마스크 (n번 -> 비트 n-1)
+정확한 확률 계산(전체 추첨 경우의 수 열거), 조건식 질의, 열거형 샘플러에서 공용으로 사용합니다.
+조합 수가 ENUMERATE_LIMIT를 넘는 게임에서는 ValueError (열거 대신 샘플링 사용)
+===============================================================================
+"""
+
+import numpy as np
+
+from lotto_game import GAME
+
+POOL = GAME.pool
+PICK = GAME.pick
+
+# 캐싱 (프로세스당 한 번 생성)
+_combinations_cache = None
+_masks_cache = None
+
+def build_combinations(n=POOL, k=PICK):
+    """n개 중 k개 조합 전체를 사전식 순서로 생성 (0부터 시작하는 번호)"""
+    res = np.arange(n, dtype=np.int8)[:, None]
+    for _ in range(1, k):
+        last = res[:, -1].astype(np.int64)
+        counts = n - 1 - last
+        rows = np.repeat(res, counts, axis=0)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        nxt = (np.repeat(last, counts) + 1 + offsets).astype(np.int8)
+        res = np.concatenate([rows, nxt[:, None]], axis=1)
+    return res
+
+def get_all_combinations():
+    """(8145060, 6) 번호 배열 (1~45)"""
+    global _combinations_cache
+    if not GAME.enumerable:
+        raise ValueError(f'{GAME.title}: 조합 수({GAME.space_size:,}개)가 너무 커서 전체를 열거할 수 없습니다.')
+    if _combinations_cache is None:
+        _combinations_cache = build_combinations() + 1
+    return _combinations_cache
+
+def get_combination_masks():
+    """조합별 비트마스크 (uint64)"""
+    global _masks_cache
+    if _masks_cache is None:
+        combos = get_all_combinations()
+        masks = np.zeros(len(combos), dtype=np.uint64)
+        for j in range(combos.shape[1]):
+            masks |= np.left_shift(np.uint64(1), (combos[:, j] - 1).astype(np.uint64))
+        _masks_cache = masks
+    return _masks_cache
+
+def install_combinations(combos, masks=None):
+    """이미 만든 배열(공유 메모리 등)을 이 프로세스의 전체 조합/비트마스크로 사용"""
+    global _combinations_cache, _masks_cache
+    _combinations_cache = combos
+    if masks is not None:
+        _masks_cache = masks
+
+def to_mask(nums):
+    """번호 목록 -> 비트마스크 (파이썬 정수)"""
+    mask = 0
+    for n in nums:
+        mask |= 1 << (n - 1)
+    return mask
@@ -0,0 +1,223 @@
+"""
+===============================================================================
+        동반 출현(쌍/삼중) 통계 엔진
+===============================================================================
+1. 쌍(pair) 통계: 45x45 행렬 (게임의 pool x pool, 대각선 = 번호별 단독 출현 횟수)
+2. 삼중(triple) 통계: 실제로 나온 조합만 담는 희소 테이블 {(a, b, c): 횟수}
+3. 전체 이력은 한 번의 벡터 연산으로 만들고,
+   회차가 추가되면 새 회차만 더해서 갱신합니다 (전체 재계산 X).
+   기존 회차 내용이 그대로인지는 행 전체의 digest로 확인 -> 중간 회차가
+   고쳐지면 전체를 다시 계산합니다.
+4. 조회 구간: 전체(window=None) 또는 최근 N회
+===============================================================================
+"""
+
+import hashlib
+import threading
+from itertools import combinations
+
+import numpy as np
+
+from lotto_game import GAME
+from lotto_history import TOTAL_CSV, load_history, to_onehot
+
+# 6개 번호 중 3개를 고르는 위치 조합 (20가지)
+_TRIPLE_POSITIONS = np.array(list(combinations(range(GAME.pick), 3)), dtype=np.intp)
+
+# 삼중 키 인코딩 진법 (번호 최댓값 + 1)
+_BASE = GAME.pool + 1
+
+# 생성기에서 사용하는 선택 규칙 기본값
+DEFAULT_COOCCURRENCE_RULE = {
+    'window': None,         # None = 전체 이력, N = 최근 N회
+    'hot_pair_top': 50,     # 상위 몇 개 쌍을 '빈출 쌍'으로 볼지
+    'min_hot_pairs': 1,     # 빈출 쌍 최소 포함 개수
+    'hot_triple_top': 100,  # 상위 몇 개 삼중을 '빈출 삼중'으로 볼지
+    'min_hot_triples': 0,   # 빈출 삼중 최소 포함 개수
+}
+
+# 캐싱 (전체 이력 통계는 증분 갱신, 구간 통계는 버전별 보관)
+# 요청과 미리 준비 스레드가 함께 쓰므로 갱신은 잠금 안에서 복사본에 하고 한 번에 교체
+_stats_cache = None
+_window_cache = {}
+_lock = threading.Lock()
+
+# =========================================================
+#  통계 계산
+# =========================================================
+
+def build_pair_matrix(numbers):
+    """(R, 6) 번호 배열 -> 45x45 동반 출현 행렬"""
+    onehot = to_onehot(numbers)
+    return onehot.T @ onehot
+
+def build_triple_table(numbers):
+    """(R, 6) 번호 배열 -> {(a, b, c): 횟수}"""
+    numbers = np.asarray(numbers, dtype=np.int32)
+    if len(numbers) == 0:
+        return {}
+    triples = numbers[:, _TRIPLE_POSITIONS].reshape(-1, 3)
+    keys = (triples[:, 0] * _BASE + triples[:, 1]) * _BASE + triples[:, 2]
+    uniq, counts = np.unique(keys, return_counts=True)
+    table = {}
+    for key, cnt in zip(uniq.tolist(), counts.tolist()):
+        table[(key // (_BASE * _BASE), (key // _BASE) % _BASE, key % _BASE)] = cnt
+    return table
+
+def build_cooccurrence(numbers, rounds=None):
+    """번호 배열 전체로 통계 생성"""
+    numbers = np.asarray(numbers)
+    return {
+        'n_draws': len(numbers),
+        'last_round': int(rounds[-1]) if rounds is not None and len(rounds) else None,
+        'pairs': build_pair_matrix(numbers),
+        'triples': build_triple_table(numbers),
+    }
+
+def update_cooccurrence(stats, draw, round_no=None):
+    """회차 1개를 기존 통계에 더함 (증분 갱신)"""
+    nums = sorted(int(n) for n in draw)
+    idx = np.array(nums, dtype=np.intp) - 1
+    stats['pairs'][np.ix_(idx, idx)] += 1
+    for triple in combinations(nums, 3):
+        stats['triples'][triple] = stats['triples'].get(triple, 0) + 1
+    stats['n_draws'] += 1
+    if round_no is not None:
+        stats['last_round'] = int(round_no)
+    return stats
+
+def _rows_digest(numbers, rounds):
+    """회차 번호 + 당첨번호 행 전체의 digest (앞부분이 그대로인지 확인용)"""
+    h = hashlib.sha1()
+    h.update(np.ascontiguousarray(rounds, dtype=np.int64).tobytes())
+    h.update(np.ascontiguousarray(numbers, dtype=np.int64).tobytes())
+    return h.hexdigest()
+
+def get_cooccurrence(filename=TOTAL_CSV, window=None):
+    """
+    동반 출현 통계 조회
+    - window=None: 전체 이력 (회차 추가 시 증분 갱신)
+    - window=N: 최근 N회 (이력 버전별 캐시)
+    """
+    global _stats_cache
+    history = load_history(filename)
+    numbers, rounds = history['numbers'], history['rounds']
+
+    if window is not None and window < len(numbers):
+        key = (filename, history['version'], window)
+        with _lock:
+            stats = _window_cache.get(key)
+            if stats is None:
+                stats = build_cooccurrence(numbers[-window:], rounds[-window:])
+                _window_cache.clear()
+                _window_cache[key] = stats
+        return stats
+
+    with _lock:
+        stats = _stats_cache
+        if stats is not None and stats['filename'] == filename:
+            if stats['version'] == history['version']:
+                return stats
+            n = stats['n_draws']
+            # 기존 회차 n개가 그대로이고 뒤에 회차만 추가된 경우 -> 복사본에 새 회차만 더함
+            # (이미 넘겨준 통계를 읽는 중인 요청이 있으므로 제자리에서 고치지 않음)
+            if (0 < n <= len(numbers) and
+                    stats['digest'] == _rows_digest(numbers[:n], rounds[:n])):
+                stats = dict(stats, pairs=stats['pairs'].copy(), triples=dict(stats['triples']))
+                for i in range(n, len(numbers)):
+                    update_cooccurrence(stats, numbers[i], rounds[i])
+                stats['version'] = history['version']
+                stats['digest'] = _rows_digest(numbers, rounds)
+                _stats_cache = stats
+                return stats
+
+        stats = build_cooccurrence(numbers, rounds)
+        stats['filename'] = filename
+        stats['version'] = history['version']
+        stats['digest'] = _rows_digest(numbers, rounds)
+        _stats_cache = stats
+        return stats
+
+# =========================================================
+#  조회 유틸리티
+# =========================================================
+
+def get_pair_count(stats, a, b):
+    return int(stats['pairs'][a - 1, b - 1])
+
+def get_triple_count(stats, a, b, c):
+    return stats['triples'].get(tuple(sorted((a, b, c))), 0)
+
+def top_pairs(stats, n=10):
+    """가장 많이 함께 나온 쌍 [((a, b), 횟수), ...]"""
+    upper = np.triu(stats['pairs'], k=1)
+    flat = upper.ravel()
+    n = min(n, int(np.count_nonzero(flat)))
+    if n <= 0:
+        return []
+    order = np.argsort(-flat, kind='stable')[:n]
+    return [((int(i // GAME.pool) + 1, int(i % GAME.pool) + 1), int(flat[i])) for i in order]
+
+def top_triples(stats, n=10):
+    """가장 많이 함께 나온 삼중 [((a, b, c), 횟수), ...]"""
+    items = sorted(stats['triples'].items(), key=lambda kv: (-kv[1], kv[0]))
+    return items[:n]
+
+def partner_numbers(stats, number, n=5):
+    """특정 번호와 가장 자주 함께 나온 번호들"""
+    row = stats['pairs'][number - 1].copy()
+    row[number - 1] = -1
+    order = np.argsort(-row, kind='stable')[:n]
+    return [(int(i) + 1, int(row[i])) for i in order]
+
+# =========================================================
+#  생성기용 선택 규칙
+# =========================================================
+
+def build_rule_tables(rule=None, filename=TOTAL_CSV):
+    """규칙 dict -> 빠른 검사를 위한 빈출 쌍/삼중 집합"""
+    merged = dict(DEFAULT_COOCCURRENCE_RULE)
+    merged.update(rule or {})
+    stats = get_cooccurrence(filename, window=merged['window'])
+    return {
+        'rule': merged,
+        'hot_pairs': {p for p, _ in top_pairs(stats, merged['hot_pair_top'])},
+        'hot_triples': {t for t, _ in top_triples(stats, merged['hot_triple_top'])},
+    }
+
+def check_cooccurrence_rule(numbers, tables):
+    """빈출 쌍/삼중 최소 포함 개수 확인"""
+    nums = sorted(numbers)
+    rule = tables['rule']
+    if rule['min_hot_pairs'] > 0:
+        hits = sum(1 for p in combinations(nums, 2) if p in tables['hot_pairs'])
+        if hits < rule['min_hot_pairs']: return False
+    if rule['min_hot_triples'] > 0:
+        hits = sum(1 for t in combinations(nums, 3) if t in tables['hot_triples'])
+        if hits < rule['min_hot_triples']: return False
+    return True
+
+# =========================================================
+#  리포트 (디스코드 !pair 명령용)
+# =========================================================
+
+def generate_cooccurrence_report(window=None, n_pairs=10, n_triples=5, filename=TOTAL_CSV):
+    stats = get_cooccurrence(filename, window=window)
+    if stats['n_draws'] == 0:
+        return "분석할 당첨번호 데이터가 없습니다."
+
+    scope = f"최근 {window}회" if window else "전체"
+    report = []
+    report.append(f"🤝 동반 출현 분석 ({scope}, {stats['n_draws']}회차 기준)")
+    report.append("=" * 30)
+    report.append(f"📊 함께 많이 나온 번호 쌍 Top {n_pairs}:")
+    for (a, b), cnt in top_pairs(stats, n_pairs):
+        report.append(f"  {a:2d} - {b:2d}: {cnt}회")
+    report.append("")
+    report.append(f"📊 함께 많이 나온 번호 3개 Top {n_triples}:")
+    for (a, b, c), cnt in top_triples(stats, n_triples):
+        report.append(f"  {a:2d} - {b:2d} - {c:2d}: {cnt}회")
+    return "\n".join(report)
+
+if __name__ == "__main__":
+    print(generate_cooccurrence_report())
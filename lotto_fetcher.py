@@ -0,0 +1,343 @@
+"""
+===============================================================================
+        당첨번호 직접 가져오기 (asyncio HTTP, 조건부 요청 + 재시도) + 로컬 대역 서버
+===============================================================================
+1. 지금까지는 n8n 워크플로가 네이버 검색 결과를 긁어 lotto_latest.json을 쓰고
+   봇이 그 파일을 감시했습니다. (토요일 22:00 한 번 -> 추첨 후 1시간 넘게 대기)
+   DrawFetcher는 봇 안에서 동행복권 JSON API를 직접 조회합니다.
+   - 기본 주소: https://www.dhlottery.co.kr/common.do?method=getLottoNumber&drwNo={round}
+   - 다음 회차 = CSV 마지막 회차 + 1, 아직 추첨 전이면 {"returnValue": "fail"}
+2. 연결 재사용: aiohttp 세션 1개(연결 풀 + DNS 캐시)를 봇이 끝날 때까지 사용
+3. 조건부 요청: 주소별로 ETag / Last-Modified를 기억해 If-None-Match /
+   If-Modified-Since로 보냄 -> 304면 본문 없이 이전 결과 재사용
+4. 재시도: 연결 오류/시간 초과/429/5xx는 지수 백오프 + 무작위 지연(full jitter)
+   - Retry-After가 있으면 그 시간만큼 기다림
+5. 응답은 update_lotto.parse_lotto_json으로 해석 -> update_csv가 읽는 것과 같은 구조
+   write_latest()는 n8n과 같은 형식의 JSON을 감시 위치에 한 번에 씀 (임시 파일 + 교체)
+6. 로컬 테스트용 명령
+   - python lotto_fetcher.py serve [--port 8765] [--fail 2]
+       [--publish-after 10 --round 1207 --date 2026.01.17 --numbers 1 2 3 4 5 6 --bonus 7]
+     -> CSV 이력을 동행복권 API 형식으로 내주는 대역 서버 (ETag/304, 일부러 503 응답)
+   - python lotto_fetcher.py fetch --url 'http://127.0.0.1:8765/common.do?method=getLottoNumber&drwNo={round}'
+       [--round 1207] [--write] [--poll 5]
+===============================================================================
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from email.utils import formatdate, parsedate_to_datetime
+
+from lotto_metrics import registry
+from update_lotto import parse_lotto_json
+
+DEFAULT_URL = 'https://www.dhlottery.co.kr/common.do?method=getLottoNumber&drwNo={round}'
+# 재시도할 HTTP 상태 (그 외 4xx는 바로 실패)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+class FetchError(Exception):
+    """재시도를 다 써도 받지 못했거나 응답을 해석할 수 없음"""
+
+def _retry_delay(attempt, retry_after=None, base=1.0, cap=30.0):
+    """Retry-After가 있으면 그 값, 없으면 0 ~ min(cap, base * 2^attempt) 사이 무작위"""
+    if retry_after is not None:
+        try:
+            return min(cap, max(0.0, float(retry_after)))
+        except ValueError:
+            try:
+                return min(cap, max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()))
+            except (TypeError, ValueError):
+                pass
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def parse_draw_response(data):
+    """API 응답 JSON -> 회차 정보 dict (아직 추첨 전이면 None)"""
+    if isinstance(data, dict) and data.get('returnValue') == 'fail':
+        return None
+    return parse_lotto_json(data)
+
+class DrawFetcher:
+    """회차별 당첨번호 조회 (세션 1개 재사용, 주소별 조건부 요청)"""
+
+    def __init__(self, url=DEFAULT_URL, timeout=10.0, retries=3, backoff=1.0, pool_size=4):
+        self.url = url
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self._session = None
+        # 주소 -> (ETag, Last-Modified, 해석 결과)
+        self._validators = {}
+
+    def _get_session(self):
+        import aiohttp
+
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300,
+                                             keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'Accept': 'application/json'})
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def round_url(self, round_no):
+        return self.url.format(round=round_no)
+
+    async def _request(self, url):
+        """GET 1번 (기억해 둔 ETag/Last-Modified로 조건부) -> (상태 코드, 응답 헤더, 본문 bytes)"""
+        headers = {}
+        etag, last_modified, _ = self._validators.get(url, (None, None, None))
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        async with self._get_session().get(url, headers=headers) as response:
+            return response.status, response.headers, await response.read()
+
+    async def fetch(self, round_no):
+        """
+        회차 당첨번호 -> update_lotto.parse_lotto_json과 같은 dict (아직 추첨 전이면 None)
+        재시도를 다 써도 실패하면 FetchError
+        """
+        import aiohttp
+
+        url = self.round_url(round_no)
+        last_error = None
+        retry_after = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                delay = _retry_delay(attempt - 1, retry_after, base=self.backoff)
+                registry.inc('lotto_fetch_retries_total')
+                await asyncio.sleep(delay)
+                retry_after = None
+            started = time.perf_counter()
+            try:
+                status, headers, body = await self._request(url)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = f'{type(e).__name__}: {e}'
+                continue
+            finally:
+                registry.observe('lotto_fetch_seconds', time.perf_counter() - started)
+            if status == 304 and url in self._validators:
+                registry.inc('lotto_fetch_requests_total', result='not_modified')
+                return self._validators[url][2]
+            if status in RETRY_STATUS:
+                retry_after = headers.get('Retry-After')
+                last_error = f'HTTP {status}'
+                continue
+            if status != 200:
+                registry.inc('lotto_fetch_requests_total', result='error')
+                raise FetchError(f'HTTP {status}: {url}')
+            try:
+                draw = parse_draw_response(json.loads(body.decode('utf-8')))
+            except (UnicodeDecodeError, ValueError, TypeError) as e:
+                registry.inc('lotto_fetch_requests_total', result='error')
+                raise FetchError(f'응답 해석 실패 ({url}): {e}') from e
+            if draw is not None and draw['round'] != round_no:
+                registry.inc('lotto_fetch_requests_total', result='error')
+                raise FetchError(f"요청한 회차({round_no})와 응답 회차({draw['round']})가 다름")
+            self._validators[url] = (headers.get('ETag'), headers.get('Last-Modified'), draw)
+            registry.inc('lotto_fetch_requests_total', result='ok' if draw else 'pending')
+            return draw
+        registry.inc('lotto_fetch_requests_total', result='error')
+        raise FetchError(f'{self.retries + 1}번 시도 실패 ({url}): {last_error}')
+
+    async def poll(self, round_no, interval=30.0, deadline=None):
+        """회차가 나올 때까지 interval초마다 조회 (deadline(time.time() 기준)을 넘기면 None)"""
+        while True:
+            try:
+                draw = await self.fetch(round_no)
+                if draw is not None:
+                    return draw
+            except FetchError as e:
+                logging.warning(f'당첨번호 조회 실패: {e}')
+            if deadline is not None and time.time() + interval > deadline:
+                return None
+            await asyncio.sleep(interval)
+
+def _display_date(date):
+    """'2026년 01월 17일 추첨' / '2026.01.17' / '2026-01-17' -> '2026.01.17' (n8n 형식)"""
+    parts = re.findall(r'\d+', str(date))
+    if len(parts) >= 3:
+        return f'{parts[0]}.{int(parts[1]):02d}.{int(parts[2]):02d}'
+    return str(date)
+
+def write_latest(path, draw):
+    """n8n 'Write Files To Disk'와 같은 형식으로 기록 (임시 파일 + 교체)"""
+    from lotto_watcher import drop_draw
+    drop_draw(path, draw['round'], _display_date(draw['date']), draw['numbers'], draw['bonus'])
+
+def next_round(csv_file=None):
+    """CSV 마지막 회차 + 1 (이력이 없으면 1)"""
+    from lotto_history import TOTAL_CSV, load_history
+    rounds = load_history(csv_file or TOTAL_CSV)['rounds']
+    return int(rounds.max()) + 1 if len(rounds) else 1
+
+# =========================================================
+#  로컬 대역 서버 (동행복권 API 형식)
+# =========================================================
+
+def _api_body(draw):
+    date = _display_date(draw['date']).replace('.', '-')
+    body = {'returnValue': 'success', 'drwNo': draw['round'], 'drwNoDate': date,
+            'bnusNo': draw['bonus']}
+    body.update({f'drwtNo{i}': n for i, n in enumerate(draw['numbers'], 1)})
+    return body
+
+class StubDrawServer:
+    """
+    CSV 이력 + publish()한 회차를 동행복권 API처럼 응답
+    - ETag(본문 해시) / Last-Modified(발표 시각) -> 조건부 요청이면 304
+    - fail=N: 처음 N번은 503 (Retry-After: retry_after) -> 재시도 확인용
+    """
+
+    def __init__(self, csv_file=None, fail=0, retry_after=None):
+        self.draws = {}
+        self.published = {}
+        self.fail = fail
+        self.retry_after = retry_after
+        self.requests = []
+        self._started = time.time()
+        self._runner = None
+        if csv_file:
+            from lotto_history import load_history
+            history = load_history(csv_file)
+            for i, round_no in enumerate(history['rounds']):
+                self.publish({'round': int(round_no), 'date': history['dates'][i],
+                              'numbers': [int(n) for n in history['numbers'][i]],
+                              'bonus': int(history['bonus'][i])}, at=self._started)
+
+    def publish(self, draw, at=None):
+        self.draws[draw['round']] = draw
+        self.published[draw['round']] = at or time.time()
+
+    def _response(self, round_no):
+        draw = self.draws.get(round_no)
+        if draw is None:
+            return {'returnValue': 'fail'}, self._started
+        return _api_body(draw), self.published[round_no]
+
+    async def handle(self, request):
+        from aiohttp import web
+
+        self.requests.append((request.query.get('drwNo'), request.headers.get('If-None-Match')))
+        if self.fail > 0:
+            self.fail -= 1
+            headers = {'Retry-After': str(self.retry_after)} if self.retry_after is not None else {}
+            return web.Response(status=503, headers=headers)
+        try:
+            round_no = int(request.query.get('drwNo', ''))
+        except ValueError:
+            return web.json_response({'returnValue': 'fail'})
+        body, modified = self._response(round_no)
+        text = json.dumps(body, ensure_ascii=False)
+        etag = '"' + hashlib.sha1(text.encode('utf-8')).hexdigest()[:16] + '"'
+        headers = {'ETag': etag, 'Last-Modified': formatdate(modified, usegmt=True)}
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers=headers)
+        since = request.headers.get('If-Modified-Since')
+        if since and 'If-None-Match' not in request.headers:
+            try:
+                if int(modified) <= parsedate_to_datetime(since).timestamp():
+                    return web.Response(status=304, headers=headers)
+            except (TypeError, ValueError):
+                pass
+        return web.Response(text=text, content_type='application/json', headers=headers)
+
+    async def start(self, port=8765, host='127.0.0.1'):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get('/common.do', self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        return f'http://{host}:{port}/common.do?method=getLottoNumber&drwNo={{round}}'
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+# =========================================================
+#  명령줄
+# =========================================================
+
+def parse_args(argv=None):
+    import update_lotto
+    from lotto_game import GAME
+
+    parser = argparse.ArgumentParser(description='당첨번호 가져오기 / 로컬 대역 서버')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve = sub.add_parser('serve', help='CSV 이력을 API 형식으로 내주는 대역 서버')
+    serve.add_argument('--csv', default=update_lotto.CSV_FILE)
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--fail', type=int, default=0, help='처음 N번 요청은 503')
+    serve.add_argument('--retry-after', type=float, default=None)
+    serve.add_argument('--publish-after', type=float, default=None,
+                       help='N초 뒤 --round 회차 발표 (추첨 직후 상황 재현)')
+    serve.add_argument('--round', type=int)
+    serve.add_argument('--date')
+    serve.add_argument('--numbers', type=int, nargs=GAME.pick)
+    serve.add_argument('--bonus', type=int)
+
+    fetch = sub.add_parser('fetch', help='회차 조회 (기본: CSV 다음 회차)')
+    fetch.add_argument('--url', default=DEFAULT_URL)
+    fetch.add_argument('--round', type=int, default=None)
+    fetch.add_argument('--poll', type=float, default=None, help='나올 때까지 N초마다 조회')
+    fetch.add_argument('--write', action='store_true', help='lotto_latest.json에 기록')
+    fetch.add_argument('--file', default=update_lotto.JSON_FILE)
+    return parser.parse_args(argv)
+
+async def _serve_forever(args):
+    server = StubDrawServer(args.csv, fail=args.fail, retry_after=args.retry_after)
+    url = await server.start(args.port)
+    print(f"[INFO] 대역 서버 시작: {url} (이력 {len(server.draws)}회)")
+    if args.publish_after is not None:
+        if None in (args.round, args.date, args.numbers, args.bonus):
+            raise SystemExit('--publish-after에는 --round/--date/--numbers/--bonus가 필요합니다')
+        await asyncio.sleep(args.publish_after)
+        server.publish({'round': args.round, 'date': args.date,
+                        'numbers': args.numbers, 'bonus': args.bonus})
+        print(f"[INFO] {args.round}회 발표")
+    await asyncio.Event().wait()
+
+async def _fetch_once(args):
+    fetcher = DrawFetcher(args.url)
+    round_no = args.round or next_round()
+    try:
+        if args.poll:
+            draw = await fetcher.poll(round_no, args.poll)
+        else:
+            draw = await fetcher.fetch(round_no)
+    finally:
+        await fetcher.close()
+    if draw is None:
+        print(f"[INFO] {round_no}회는 아직 발표 전입니다.")
+        return
+    print(f"[INFO] {draw['round']}회 {draw['date']} {draw['numbers']} + {draw['bonus']}")
+    if args.write:
+        write_latest(args.file, draw)
+        print(f"[INFO] 기록 완료: {args.file}")
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        asyncio.run(_serve_forever(args) if args.command == 'serve' else _fetch_once(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
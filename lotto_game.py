@@ -0,0 +1,124 @@
+"""
+===============================================================================
+        추첨 게임 정의 (k-of-n + 보너스 볼, 기본: 로또6/45)
+===============================================================================
+1. 게임 = 번호 범위(pool), 고르는 개수(pick), 보너스 볼, 구간(zone) 배치
+   - lotto645 : 1~45 중 6개 (보너스는 같은 번호에서 추첨, 2등 판정용)
+   - powerball: 1~69 중 5개 + 따로 1~26 중 1개 (보너스 볼도 직접 고름)
+   - lotto735 : 1~35 중 7개
+2. 실행할 게임은 환경변수 LOTTO_GAME으로 선택 (기본 lotto645)
+   - 이력/추천 기록/규칙/최신 회차 파일은 게임별로 따로 (lotto645는 기존 파일명 그대로)
+   - 생성/필터/분석/저장 모듈은 GAME 값을 읽어 동작하므로 함수 인터페이스는 그대로
+3. 생성 방식 자동 선택 (strategy)
+   - 조합 수가 AUTO_ENUMERATE_LIMIT 이하: 'enumerate'
+     (전체 조합을 한 번 만들어 규칙을 만족하는 조합 중에서 균등 추출)
+   - 그보다 크면: 'sample' (무작위 생성 후 필터, 기존 방식)
+   - 전체 조합을 만드는 기능(조건식 질의, --sampler enumerate)은
+     ENUMERATE_LIMIT 이하에서만 사용
+4. 등수/당첨금 기준(lotto_probability)은 lotto645에만 있으므로
+   다른 게임의 성과 분석은 적중 개수 기준으로만 표시합니다.
+===============================================================================
+"""
+
+import math
+import os
+import random
+
+DEFAULT_GAME = 'lotto645'
+
+# 전체 조합을 numpy 배열로 만들 수 있는 최대 크기 (로또6/45 8,145,060개 포함)
+ENUMERATE_LIMIT = 10_000_000
+# 생성 방식 자동 선택 기준 (이 이하면 전체 조합에서 추출하는 편이 빠름)
+AUTO_ENUMERATE_LIMIT = 1_000_000
+
+def split_zones(pool, n_zones=3):
+    """1~pool을 거의 같은 크기의 구간 n_zones개로 나눔 (45 -> 1~15, 16~30, 31~45)"""
+    bounds = [round(pool * i / n_zones) for i in range(n_zones + 1)]
+    return [(bounds[i] + 1, bounds[i + 1]) for i in range(n_zones)]
+
+class Game:
+    """추첨 게임 1종의 정의 (읽기 전용으로 공유)"""
+
+    def __init__(self, name, title, pool, pick, bonus_pool=0, zones=None, tiers=False,
+                 data_file=None, result_file=None, rules_file=None, latest_file=None):
+        self.name = name
+        self.title = title
+        self.pool = pool
+        self.pick = pick
+        # 티켓에서 따로 고르는 보너스 볼 범위 (0 = 없음, 보너스는 같은 번호에서 추첨)
+        self.bonus_pool = bonus_pool
+        self.zones = [tuple(z) for z in zones] if zones else split_zones(pool)
+        # lotto_probability의 등수/당첨금 기준을 쓰는 게임
+        self.tiers = tiers
+        self.data_file = data_file or f'{name}_total.csv'
+        self.result_file = result_file or f'{name}_result.txt'
+        self.rules_file = rules_file or f'{name}_rules.json'
+        self.latest_file = latest_file or f'{name}_latest.json'
+
+        self.number_columns = [str(i) for i in range(1, pick + 1)]
+        self.space_size = math.comb(pool, pick)
+        self.total_space = self.space_size * (bonus_pool or 1)
+        # 비트마스크(uint64)로 표현 가능한 번호 범위까지만 전체 조합 사용
+        self.enumerable = self.space_size <= ENUMERATE_LIMIT and pool <= 64
+        self.strategy = 'enumerate' if self.space_size <= AUTO_ENUMERATE_LIMIT else 'sample'
+
+    def __repr__(self):
+        return f'Game({self.name!r}, {self.pick} of {self.pool}' + \
+               (f' + 1 of {self.bonus_pool})' if self.bonus_pool else ')')
+
+    @property
+    def numbers(self):
+        return range(1, self.pool + 1)
+
+    def sample(self, rng=random):
+        """무작위 번호 pick개 (정렬 안 됨)"""
+        return rng.sample(range(1, self.pool + 1), self.pick)
+
+    def sample_bonus(self, rng=random):
+        """티켓의 보너스 볼 (따로 고르지 않는 게임이면 None)"""
+        return rng.randint(1, self.bonus_pool) if self.bonus_pool else None
+
+    def format_line(self, nums, bonus=None):
+        """번호 -> 추천 기록 한 줄 ('1 2 3 4 5 + 7')"""
+        text = ' '.join(str(n) for n in nums)
+        return f'{text} + {bonus}' if bonus is not None else text
+
+    def parse_line(self, text):
+        """추천 기록 한 줄 -> (번호 목록, 보너스 볼 또는 None), 형식이 다르면 None"""
+        main, _, bonus = text.partition('+')
+        try:
+            nums = [int(x) for x in main.split()]
+            bonus = int(bonus) if bonus.strip() else None
+        except ValueError:
+            return None
+        if len(nums) != self.pick:
+            return None
+        return nums, bonus
+
+    def validate_draw(self, numbers, bonus=None):
+        """당첨번호 확인 (개수/범위/중복), 잘못되면 ValueError"""
+        if len(numbers) != self.pick:
+            raise ValueError(f"Expected {self.pick} numbers, got {len(numbers)}.")
+        if len(set(numbers)) != self.pick or not all(1 <= n <= self.pool for n in numbers):
+            raise ValueError(f"Numbers must be {self.pick} distinct values in 1~{self.pool}.")
+        bonus_max = self.bonus_pool or self.pool
+        if bonus is not None and not 1 <= bonus <= bonus_max:
+            raise ValueError(f"Bonus must be in 1~{bonus_max}.")
+
+GAMES = {
+    'lotto645': Game('lotto645', '로또6/45', 45, 6, tiers=True,
+                     data_file='lotto_total.csv', result_file='lotto_result.txt',
+                     rules_file='lotto_rules.json', latest_file='lotto_latest.json'),
+    'powerball': Game('powerball', 'Powerball 5/69 + 1/26', 69, 5, bonus_pool=26),
+    'lotto735': Game('lotto735', '로또 7/35', 35, 7),
+}
+
+def get_game(name=None):
+    """이름(기본: 환경변수 LOTTO_GAME) -> 게임 정의"""
+    name = (name or os.environ.get('LOTTO_GAME') or DEFAULT_GAME).strip().lower()
+    if name not in GAMES:
+        raise ValueError(f'알 수 없는 게임: {name} (가능: {", ".join(GAMES)})')
+    return GAMES[name]
+
+# 이 프로세스에서 실행 중인 게임
+GAME = get_game()
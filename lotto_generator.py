@@ -13,19 +13,117 @@
 ===============================================================================
 """
 
+import argparse
 import csv
+import json
 import random
 from collections import Counter
 import os
 import re
-import statistics
+import signal
+import sys
+import threading
+import time
+
+from lotto_game import GAME
+from lotto_profiler import profiled
+from lotto_rules import DEFAULT_RULES, get_rules, to_mask
+from lotto_similarity import get_similarity_index, is_similar
+from lotto_store import append_block
+
+# 아래 기준값들은 기본값입니다. 실제 적용 값은 lotto_rules.json (get_rules())
 
 # 고정 Top5 번호 (사용자 선호)
-TOP5 = [1, 3, 7, 12, 13]
+TOP5 = list(DEFAULT_RULES['top5'])
 
 # 구간 정의
-RANGES = [(1, 15), (16, 30), (31, 45)]
+RANGES = [tuple(r) for r in DEFAULT_RULES['ranges']]
+
+# 유사성 검사 구간 (최근 N회, None = 전체 이력)
+SIMILARITY_WINDOW = 30
+
+# 추천 기록 파일 (기본 테넌트, 테넌트별 경로는 lotto_tenants, 게임별 파일명은 lotto_game)
+RESULT_FILE = GAME.result_file
+
+# 생성 방식 (auto: 게임의 조합 수에 따라 enumerate / random)
+SAMPLERS = ['auto', 'random', 'constructive', 'enumerate']
+
+# 수학적 패턴 번호 (품질 필터/구성형 샘플러 공용)
+PRIMES = DEFAULT_RULES['classes']['prime']['numbers']
+FIBONACCI = DEFAULT_RULES['classes']['fibonacci']['numbers']
+TRIANGULAR = DEFAULT_RULES['classes']['triangular']['numbers']
+PRONIC = DEFAULT_RULES['classes']['pronic']['numbers']
+
+# 진행 상황 보고 간격 (초)
+PROGRESS_INTERVAL = 0.5
+
+# 생성 종료 사유
+STOP_REASONS = {
+    'complete': '생성 완료',
+    'deadline': '시간 제한으로 중단',
+    'cancelled': '요청으로 중단',
+    'exhausted': '시도 제한 도달',
+    'infeasible': '조건을 만족하는 조합 없음',
+}
+
+
+# =========================================================
+#  마감 시간 / 중단 / 진행 상황
+# =========================================================
+
+class CancelToken:
+    """생성 중단 요청 (봇의 !cancel, 시그널 처리기 등 다른 스레드에서 cancel())"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+class GenerationResult(list):
+    """
+    생성된 조합 목록 (기존처럼 list로 사용) + 종료 정보
+    - reason: STOP_REASONS의 키
+    - partial: 목표 세트 수를 못 채웠거나 마감/중단으로 일찍 멈춘 결과
+    - sequence: 추천 기록에 저장한 추천 번호(NN번째), 저장 전에는 None
+    - sequences: 전략 비교 실행(--strategies)에서 저장한 추천 번호 전체
+    """
+
+    def __init__(self, combs=(), target=0, reason='complete', tries=0, elapsed=0.0):
+        super().__init__(combs)
+        self.target = target
+        self.reason = reason
+        self.tries = tries
+        self.elapsed = elapsed
+        self.sequence = None
+        self.sequences = []
+
+    @property
+    def partial(self):
+        return self.reason != 'complete' or len(self) < self.target
+
+    def describe(self):
+        return (f"{STOP_REASONS[self.reason]}: {len(self)}/{self.target}세트 "
+                f"({self.elapsed:.1f}초, 시도 {self.tries:,}회)")
 
+def _progress_info(found, target, tries, started, reason=None):
+    """progress 콜백에 넘기는 값 (reason은 마지막 보고에만)"""
+    elapsed = time.monotonic() - started
+    info = {'found': found, 'target': target, 'tries': tries, 'elapsed': round(elapsed, 2),
+            'rate': round(tries / elapsed) if elapsed > 0 else 0}
+    if reason is not None:
+        info['reason'] = reason
+    return info
+
+def print_progress(info):
+    """CLI --progress: 한 줄 JSON으로 출력 (봇이 읽어서 진행 메시지 갱신)"""
+    print('[PROGRESS] ' + json.dumps(info), flush=True)
+
+@profiled()
 def load_past_combinations(filename):
     """과거 모든 당첨 번호 로드 (중복 방지용)"""
     past = set()
@@ -34,7 +132,7 @@ def load_past_combinations(filename):
             reader = csv.reader(f)
             next(reader)
             for row in reader:
-                nums = row[3:9]
+                nums = row[3:3 + GAME.pick]
                 if all(n.isdigit() for n in nums):
                     comb = tuple(sorted(int(n) for n in nums))
                     past.add(comb)
@@ -42,6 +140,7 @@ def load_past_combinations(filename):
         pass
     return past
 
+@profiled()
 def get_last_draw_numbers(filename):
     """직전 회차 당첨번호"""
     try:
@@ -49,8 +148,8 @@ def get_last_draw_numbers(filename):
             lines = f.readlines()
             for line in reversed(lines):
                 row = line.strip().split(',')
-                if len(row) < 9: continue
-                nums = row[3:9]
+                if len(row) < 3 + GAME.pick: continue
+                nums = row[3:3 + GAME.pick]
                 if all(n.isdigit() for n in nums):
                     return [int(n) for n in nums]
     except:
@@ -70,7 +169,7 @@ def get_number_pools():
 def check_even_odd(numbers):
     """홀짝 비율: 6:0, 0:6 제외"""
     odds = sum(1 for n in numbers if n % 2)
-    return odds not in [0, 6]
+    return odds not in [0, GAME.pick]
 
 def check_ranges(numbers):
     """구간별 분포: 특정 구간 전멸 방지 (최소 1개 이상)"""
@@ -99,27 +198,39 @@ def apply_top5_rule(draw, top5_in_last, line_idx):
             draw[0] = top5_in_last[0]
     return draw
 
-def check_pattern_quality(numbers, csv_filename):
+def get_top5_forced(top5_in_last, line_idx):
+    """apply_top5_rule이 해당 줄에 강제로 넣는 번호 목록 (구성형 샘플러용)"""
+    if len(top5_in_last) >= 2:
+        if line_idx == 0: return top5_in_last[:2]
+        if line_idx == 1: return top5_in_last[:1]
+        if line_idx == 2: return top5_in_last[1:2]
+    elif len(top5_in_last) == 1 and line_idx == 0:
+        return top5_in_last[:1]
+    return []
+
+@profiled()
+def check_pattern_quality(numbers, csv_filename, rules=None):
     """
     [핵심 필터링] 
     RB님의 엄격한 기준을 유지하되, 통계적 평균을 벗어난 
     비현실적인 제약 조건을 완화하여 15개 생성을 보장함.
+    기준값은 lotto_rules.json (rules 미지정 시 get_rules()), 괄호 안은 기본값
+    번호 분류는 컴파일된 비트마스크로 개수를 셉니다.
     """
+    rules = rules or get_rules()
     nums = sorted(numbers)
+    mask = to_mask(nums)
     
-    # 1. 구간별 개수 (1~4개 허용으로 완화)
-    # 기존: 1~3개 -> 변경: 1~4개 (가끔 4개가 한 구간에 몰릴 수도 있음)
-    ranges = [(1, 15), (16, 30), (31, 45)]
-    for start, end in ranges:
-        count = sum(1 for n in nums if start <= n <= end)
-        if count < 1 or count > 4: return False
+    # 1. 구간별 개수 (1~4개, 가끔 4개가 한 구간에 몰릴 수도 있음)
+    for range_mask in rules.range_masks:
+        count = (mask & range_mask).bit_count()
+        if count < rules.range_min or count > rules.range_max: return False
         
-    # 2. 홀짝 (6:0, 0:6 제외) - 동일
-    odds = sum(1 for n in nums if n % 2)
-    if odds == 0 or odds == 6: return False
+    # 2. 홀짝 (6:0, 0:6 제외)
+    odds = (mask & rules.odd_mask).bit_count()
+    if odds < rules.odd_min or odds > rules.odd_max: return False
     
-    # 3. 연속 번호 (4연속 이상 제외) - 동일
-    # 3연속(1,2,3)까지는 허용
+    # 3. 연속 번호 (4연속 이상 제외, 3연속(1,2,3)까지는 허용)
     consecutive = 1
     max_consecutive = 1
     for i in range(1, len(nums)):
@@ -128,47 +239,30 @@ def check_pattern_quality(numbers, csv_filename):
             max_consecutive = max(max_consecutive, consecutive)
         else:
             consecutive = 1
-    if max_consecutive >= 4: return False
+    if max_consecutive > rules.max_run: return False
     
-    # 4. [중요 수정] 합계 구간 (120 ~ 180)
-    # 기존 145~165는 평균(138)을 벗어남. 당첨 확률이 높은 구간으로 확장.
+    # 4. 합계 구간 (120 ~ 180, 당첨 확률이 높은 구간)
     total_sum = sum(nums)
-    if not (120 <= total_sum <= 180): return False
+    if not (rules.sum_min <= total_sum <= rules.sum_max): return False
     
-    # 5. 분산 (80 ~ 250) - 동일
-    try:
-        variance = statistics.variance(nums)
-        if not (80 <= variance <= 250): return False
-    except: pass # 계산 불가 시 패스
+    # 5. 분산 (80 ~ 250) - 표본 분산 = (n*제곱합 - 합^2) / (n*(n-1))
+    n = len(nums)
+    if n > 1:
+        variance = (n * sum(x * x for x in nums) - total_sum * total_sum) / (n * (n - 1))
+        if not (rules.var_min <= variance <= rules.var_max): return False
     
-    # 6. [중요 수정] 빈출 번호 (Top 15 중 2개)
-    # Top 12는 너무 좁음 -> Top 15로 확장하여 숨통 틔움
-    frequent_top15 = get_frequent_numbers_all_time(csv_filename, top_n=15)
-    if sum(1 for n in nums if n in frequent_top15) < 2: return False
+    # 6. 빈출 번호 (Top 15 중 2개 이상) / 7. 저빈출(Cold) 번호 제외 (Bottom 5)
+    frequency = rules.frequency(csv_filename)
+    if (mask & frequency['top_mask']).bit_count() < rules.frequent_min: return False
+    if mask & frequency['cold_mask']: return False
     
-    # 7. 저빈출(Cold) 번호 제외 (Bottom 5) - 동일
-    all_frequent = get_frequent_numbers_all_time(csv_filename, top_n=45)
-    low_frequent = all_frequent[-5:]
-    if any(n in low_frequent for n in nums): return False
-    
-    # 8. 소수 (Prime) 개수 (1~4개) - 동일
-    primes = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43]
-    prime_count = sum(1 for n in nums if n in primes)
-    if not (1 <= prime_count <= 4): return False
-    
-    # 9. 고급 수학적 제약 (유지)
-    # 피보나치, 삼각수 등이 너무 많이 포함되면 제외
-    fibonacci = [1, 2, 3, 5, 8, 13, 21, 34]
-    if sum(1 for n in nums if n in fibonacci) > 2: return False
-    
-    triangular = [1, 3, 6, 10, 15, 21, 28, 36, 45]
-    if sum(1 for n in nums if n in triangular) > 2: return False
-    
-    products = [i*(i+1) for i in range(1, 7) if i*(i+1) <= 45]
-    if sum(1 for n in nums if n in products) > 2: return False  # 1개->2개로 미세 완화
+    # 8~9. 소수 (1~4개), 피보나치/삼각수/프로닉 (각 2개 이하)
+    for class_mask, low, high in rules.class_checks:
+        count = (mask & class_mask).bit_count()
+        if count < low or count > high: return False
     
     # 10. 최근 패턴 유사성 체크 (유지)
-    if not check_similarity_with_recent_patterns(nums, csv_filename): return False
+    if not check_similarity_with_recent_patterns(nums, csv_filename, SIMILARITY_WINDOW): return False
     
     return True
 
@@ -176,21 +270,20 @@ def check_pattern_quality(numbers, csv_filename):
 #  데이터 조회 및 유틸리티
 # =========================================================
 
-# 캐싱을 통해 속도 향상
-_frequent_cache = []
-_cache_filename = ""
-_cache_timestamp = 0
+# 캐싱을 통해 속도 향상 ((파일명, 수정시각, 전체 순위)를 한 번에 교체)
+_frequent_entry = None
 
 def get_frequent_numbers_all_time(filename, top_n=25):
-    global _frequent_cache, _cache_filename, _cache_timestamp
+    global _frequent_entry
     try:
         current_timestamp = os.path.getmtime(filename)
     except:
         current_timestamp = 0
         
-    if (_frequent_cache and _cache_filename == filename and 
-        _cache_timestamp == current_timestamp and len(_frequent_cache) >= top_n):
-        return _frequent_cache[:top_n]
+    entry = _frequent_entry
+    if (entry is not None and entry[2] and entry[0] == filename and 
+        entry[1] == current_timestamp and len(entry[2]) >= top_n):
+        return entry[2][:top_n]
         
     frequent_nums = []
     try:
@@ -198,21 +291,24 @@ def get_frequent_numbers_all_time(filename, top_n=25):
             reader = csv.reader(f)
             next(reader)
             for row in reader:
-                nums = row[3:9]
+                nums = row[3:3 + GAME.pick]
                 if all(n.isdigit() for n in nums):
                     frequent_nums.extend([int(n) for n in nums])
     except: pass
     
     counter = Counter(frequent_nums)
-    full_list = [num for num, count in counter.most_common(45)]
+    full_list = [num for num, count in counter.most_common(GAME.pool)]
     
     # 캐시 업데이트
-    _frequent_cache = full_list
-    _cache_filename = filename
-    _cache_timestamp = current_timestamp
+    _frequent_entry = (filename, current_timestamp, full_list)
     
     return full_list[:top_n]
 
+def seed_frequent_numbers(filename, ranked, timestamp):
+    """이미 계산된 빈출 순위(공유 메모리 등)를 get_frequent_numbers_all_time 캐시로 사용"""
+    global _frequent_entry
+    _frequent_entry = (filename, timestamp, list(ranked))
+
 def get_recent_winning_numbers(filename, count=5):
     recent_wins = []
     try:
@@ -221,35 +317,23 @@ def get_recent_winning_numbers(filename, count=5):
             next(reader)
             rows = list(reader)
             for row in rows[-count:]:
-                nums = row[3:9]
+                nums = row[3:3 + GAME.pick]
                 if all(n.isdigit() for n in nums):
                     recent_wins.append([int(n) for n in nums])
     except: pass
     return recent_wins
 
-def check_similarity_with_recent_patterns(numbers, filename, recent_count=30):
-    """최근 당첨번호와 너무 흡사하면 제외"""
-    nums = sorted(numbers)
+def check_similarity_with_recent_patterns(numbers, filename, recent_count=SIMILARITY_WINDOW):
+    """
+    최근 당첨번호와 너무 흡사하면 제외
+    - 5개 이상 번호가 겹치면 제외
+    - 간격 패턴이 3개 이상 일치하면 제외
+    과거 회차를 하나씩 비교하지 않고 해시 인덱스(lotto_similarity)로 조회하므로
+    recent_count를 전체 이력(None)까지 늘려도 후보당 비용이 같습니다.
+    """
     try:
-        with open(filename, encoding='utf-8') as f:
-            reader = csv.reader(f)
-            next(reader)
-            rows = list(reader)
-            recent_rows = rows[-recent_count:] if len(rows) > recent_count else rows
-            
-            for row in recent_rows:
-                nums_row = row[3:9]
-                if all(n.isdigit() for n in nums_row):
-                    past_sorted = sorted([int(n) for n in nums_row])
-                    # 5개 이상 번호가 겹치면 제외
-                    if len(set(nums) & set(past_sorted)) >= 5: return False
-                    
-                    # 간격 패턴이 너무 비슷해도 제외
-                    past_gaps = [past_sorted[i+1] - past_sorted[i] for i in range(5)]
-                    current_gaps = [nums[i+1] - nums[i] for i in range(5)]
-                    # 간격 패턴이 3개 이상 일치하면 제외
-                    if sum(1 for i in range(5) if past_gaps[i] == current_gaps[i]) >= 3:
-                        return False
+        index = get_similarity_index(filename)
+        if is_similar(numbers, index, recent_count): return False
     except: pass
     return True
 
@@ -257,39 +341,181 @@ def check_similarity_with_recent_patterns(numbers, filename, recent_count=30):
 #  핵심 생성 로직
 # =========================================================
 
-def generate_combinations(past_combs, last_draw, n_sets=15):
+def resolve_strategy_sampler(sampler):
+    """
+    전략 비교 실행(--strategies)의 생성 방식
+    auto는 열거 가능한 게임이면 enumerate -> 전략끼리 규칙 항목별 마스크를 공유 (lotto_query)
+    """
+    if sampler in (None, 'auto') and GAME.enumerable:
+        return 'enumerate'
+    return resolve_sampler(sampler)
+
+def resolve_sampler(sampler):
+    """'auto' -> 게임 기본 생성 방식, 열거할 수 없는 게임의 'enumerate'는 ValueError"""
+    if sampler in (None, 'auto'):
+        return 'enumerate' if GAME.strategy == 'enumerate' else 'random'
+    if sampler == 'enumerate' and not GAME.enumerable:
+        raise ValueError(f'{GAME.title}: 조합 수({GAME.space_size:,}개)가 너무 커서 '
+                         f'enumerate 생성 방식을 쓸 수 없습니다.')
+    return sampler
+
+@profiled()
+def generate_combinations(past_combs, last_draw, n_sets=15, cooccurrence_rule=None,
+                          sampler='auto', wheel=None, pool_size=300, time_budget=2.0,
+                          result_file=RESULT_FILE, partition=None,
+                          deadline=None, cancel=None, progress=None, strategy=None):
+    """
+    sampler
+    - 'random': 완전 랜덤 6개 생성 후 필터로 거름 (기존 방식)
+    - 'constructive': 규칙을 지키며 한 번호씩 조립 (lotto_sampler, 균등 분포)
+    - 'enumerate': 규칙을 만족하는 전체 조합 목록에서 추출 (조합 수가 작은 게임)
+    - 'auto': 게임 정의(lotto_game)의 strategy에 따라 enumerate / random
+    wheel (휠링 모드, lotto_wheel)
+    - None: 통과한 순서대로 n_sets줄 (기존 방식)
+    - 'numbers' / 'pairs' / 'triples': pool_size줄의 후보 풀을 만든 뒤
+      커버리지가 최대가 되도록 n_sets줄 선택 (time_budget초 제한)
+    result_file: 중복 제외에 쓸 추천 기록 (테넌트별 파일, lotto_tenants)
+      None이면 읽지 않고 past_combs만 사용 (일괄 생성처럼 호출자가 제외 집합을 직접 관리)
+    partition=(k, n): hash(조합) % n == k 인 조합만 사용
+      (일괄 생성 병렬 작업끼리 조합 공간을 나눠 서로 겹치지 않게 함)
+    deadline: 종료 시각 (time.monotonic() 기준), 지나면 그때까지 만든 조합만 반환
+    cancel: CancelToken, 중단 요청 시 그때까지 만든 조합만 반환
+    progress(info): 약 PROGRESS_INTERVAL초마다 진행 상황 보고
+      info = {'found', 'target', 'tries', 'elapsed', 'rate'} (마지막 보고에는 'reason' 추가)
+    strategy: A/B 비교 전략 (lotto_strategies), 전략별 규칙 / Top5 강제 여부 적용
+      필터 없는 전략(random)은 sampler와 상관없이 무작위 생성 + 중복 제외만
+    반환: GenerationResult (list, 일찍 멈춘 경우 partial / reason으로 표시)
+    """
     results = []
+    started = time.monotonic()
+    sampler = resolve_sampler(sampler)
+    
+    # 필터 규칙 (lotto_rules.json, 생성 중에는 같은 규칙 사용)
+    rules = get_rules()
+    
+    # (A/B) 전략별 규칙 변형 / 필터 없는 무작위
+    filtered = True
+    if strategy is not None:
+        from lotto_strategies import strategy_rules
+        filtered = strategy.filtered
+        rules = strategy_rules(strategy, rules) or rules
+        if not filtered:
+            sampler = 'random'
+            cooccurrence_rule = None
     
     # Top5 규칙 준비
-    top5_in_last = [n for n in TOP5 if n in last_draw]
+    use_top5 = strategy is None or strategy.top5
+    top5_in_last = [n for n in rules.top5 if n in last_draw] if use_top5 else []
+    
+    # 휠링 모드: 후보 풀 생성 -> 커버리지 최적화 선택
+    if wheel is not None:
+        from lotto_wheel import select_coverage, describe_coverage
+        # 후보 풀 단계의 마지막 보고(reason)는 빼고 전달 -> 종료 보고는 선택까지 끝난 뒤 한 번
+        pool_progress = None
+        if progress is not None:
+            pool_progress = lambda info: progress({k: v for k, v in info.items() if k != 'reason'})
+        pool = generate_combinations(past_combs, last_draw, n_sets=max(pool_size, n_sets),
+                                     cooccurrence_rule=cooccurrence_rule, sampler=sampler,
+                                     result_file=result_file, partition=partition,
+                                     deadline=deadline, cancel=cancel, progress=pool_progress,
+                                     strategy=strategy)
+        if deadline is not None:
+            time_budget = max(0.0, min(time_budget, deadline - time.monotonic()))
+        if cancel is not None and cancel.cancelled:
+            time_budget = 0.0
+        slot_required = [get_top5_forced(top5_in_last, i % 5) for i in range(n_sets)]
+        selected, _ = select_coverage(pool, n_sets, objective=wheel, time_budget=time_budget,
+                                      slot_required=slot_required)
+        print(f"[INFO] 휠링 선택 완료: 후보 {len(pool)}줄 중 {len(selected)}줄 "
+              f"({describe_coverage(selected, wheel)})")
+        results = GenerationResult(selected, n_sets, pool.reason, pool.tries,
+                                   time.monotonic() - started)
+        if progress is not None:
+            progress(_progress_info(len(results), n_sets, results.tries, started, results.reason))
+        return results
+    
+    # (선택) 동반 출현 규칙 준비 - 지정한 경우에만 통계 모듈 로드
+    cooc_tables = None
+    if cooccurrence_rule is not None:
+        from lotto_cooccurrence import build_rule_tables, check_cooccurrence_rule
+        cooc_tables = build_rule_tables(cooccurrence_rule, find_latest_lotto_file())
     
     # 중복 방지 준비 (이번주 이미 생성한 번호 + 과거 당첨 번호 + 지난주 추천 번호)
-    past_recommended = load_past_recommended_combinations()
-    all_past_combs = past_combs | past_recommended
+    # 과거 당첨 번호는 모든 테넌트 공유, 추천 번호는 이 테넌트 기록만
+    if result_file is not None:
+        all_past_combs = past_combs | load_past_recommended_combinations(result_file)
+    else:
+        all_past_combs = past_combs
     
     csv_filename = find_latest_lotto_file()
     
-    print(f"[INFO] 번호 생성 시작: 목표 {n_sets}세트, 시도 제한 500,000회")
+    # (선택) 구성형 샘플러 준비
+    if sampler == 'constructive':
+        from lotto_sampler import get_feasibility_table
+        frequency = rules.frequency(csv_filename)
+        cold, top15 = frequency['cold'], frequency['top']
+    elif sampler == 'enumerate':
+        from lotto_sampler import get_enumerated_sampler
+        enumerated = get_enumerated_sampler(csv_filename, rules)
+    
+    label = f" (전략 {strategy.name})" if strategy is not None else ''
+    print(f"[INFO] 번호 생성 시작{label}: 목표 {n_sets}세트, 시도 제한 500,000회")
     
     tries = 0
     max_tries = 500000  # [요청반영] 50만 번 시도
+    reason = None
+    next_report = started + PROGRESS_INTERVAL
     
     while len(results) < n_sets and tries < max_tries:
         tries += 1
         
-        # 완전 랜덤 생성 (가중치 없이 순수 무작위성에서 필터로 걸러냄)
-        # -> 가중치를 주면 오히려 필터와 충돌하여 확률이 떨어질 수 있음
-        nums = random.sample(range(1, 46), 6)
-        
-        # 기본 필터 1 (속도 위해 가벼운 체크 먼저)
-        if not check_even_odd(nums): continue
+        # 마감/중단 확인 + 진행 상황 보고 (시계는 256회마다 확인)
+        if tries & 0xFF == 0:
+            now = time.monotonic()
+            if cancel is not None and cancel.cancelled:
+                reason = 'cancelled'
+                break
+            if deadline is not None and now >= deadline:
+                reason = 'deadline'
+                break
+            if progress is not None and now >= next_report:
+                progress(_progress_info(len(results), n_sets, tries, started))
+                next_report = now + PROGRESS_INTERVAL
         
-        # Top5 규칙 적용
         line_idx = len(results) % 5
-        nums = apply_top5_rule(nums, top5_in_last, line_idx)
+        
+        if sampler in ('constructive', 'enumerate'):
+            # 규칙을 만족하는 티켓만 조립/추출 (Top5 강제 번호는 미리 포함)
+            forced = get_top5_forced(top5_in_last, line_idx)
+            if sampler == 'enumerate':
+                nums = enumerated.sample(forced)
+            else:
+                nums = get_feasibility_table(cold, top15, forced, rules).sample()
+            if nums is None:
+                print(f"[WARN] 조건을 만족하는 조합이 없습니다 (강제 번호: {forced})")
+                reason = 'infeasible'
+                break
+        else:
+            # 완전 랜덤 생성 (가중치 없이 순수 무작위성에서 필터로 걸러냄)
+            # -> 가중치를 주면 오히려 필터와 충돌하여 확률이 떨어질 수 있음
+            nums = GAME.sample(random)
+            
+            # 기본 필터 1 (속도 위해 가벼운 체크 먼저)
+            if filtered and not rules.odd_ok(nums): continue
+            
+            # Top5 규칙 적용
+            nums = apply_top5_rule(nums, top5_in_last, line_idx)
+        
+        # (일괄 생성 병렬) 다른 작업 몫의 조합은 비싼 필터 전에 버림
+        if partition is not None and hash(tuple(sorted(nums))) % partition[1] != partition[0]:
+            continue
         
         # 엄격한 품질 체크 (여기서 99% 걸러짐)
-        if not check_pattern_quality(nums, csv_filename): continue
+        if filtered and not check_pattern_quality(nums, csv_filename, rules): continue
+        
+        # (선택) 동반 출현 규칙
+        if cooc_tables is not None and not check_cooccurrence_rule(nums, cooc_tables):
+            continue
             
         # 중복 체크
         comb = tuple(sorted(nums))
@@ -303,33 +529,48 @@ def generate_combinations(past_combs, last_draw, n_sets=15):
     
     # 만약 50만 번을 돌려도 15개가 안 되면? 
     # Fallback 없이 있는 그대로 출력 (중복 채우기 X)
+    if reason is None:
+        reason = 'complete' if len(results) >= n_sets else 'exhausted'
+    results = GenerationResult(results, n_sets, reason, tries, time.monotonic() - started)
+    if results.partial:
+        print(f"[WARN] {results.describe()}")
+    if progress is not None:
+        progress(_progress_info(len(results), n_sets, tries, started, reason))
     
     return results
 
 def find_latest_lotto_file():
     base_dir = os.path.dirname(os.path.abspath(__file__))
-    csv_path = os.path.join(base_dir, 'lotto_total.csv')
+    csv_path = os.path.join(base_dir, GAME.data_file)
     return csv_path
 
-def load_past_recommended_combinations():
-    if not os.path.exists('lotto_result.txt'):
+@profiled()
+def load_past_recommended_combinations(result_file=RESULT_FILE):
+    if not os.path.exists(result_file):
         return set()
     past_recommended = set()
     try:
-        with open('lotto_result.txt', encoding='utf-8') as f:
+        with open(result_file, encoding='utf-8') as f:
             content = f.read()
-        pattern = r'^[A-E]: ([\d\s]+)$'
+        pattern = r'^[A-E]: ([\d\s+]+)$'
         lines = content.split('\n')
         for line in lines:
             match = re.match(pattern, line.strip())
             if match:
-                nums = [int(x) for x in match.group(1).split()]
-                if len(nums) == 6:
-                    past_recommended.add(tuple(sorted(nums)))
+                parsed = GAME.parse_line(match.group(1))
+                if parsed is not None:
+                    past_recommended.add(tuple(sorted(parsed[0])))
     except: pass
     return past_recommended
 
-def save_lotto_result(combs, latest_file, count):
+@profiled()
+def save_lotto_result(combs, latest_file, count=None, result_file=RESULT_FILE, note=None,
+                      strategy=None):
+    """
+    추천 블록 1개를 추천 기록에 추가하고 추천 번호(NN번째) 반환
+    count=None이면 잠금 안에서 다음 번호를 발급 (동시에 저장해도 번호/블록이 섞이지 않음, lotto_store)
+    strategy: A/B 비교 전략 이름 -> '[전략 이름]' 줄 (분석기가 전략별로 집계)
+    """
     # 회차 정보 읽기
     round_no = '????'
     try:
@@ -340,8 +581,12 @@ def save_lotto_result(combs, latest_file, count):
     except: pass
 
     lines = []
-    lines.append(f"{count:02d}번째 추천 번호에요~❤️❤️")
     lines.append(f"[직전회차 {round_no}회]")
+    if strategy:
+        lines.append(f"[전략 {strategy}]")
+    if note:
+        # 마감/중단으로 일부만 생성된 경우 (분석기는 이 줄을 무시)
+        lines.append(f"⚠️ {note}")
     lines.append('-'*30)
     
     # [수정] 중복 세트 방지 로직
@@ -357,7 +602,8 @@ def save_lotto_result(combs, latest_file, count):
             if current_idx < total_combs:
                 nums = combs[current_idx]
                 current_idx += 1
-                nums_str = ' '.join(str(n) for n in nums)
+                # 보너스 볼을 따로 고르는 게임은 '+ 보너스'를 붙임 (lotto_game)
+                nums_str = GAME.format_line(nums, GAME.sample_bonus(random))
                 lines.append(f"{chr(65+j)}: {nums_str}")
             else:
                 # 50만 번 시도해도 부족한 경우 (극히 드물 것임)
@@ -373,31 +619,182 @@ def save_lotto_result(combs, latest_file, count):
     ]
     lines.append(random.choice(messages))
     
-    with open('lotto_result.txt', 'a', encoding='utf-8') as f:
-        f.write('\n'.join(lines) + '\n')
+    # 번호 발급 + 블록 추가는 잠금 안에서 한 번에
+    count, _ = append_block(result_file,
+                            lambda seq: f"{seq:02d}번째 추천 번호에요~❤️❤️\n" + '\n'.join(lines) + '\n',
+                            count)
+    return count
 
-def main():
-    try:
-        CSV_FILE = find_latest_lotto_file()
-        if not os.path.exists(CSV_FILE):
-            print("데이터 파일이 없습니다.")
-            return
+def add_generation_options(parser):
+    """생성 옵션 (단건 생성 / 일괄 생성(lotto_batch) 공용)"""
+    parser.add_argument('--pair-rule', action='store_true',
+                        help='동반 출현(쌍/삼중) 규칙 적용')
+    parser.add_argument('--pair-window', type=int, default=None,
+                        help='동반 출현 통계 구간 (최근 N회, 기본: 전체)')
+    parser.add_argument('--min-hot-pairs', type=int, default=1,
+                        help='빈출 쌍 최소 포함 개수')
+    parser.add_argument('--min-hot-triples', type=int, default=0,
+                        help='빈출 삼중 최소 포함 개수')
+    parser.add_argument('--sampler', choices=SAMPLERS, default='auto',
+                        help='생성 방식 (random: 랜덤+필터, constructive: 규칙 기반 조립, '
+                             'enumerate: 규칙 만족 조합 목록에서 추출, auto: 게임에 맞게 선택)')
+    parser.add_argument('--wheel', choices=['numbers', 'pairs', 'triples'], default=None,
+                        help='휠링 모드: 후보 풀에서 커버리지 최대가 되도록 15줄 선택')
+    parser.add_argument('--pool-size', type=int, default=300,
+                        help='휠링 모드 후보 풀 크기')
+    parser.add_argument('--time-budget', type=float, default=2.0,
+                        help='휠링 모드 선택 시간 제한 (초)')
+    parser.add_argument('--similarity-window', type=int, default=SIMILARITY_WINDOW,
+                        help='유사성 검사 구간 (최근 N회, 0 = 전체 이력)')
+    parser.add_argument('--tenant', default=None,
+                        help='추천 기록 테넌트 (예: guild-123, 기본: 공용 lotto_result.txt)')
+    return parser
 
-        past_combs = load_past_combinations(CSV_FILE)
-        last_draw = get_last_draw_numbers(CSV_FILE)
-        
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=f'{GAME.title} 추천번호 생성기',
+                                     epilog='여러 블록 일괄 생성: lotto_generator.py batch --help')
+    add_generation_options(parser)
+    parser.add_argument('--deadline', type=float, default=None,
+                        help='생성 시간 제한 (초, 넘으면 그때까지 만든 조합만 저장)')
+    parser.add_argument('--progress', action='store_true',
+                        help='진행 상황을 [PROGRESS] JSON 줄로 출력 (봇 진행 메시지용)')
+    parser.add_argument('--strategies', default=None,
+                        help='A/B 비교: 전략마다 추천 블록 1개 (예: current,wide_sum,no_top5,random)')
+    return parser.parse_args(argv)
+
+def get_strategies(args):
+    """--strategies -> [Strategy, ...] (지정 안 하면 None)"""
+    if not getattr(args, 'strategies', None):
+        return None
+    from lotto_strategies import parse_strategies
+    return parse_strategies(args.strategies) or None
+
+def get_result_file(args):
+    """테넌트 -> 추천 기록 파일 (지정 안 하면 기존 lotto_result.txt)"""
+    from lotto_tenants import result_file_for
+    return result_file_for(getattr(args, 'tenant', None)) or RESULT_FILE
+
+def get_cooccurrence_rule(args):
+    if not args.pair_rule:
+        return None
+    return {
+        'window': args.pair_window,
+        'min_hot_pairs': args.min_hot_pairs,
+        'min_hot_triples': args.min_hot_triples,
+    }
+
+@profiled()
+def prepare_generation(args):
+    """
+    생성 입력 준비 (과거 당첨 조합 / 직전 회차 / 필터용 인덱스 미리 로드)
+    봇 업데이트 파이프라인에서는 이전 추천 채점과 동시에 실행됩니다.
+    """
+    CSV_FILE = find_latest_lotto_file()
+    if not os.path.exists(CSV_FILE):
+        return None
+    
+    inputs = {
+        'csv_file': CSV_FILE,
+        'past_combs': load_past_combinations(CSV_FILE),
+        'last_draw': get_last_draw_numbers(CSV_FILE),
+    }
+    
+    # 필터가 쓰는 캐시/인덱스 미리 생성
+    rules = get_rules()
+    frequency = rules.frequency(CSV_FILE)
+    get_similarity_index(CSV_FILE)
+    cooccurrence_rule = get_cooccurrence_rule(args)
+    if cooccurrence_rule is not None:
+        from lotto_cooccurrence import build_rule_tables
+        build_rule_tables(cooccurrence_rule, CSV_FILE)
+    strategies = get_strategies(args)
+    if strategies:
+        # 전략별 열거형 샘플러 (공통 규칙 항목 마스크는 한 번만 계산)
+        from lotto_strategies import strategy_rules
+        if resolve_strategy_sampler(args.sampler) == 'enumerate':
+            from lotto_sampler import get_enumerated_sampler
+            for strategy in strategies:
+                strategy_filter = strategy_rules(strategy, rules)
+                if strategy_filter is not None:
+                    get_enumerated_sampler(CSV_FILE, strategy_filter)
+        return inputs
+    sampler = resolve_sampler(args.sampler)
+    if sampler == 'constructive':
+        from lotto_sampler import get_feasibility_table
+        top5_in_last = [n for n in rules.top5 if n in inputs['last_draw']]
+        for line_idx in range(5):
+            get_feasibility_table(frequency['cold'], frequency['top'],
+                                  get_top5_forced(top5_in_last, line_idx), rules)
+    elif sampler == 'enumerate':
+        from lotto_sampler import get_enumerated_sampler
+        get_enumerated_sampler(CSV_FILE, rules)
+    return inputs
+
+@profiled()
+def generate_and_save(inputs, args, cancel=None, progress=None):
+    """
+    15줄 생성 후 추천 기록(기본: lotto_result.txt)에 추가, 생성된 조합(GenerationResult) 반환
+    args.deadline(초)이 지나거나 cancel로 중단되면 그때까지 만든 조합만 표시와 함께 저장
+    (하나도 못 만들었으면 저장하지 않음)
+    """
+    result_file = get_result_file(args)
+    deadline = time.monotonic() + args.deadline if getattr(args, 'deadline', None) else None
+    
+    # A/B 비교: 전략마다 블록 1개 (앞 전략 블록은 저장 후 중복 제외 대상이 됨)
+    strategies = get_strategies(args)
+    sampler = resolve_strategy_sampler(args.sampler) if strategies else args.sampler
+    sequences = []
+    for strategy in strategies or [None]:
         # 15개 목표 생성
-        combs = generate_combinations(past_combs, last_draw, n_sets=15)
+        combs = generate_combinations(inputs['past_combs'], inputs['last_draw'], n_sets=15,
+                                      cooccurrence_rule=get_cooccurrence_rule(args),
+                                      sampler=sampler, wheel=args.wheel,
+                                      pool_size=args.pool_size,
+                                      time_budget=args.time_budget,
+                                      result_file=result_file,
+                                      deadline=deadline, cancel=cancel, progress=progress,
+                                      strategy=strategy)
+        if not combs and combs.reason in ('deadline', 'cancelled'):
+            print("[WARN] 만든 조합이 없어 추천 기록에 저장하지 않습니다.")
+            break
         
-        # 회차 카운트 계산
-        count = 1
-        if os.path.exists('lotto_result.txt'):
-            with open('lotto_result.txt', encoding='utf-8') as f:
-                content = f.read()
-                count = content.count('번째 추천 번호에요~') + 1
-        
-        save_lotto_result(combs, CSV_FILE, count)
+        # 추천 번호(테넌트별)는 저장할 때 잠금 안에서 발급 -> 동시에 실행해도 겹치지 않음
+        combs.sequence = save_lotto_result(combs, inputs['csv_file'], None, result_file,
+                                           note=combs.describe() if combs.partial else None,
+                                           strategy=strategy.name if strategy else None)
+        sequences.append(combs.sequence)
         print(f"[SUCCESS] {len(combs)}개 조합 저장 완료")
+        # 봇이 이 실행의 블록을 찾는 데 사용 (다른 요청이 그 사이 추가한 블록과 구분)
+        print(f"[SAVED] {combs.sequence}")
+        if combs.reason in ('deadline', 'cancelled'):
+            break
+    combs.sequences = sequences
+    return combs
+
+@profiled()
+def main(argv=None):
+    global SIMILARITY_WINDOW
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == 'batch':
+        import lotto_batch
+        return lotto_batch.main(argv[1:])
+    
+    args = parse_args(argv)
+    SIMILARITY_WINDOW = args.similarity_window or None
+    
+    # Ctrl+C / 봇의 !cancel(SIGTERM) -> 그때까지 만든 조합만 저장하고 종료
+    cancel = CancelToken()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: cancel.cancel())
+    try:
+        inputs = prepare_generation(args)
+        if inputs is None:
+            print("데이터 파일이 없습니다.")
+            return
+        
+        generate_and_save(inputs, args, cancel=cancel,
+                          progress=print_progress if args.progress else None)
         
     except Exception as e:
         print(f"[ERROR] {e}")
@@ -0,0 +1,104 @@
+"""
+===============================================================================
+        당첨 이력 스냅샷 (공용 데이터 로더)
+===============================================================================
+lotto_total.csv(게임별 이력 파일, lotto_game)를 한 번만 읽어서 numpy 배열로 보관합니다.
+- 파일의 수정시각/크기가 그대로면 캐시된 스냅샷을 그대로 돌려줍니다.
+- 스냅샷의 'version' 값은 이력 데이터가 바뀔 때마다 달라지므로
+  이력에서 파생되는 인덱스/통계의 캐시 키로 사용합니다.
+===============================================================================
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from lotto_game import GAME
+from lotto_memory import BudgetCache
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TOTAL_CSV = os.path.join(BASE_DIR, GAME.data_file)
+
+# 년도, 회차, 추첨일, 번호 1~pick, 보너스
+NUMBER_COLUMNS = GAME.number_columns
+
+# 캐싱 (파일별 마지막 버전 1개, 메모리 예산 LRU)
+_snapshot_cache = BudgetCache('history', maxsize=8)
+
+def get_history_version(filename=TOTAL_CSV):
+    """이력 파일 버전 문자열 (수정시각 + 크기)"""
+    try:
+        st = os.stat(filename)
+        return f"{st.st_mtime_ns}-{st.st_size}"
+    except OSError:
+        return "missing"
+
+def _find_column(df, candidates, index):
+    for name in candidates:
+        if name in df.columns:
+            return df[name]
+    return df.iloc[:, index]
+
+def load_history(filename=TOTAL_CSV):
+    """
+    당첨 이력 스냅샷 반환
+    {'version', 'rounds': (R,), 'numbers': (R, pick) 정렬됨, 'bonus': (R,), 'dates': list}
+    숫자가 아닌(깨진) 행은 제외합니다.
+    """
+    version = get_history_version(filename)
+    cached = _snapshot_cache.get(filename)
+    if cached is not None and cached['version'] == version:
+        return cached
+
+    rounds = np.zeros(0, dtype=np.int32)
+    numbers = np.zeros((0, GAME.pick), dtype=np.int8)
+    bonus = np.zeros(0, dtype=np.int8)
+    dates = []
+    try:
+        df = pd.read_csv(filename)
+        df.columns = [str(c).strip() for c in df.columns]
+
+        if all(c in df.columns for c in NUMBER_COLUMNS):
+            raw_nums = df[NUMBER_COLUMNS]
+        else:
+            raw_nums = df.iloc[:, 3:3 + GAME.pick]
+        raw_nums = raw_nums.apply(pd.to_numeric, errors='coerce')
+        raw_rounds = pd.to_numeric(_find_column(df, ['회차', 'round'], 1), errors='coerce')
+        raw_bonus = pd.to_numeric(_find_column(df, ['보너스', 'bonus'], 3 + GAME.pick), errors='coerce')
+
+        valid = raw_nums.notna().all(axis=1) & raw_rounds.notna()
+        valid = valid.to_numpy()
+
+        numbers = np.sort(raw_nums.to_numpy()[valid].astype(np.int8), axis=1)
+        rounds = raw_rounds.to_numpy()[valid].astype(np.int32)
+        bonus = raw_bonus.fillna(0).to_numpy()[valid].astype(np.int8)
+        dates = [str(d) for d in _find_column(df, ['추첨일', 'date'], 2).to_numpy()[valid]]
+    except Exception as e:
+        print(f"Error loading history: {e}")
+
+    snapshot = {
+        'version': version,
+        'filename': filename,
+        'rounds': rounds,
+        'numbers': numbers,
+        'bonus': bonus,
+        'dates': dates,
+    }
+    return _snapshot_cache.put(filename, snapshot)
+
+def install_snapshot(snapshot):
+    """다른 곳(공유 메모리 등)에서 받은 스냅샷을 이 프로세스의 캐시로 사용 (버전이 현재 파일과 같을 때만)"""
+    if snapshot['version'] != get_history_version(snapshot['filename']):
+        return False
+    _snapshot_cache.put(snapshot['filename'], snapshot)
+    return True
+
+def to_onehot(numbers):
+    """(R, pick) 번호 배열 -> (R, pool) 0/1 행렬"""
+    numbers = np.asarray(numbers)
+    onehot = np.zeros((len(numbers), GAME.pool), dtype=np.int32)
+    if len(numbers):
+        rows = np.repeat(np.arange(len(numbers)), numbers.shape[1])
+        onehot[rows, numbers.ravel().astype(np.intp) - 1] = 1
+    return onehot
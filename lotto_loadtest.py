@@ -0,0 +1,295 @@
+"""
+===============================================================================
+        디스코드 없이 봇 명령 부하 테스트 (가짜 클라이언트/채널/메시지)
+===============================================================================
+1. FakeUser / FakeChannel / FakeMessage: discord 객체 대역
+   -> 실제 MyClient.on_message / run_update_and_send를 그대로 호출
+2. 부하 생성: !num / !anal / !status 등을 동시에 수백 개 발생시키고
+   - 처리량 (건/초)
+   - 명령별 p50/p99 지연 (메시지 수신 ~ 첫 응답 전송)
+   - 이벤트 루프 멈춤 (10ms 간격 측정, 100ms 이상을 멈춤으로 집계)
+   을 보고합니다.
+3. 대역(stand-in) 모드 (기본)
+   - update_lotto.update_csv, lotto_generator(프로세스 내/하위 프로세스 모두)를
+     지연만 흉내 내는 가짜로 바꿉니다. --real이면 실제 코드 사용
+   - 항상 임시 작업 폴더에서 실행하므로 원본 lotto_result.txt는 바뀌지 않습니다.
+사용 예: python lotto_loadtest.py --total 300 --concurrency 100 --mix '!num=1,!anal=1,!status=1'
+===============================================================================
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from lotto_store import append_block
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STALL_THRESHOLD = 0.1
+
+# =========================================================
+#  discord 객체 대역
+# =========================================================
+
+class FakeRateLimited(Exception):
+    """discord.HTTPException(429)과 같은 속성 (status, retry_after)"""
+    def __init__(self, retry_after):
+        super().__init__(f'429 Too Many Requests (retry after {retry_after}s)')
+        self.status = 429
+        self.retry_after = retry_after
+
+class FakeUser:
+    def __init__(self, user_id, name='loadtest', admin=False):
+        self.id = user_id
+        self.name = name
+        self.bot = False
+        self.guild_permissions = type('Permissions', (), {'administrator': admin})()
+
+    def __str__(self):
+        return self.name
+
+class FakeChannel:
+    """send()만 흉내 냄 (지연/429 발생 비율 지정 가능)"""
+    def __init__(self, channel_id, latency=0.0, rate_limit_ratio=0.0, rng=random):
+        self.id = channel_id
+        self.latency = latency
+        self.rate_limit_ratio = rate_limit_ratio
+        self.rng = rng
+        self.sent = []
+        self.first_send = asyncio.Event()
+
+    async def send(self, content=None, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.rate_limit_ratio and self.rng.random() < self.rate_limit_ratio:
+            raise FakeRateLimited(0.05)
+        self.sent.append((time.perf_counter(), content))
+        self.first_send.set()
+        return FakeSentMessage(self, content)
+
+class FakeSentMessage:
+    """send() 결과 (진행 상황 메시지 수정용 edit만 흉내 냄)"""
+    def __init__(self, channel, content):
+        self.channel = channel
+        self.content = content
+        self.edits = 0
+
+    async def edit(self, content=None, **kwargs):
+        if self.channel.latency:
+            await asyncio.sleep(self.channel.latency)
+        self.content = content
+        self.edits += 1
+
+class FakeMessage:
+    _ids = itertools.count(1)
+
+    def __init__(self, content, author, channel):
+        self.id = next(self._ids)
+        self.content = content
+        self.author = author
+        self.channel = channel
+
+async def _ready():
+    return None
+
+def make_client(bot):
+    """게이트웨이 연결 없이 MyClient 생성 (스케줄러/메트릭 서버 시작 안 함)"""
+    client = bot.MyClient()
+    client.wait_until_ready = _ready
+    client.channel = FakeChannel(0)
+    return client
+
+# =========================================================
+#  update_lotto / lotto_generator 대역
+# =========================================================
+
+def write_stub_block(path='lotto_result.txt', rng=random):
+    """lotto_generator와 같은 형식의 가짜 추천 블록 추가 (같은 잠금/번호 발급 사용) -> 추천 번호"""
+    base_round = '????'
+    lines = [f"[직전회차 {base_round}회]", '-' * 30]
+    for _ in range(3):
+        for j in range(5):
+            nums = sorted(rng.sample(range(1, 46), 6))
+            lines.append(f"{chr(65 + j)}: {' '.join(map(str, nums))}")
+        lines.append('-' * 30)
+    lines.append('🧪 "부하 테스트용 대역 결과"')
+    sequence, _ = append_block(path, lambda seq: f"{seq:02d}번째 추천 번호에요~❤️❤️\n" + '\n'.join(lines) + '\n')
+    return sequence
+
+def install_stand_ins(bot, gen_delay, update_delay):
+    """봇이 쓰는 외부 작업을 지연만 흉내 내는 대역으로 교체"""
+    import lotto_generator
+    import update_lotto
+
+    def update_csv(log=print, json_file=None, csv_file=None):
+        time.sleep(update_delay)
+        log("Round 0 already exists in CSV. Skipping update.")
+        return 'exists'
+
+    def prepare_generation(args):
+        time.sleep(gen_delay / 2)
+        return {'csv_file': update_lotto.CSV_FILE, 'past_combs': set(), 'last_draw': []}
+
+    def generate_and_save(inputs, args, cancel=None, progress=None):
+        time.sleep(gen_delay / 2)
+        write_stub_block(lotto_generator.get_result_file(args))
+        return []
+
+    update_lotto.update_csv = update_csv
+    lotto_generator.prepare_generation = prepare_generation
+    lotto_generator.generate_and_save = generate_and_save
+    # !num 하위 프로세스도 대역 스크립트로
+    bot.GENERATOR_CMD = [sys.executable, os.path.abspath(__file__),
+                         'stub-generator', '--delay', str(gen_delay)]
+
+# =========================================================
+#  부하 생성 / 측정
+# =========================================================
+
+def quantile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+async def _monitor_lag(samples, interval=0.01):
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - start - interval))
+
+async def run_load(client, commands, concurrency=100, timeout=120.0,
+                   channel_latency=0.0, rate_limit_ratio=0.0, seed=None):
+    """
+    commands 목록을 동시에 최대 concurrency개씩 보내고 결과 집계
+    메시지마다 별도 채널을 써서 '그 메시지의 첫 응답' 시각을 잽니다.
+    """
+    rng = random.Random(seed)
+    user = FakeUser(424242)
+    semaphore = asyncio.Semaphore(concurrency)
+    results = []
+    lag_samples = []
+    monitor = asyncio.create_task(_monitor_lag(lag_samples))
+
+    async def one(i, command):
+        async with semaphore:
+            channel = FakeChannel(100000 + i, channel_latency, rate_limit_ratio, rng)
+            message = FakeMessage(command, user, channel)
+            start = time.perf_counter()
+            error = None
+            try:
+                await client.on_message(message)
+                await asyncio.wait_for(channel.first_send.wait(), timeout)
+            except Exception as e:
+                error = e
+            results.append((command, time.perf_counter() - start, error))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i, c) for i, c in enumerate(commands)))
+    elapsed = time.perf_counter() - started
+    monitor.cancel()
+    await client.outbox.flush()
+    return {'results': results, 'elapsed': elapsed, 'lag': lag_samples}
+
+def format_report(stats):
+    results, elapsed, lag = stats['results'], stats['elapsed'], stats['lag']
+    errors = sum(1 for _, _, e in results if e is not None)
+    lines = [f"총 {len(results)}건 / {elapsed:.2f}초 -> {len(results) / elapsed:.1f}건/초 (오류 {errors}건)",
+             f"{'명령':<10}{'건수':>6}{'오류':>6}{'p50':>10}{'p99':>10}{'최대':>10}"]
+    for command in sorted({c for c, _, _ in results}):
+        latencies = [t for c, t, e in results if c == command and e is None]
+        failed = sum(1 for c, _, e in results if c == command and e is not None)
+        lines.append(f"{command:<10}{len(latencies) + failed:>6}{failed:>6}"
+                     f"{quantile(latencies, 0.5) * 1000:>8.0f}ms{quantile(latencies, 0.99) * 1000:>8.0f}ms"
+                     f"{max(latencies, default=0) * 1000:>8.0f}ms")
+    stalls = sum(1 for v in lag if v >= STALL_THRESHOLD)
+    lines.append(f"이벤트 루프 지연: p50 {quantile(lag, 0.5) * 1000:.0f}ms, "
+                 f"p99 {quantile(lag, 0.99) * 1000:.0f}ms, 최대 {max(lag, default=0) * 1000:.0f}ms, "
+                 f"{STALL_THRESHOLD * 1000:.0f}ms 이상 멈춤 {stalls}회")
+    first_error = next((e for _, _, e in results if e is not None), None)
+    if first_error is not None:
+        lines.append(f"첫 오류: {first_error!r}")
+    return '\n'.join(lines)
+
+def build_commands(mix, total, seed=None):
+    """'!num=1,!anal=1,!status=2' -> 가중치 비율대로 섞은 명령 목록"""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.strip().partition('=')
+        weights[name] = float(weight or 1)
+    rng = random.Random(seed)
+    return rng.choices(list(weights), weights=list(weights.values()), k=total)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='디스코드 없이 봇 명령 부하 테스트')
+    sub = parser.add_subparsers(dest='command')
+    stub = sub.add_parser('stub-generator', help='(내부용) lotto_generator.py 대역')
+    stub.add_argument('--delay', type=float, default=0.05)
+    stub.add_argument('--tenant', default=None)
+    stub.add_argument('--deadline', type=float, default=None)
+    stub.add_argument('--progress', action='store_true')
+
+    parser.add_argument('--total', type=int, default=300, help='보낼 메시지 수')
+    parser.add_argument('--concurrency', type=int, default=100, help='동시에 처리 중인 최대 메시지 수')
+    parser.add_argument('--mix', default='!num=1,!anal=1,!status=1', help='명령별 가중치')
+    parser.add_argument('--real', action='store_true', help='대역 대신 실제 생성기/업데이트 사용')
+    parser.add_argument('--gen-delay', type=float, default=0.05, help='대역 생성기 지연 (초)')
+    parser.add_argument('--update-delay', type=float, default=0.05, help='대역 업데이트 지연 (초)')
+    parser.add_argument('--channel-latency', type=float, default=0.02, help='가짜 전송 지연 (초)')
+    parser.add_argument('--rate-limit-ratio', type=float, default=0.0, help='429 응답 비율 (0~1)')
+    parser.add_argument('--timeout', type=float, default=120.0, help='메시지당 응답 대기 한도 (초)')
+    parser.add_argument('--seed', type=int, default=None)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == 'stub-generator':
+        import lotto_generator
+        time.sleep(args.delay)
+        sequence = write_stub_block(lotto_generator.get_result_file(args))
+        if args.progress:
+            lotto_generator.print_progress({'found': 15, 'target': 15, 'tries': 15,
+                                            'elapsed': args.delay, 'rate': 0, 'reason': 'complete'})
+        print("[SUCCESS] 대역 조합 저장 완료")
+        print(f"[SAVED] {sequence}")
+        return
+
+    # 임시 작업 폴더 (봇/생성기가 상대 경로로 쓰는 파일을 원본과 분리)
+    workdir = tempfile.mkdtemp(prefix='lotto_loadtest_')
+    for name in ('lotto_total.csv', 'lotto_result.txt'):
+        if os.path.exists(os.path.join(BASE_DIR, name)):
+            shutil.copy(os.path.join(BASE_DIR, name), workdir)
+    # 테넌트별 추천 기록도 임시 폴더에 (하위 프로세스에도 전달)
+    os.environ['LOTTO_RESULTS_DIR'] = os.path.join(workdir, 'results')
+    previous = os.getcwd()
+    os.chdir(workdir)
+    sys.path.insert(0, BASE_DIR)
+    try:
+        import discord_lotto_bot as bot
+        import lotto_analyzer
+        # 분석기는 스크립트 위치 기준 경로를 쓰므로 작업 폴더로 돌림 (리포트 캐시 포함)
+        lotto_analyzer.BASE_DIR = workdir
+        lotto_analyzer.REPORT_CACHE_FILE = lotto_analyzer.get_file_path('lotto_report_cache.json')
+        if args.real:
+            bot.GENERATOR_CMD = [sys.executable, os.path.join(BASE_DIR, 'lotto_generator.py')]
+        else:
+            install_stand_ins(bot, args.gen_delay, args.update_delay)
+        client = make_client(bot)
+        commands = build_commands(args.mix, args.total, args.seed)
+        print(f"[INFO] 부하 테스트: {args.total}건, 동시 {args.concurrency}, "
+              f"{'실제 코드' if args.real else '대역'} 사용, 작업 폴더 {workdir}")
+        stats = asyncio.run(run_load(client, commands, args.concurrency, args.timeout,
+                                     args.channel_latency, args.rate_limit_ratio, args.seed))
+        print(format_report(stats))
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
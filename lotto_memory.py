@@ -0,0 +1,383 @@
+"""
+===============================================================================
+        메모리 예산 / 사용량 보고 (오래 실행되는 봇용)
+===============================================================================
+1. 메모리 예산 (LOTTO_MEMORY_BUDGET_MB, 0/빈 값 = 제한 없음)
+   - 프로세스 안 캐시(이력 스냅샷, 성과 리포트, 분포 통계, 질의 특성 열,
+     샘플러 가능성 표 / 열거형 유효 조합 목록)는 BudgetCache로 만들어 예산에 등록
+   - 항목마다 넣을 때 크기를 어림잡아 두고, 전체 합이 예산을 넘으면
+     모든 캐시를 통틀어 가장 오래 안 쓴 항목부터 버림 (LRU)
+   - 쓰면서 커지는 값(샘플러 가능성 표의 메모 등)은 memory_size()를 제공하고,
+     꺼낼 때 / 예산 정리 / 사용량 보고 때마다 다시 잽니다.
+   - 버린 항목은 다음 요청 때 다시 계산 (성과 리포트는 디스크 캐시에서 다시 읽음)
+2. RSS 기록: monitor_memory()가 주기적으로 프로세스 RSS를 기록
+   -> 메트릭 lotto_process_rss_bytes / lotto_cache_bytes{cache} + 최근 RSS_HISTORY개
+3. 할당 추적 (tracemalloc, 켜져 있을 때만)
+   - track('!anal'): 명령/파이프라인 단계 1회 동안의 최대 사용량(peak)과
+     가장 많이 늘어난 할당 위치 상위 TOP_ALLOCATIONS개를 이름별 마지막 기록으로 보관
+   - 모든 할당을 추적하므로 느려짐 -> LOTTO_TRACEMALLOC=<프레임 수> 또는 !mem trace on
+   - 프로세스 전체 기준이라 동시에 실행된 명령의 할당도 함께 잡힙니다.
+4. render_memory_report(): !mem 명령용 요약
+===============================================================================
+"""
+
+import asyncio
+import collections
+import contextlib
+import datetime
+import itertools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import types
+
+import numpy as np
+
+from lotto_metrics import registry
+
+def _parse_number(value, default=0):
+    try:
+        return max(0, float(value)) if value not in (None, '') else default
+    except ValueError:
+        return default
+
+BUDGET_BYTES = int(_parse_number(os.environ.get('LOTTO_MEMORY_BUDGET_MB')) * 1024 * 1024)
+TRACE_FRAMES = int(_parse_number(os.environ.get('LOTTO_TRACEMALLOC')))
+RSS_HISTORY = 1440          # 1분 간격이면 하루
+TOP_ALLOCATIONS = 8
+
+_lock = threading.RLock()
+_tick = itertools.count()
+_caches = {}                # 이름 -> BudgetCache
+_rss_history = collections.deque(maxlen=RSS_HISTORY)
+_reports = {}               # 명령/단계 이름 -> 마지막 track 기록
+
+# 크기에 넣지 않는 공유 객체 (모듈/함수/클래스)
+_SKIP_TYPES = (types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+               types.MethodType, type)
+
+def estimate_size(obj, _seen=None):
+    """객체가 차지하는 메모리 어림값 (바이트, numpy/pandas/컨테이너는 내용까지)"""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen or isinstance(obj, _SKIP_TYPES):
+        return 0
+    seen.add(id(obj))
+    measure = getattr(obj, 'memory_size', None)
+    if callable(measure):
+        return int(measure())
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if hasattr(obj, 'memory_usage') and hasattr(obj, 'index'):   # pandas
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    size = sys.getsizeof(obj, 0)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k, seen) + estimate_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, collections.deque)):
+        size += sum(estimate_size(x, seen) for x in obj)
+    elif hasattr(obj, '__dict__'):
+        size += estimate_size(vars(obj), seen)
+    elif hasattr(obj, '__slots__'):
+        size += sum(estimate_size(getattr(obj, s), seen)
+                    for s in obj.__slots__ if hasattr(obj, s))
+    return size
+
+def format_bytes(n):
+    if n is None:
+        return '-'
+    for unit in ('B', 'KB', 'MB'):
+        if abs(n) < 1024:
+            return f"{n:.0f}{unit}" if unit == 'B' else f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.2f}GB"
+
+# =========================================================
+#  예산에 등록되는 LRU 캐시
+# =========================================================
+
+class BudgetCache:
+    """
+    메모리 예산에 등록되는 LRU 캐시 (dict처럼 사용)
+    maxsize: 항목 수 상한 (None = 예산만 적용)
+    """
+
+    def __init__(self, name, maxsize=None):
+        self.name = name
+        self.maxsize = maxsize
+        self._data = collections.OrderedDict()   # 키 -> [값, 크기, 마지막 사용 순번]
+        self.bytes = 0
+        self.evictions = 0
+        with _lock:
+            _caches[name] = self
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        with _lock:
+            return iter(list(self._data))
+
+    def keys(self):
+        return list(self)
+
+    def get(self, key, default=None):
+        with _lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            self._data.move_to_end(key)
+            entry[2] = next(_tick)
+            if self._measure(entry) > 0:
+                enforce_budget(keep=(self, key))
+            return entry[0]
+
+    def __getitem__(self, key):
+        with _lock:
+            if key not in self._data:
+                raise KeyError(key)
+            return self.get(key)
+
+    def put(self, key, value, size=None):
+        """항목 추가 (size를 모르면 estimate_size로 어림) -> 예산/개수 초과분 정리"""
+        if size is None:
+            size = estimate_size(value)
+        with _lock:
+            self._remove(key)
+            self._data[key] = [value, size, next(_tick)]
+            self.bytes += size
+            while self.maxsize is not None and len(self._data) > self.maxsize:
+                self._evict(next(iter(self._data)))
+            enforce_budget(keep=(self, key))
+        return value
+
+    __setitem__ = put
+
+    def _measure(self, entry):
+        """memory_size()가 있는 값은 크기를 다시 잼 -> 늘어난 바이트 수"""
+        measure = getattr(entry[0], 'memory_size', None)
+        if not callable(measure):
+            return 0
+        size = int(measure())
+        delta = size - entry[1]
+        entry[1] = size
+        self.bytes += delta
+        return delta
+
+    def remeasure(self):
+        with _lock:
+            for entry in self._data.values():
+                self._measure(entry)
+
+    def _remove(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+        return entry
+
+    def _evict(self, key):
+        if self._remove(key) is not None:
+            self.evictions += 1
+            registry.inc('lotto_cache_evictions_total', cache=self.name)
+
+    def pop(self, key, default=None):
+        with _lock:
+            entry = self._remove(key)
+        return default if entry is None else entry[0]
+
+    def __delitem__(self, key):
+        with _lock:
+            if self._remove(key) is None:
+                raise KeyError(key)
+
+    def clear(self):
+        with _lock:
+            self._data.clear()
+            self.bytes = 0
+
+def total_cache_bytes():
+    with _lock:
+        return sum(cache.bytes for cache in _caches.values())
+
+def remeasure_caches():
+    """쓰면서 커지는 항목의 크기를 모든 캐시에서 다시 잼"""
+    with _lock:
+        for cache in _caches.values():
+            cache.remeasure()
+
+def enforce_budget(keep=None):
+    """
+    캐시 전체 크기가 예산을 넘으면 모든 캐시를 통틀어 가장 오래 안 쓴 항목부터 버림
+    keep=(캐시, 키): 방금 넣은 항목은 남김 (그 항목 하나만으로 넘으면 예산 초과 허용)
+    반환: 버린 항목 수
+    """
+    if BUDGET_BYTES <= 0:
+        return 0
+    evicted = 0
+    with _lock:
+        remeasure_caches()
+        while total_cache_bytes() > BUDGET_BYTES:
+            oldest = None
+            for cache in _caches.values():
+                # OrderedDict 앞쪽이 그 캐시에서 가장 오래 안 쓴 항목
+                for key, entry in cache._data.items():
+                    if keep is not None and cache is keep[0] and key == keep[1]:
+                        continue
+                    if oldest is None or entry[2] < oldest[2]:
+                        oldest = (cache, key, entry[2])
+                    break
+            if oldest is None:
+                break
+            oldest[0]._evict(oldest[1])
+            evicted += 1
+    return evicted
+
+def set_budget(megabytes):
+    """예산 변경 (MB, 0 = 제한 없음) -> 바로 정리"""
+    global BUDGET_BYTES
+    BUDGET_BYTES = int(_parse_number(megabytes) * 1024 * 1024)
+    return enforce_budget()
+
+# =========================================================
+#  RSS 기록
+# =========================================================
+
+def current_rss():
+    """프로세스 RSS (바이트, 알 수 없으면 None)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # /proc이 없으면 최대 RSS로 대신 (macOS는 바이트, 그 외는 KB)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def record_memory():
+    """RSS/캐시 크기를 메트릭과 최근 기록에 남김 -> RSS"""
+    rss = current_rss()
+    if rss is not None:
+        _rss_history.append((time.time(), rss))
+        registry.set('lotto_process_rss_bytes', rss)
+    with _lock:
+        remeasure_caches()
+        caches = list(_caches.values())
+    for cache in caches:
+        registry.set('lotto_cache_bytes', cache.bytes, cache=cache.name)
+    registry.set('lotto_memory_budget_bytes', BUDGET_BYTES)
+    return rss
+
+async def monitor_memory(interval=60):
+    """interval마다 RSS 기록 + 예산 정리"""
+    while True:
+        record_memory()
+        enforce_budget()
+        await asyncio.sleep(interval)
+
+# =========================================================
+#  할당 추적 (tracemalloc)
+# =========================================================
+
+_TRACE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+def start_tracing(frames=None):
+    """할당 추적 시작 (frames: 할당 위치마다 남길 호출 단계 수)"""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames or TRACE_FRAMES or 1)
+
+def stop_tracing():
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def is_tracing():
+    return tracemalloc.is_tracing()
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces(_TRACE_FILTERS)
+
+@contextlib.contextmanager
+def track(name, top=TOP_ALLOCATIONS):
+    """
+    with track('!anal'): ...
+    이름별 마지막 기록: 걸린 시간, RSS 변화, (추적 중이면) peak와 가장 많이 늘어난 할당 위치
+    """
+    rss_before = current_rss()
+    before = None
+    if tracemalloc.is_tracing():
+        before = _snapshot()
+        traced_before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        rss_after = current_rss()
+        report = {
+            'time': time.time(),
+            'elapsed': time.perf_counter() - start,
+            'rss': rss_after,
+            'rss_delta': rss_after - rss_before if None not in (rss_before, rss_after) else None,
+            'peak': None,
+            'top': [],
+        }
+        if before is not None and tracemalloc.is_tracing():
+            report['peak'] = max(0, tracemalloc.get_traced_memory()[1] - traced_before)
+            for stat in _snapshot().compare_to(before, 'lineno')[:top]:
+                if stat.size_diff <= 0:
+                    continue
+                frame = stat.traceback[0]
+                report['top'].append((f"{os.path.basename(frame.filename)}:{frame.lineno}",
+                                      stat.size_diff, stat.count_diff))
+            registry.set('lotto_traced_peak_bytes', report['peak'], scope=name)
+        with _lock:
+            _reports[name] = report
+
+# =========================================================
+#  요약 (!mem)
+# =========================================================
+
+def render_memory_report():
+    lines = []
+    rss = current_rss()
+    if rss is not None:
+        line = f"RSS: {format_bytes(rss)}"
+        if _rss_history:
+            peak = max(value for _, value in _rss_history)
+            first_time, first = _rss_history[0]
+            hours = (time.time() - first_time) / 3600
+            line += f" (기록 중 최대 {format_bytes(peak)}, {hours:.1f}시간 전 대비 {format_bytes(rss - first)})"
+        lines.append(line)
+
+    with _lock:
+        remeasure_caches()
+        caches = sorted(_caches.values(), key=lambda c: c.name)
+        budget = f"{format_bytes(BUDGET_BYTES)}" if BUDGET_BYTES > 0 else '제한 없음'
+        lines.append(f"캐시: {format_bytes(total_cache_bytes())} / 예산 {budget}")
+        for cache in caches:
+            lines.append(f"  {cache.name:<16} {len(cache):>3}개 {format_bytes(cache.bytes):>9}"
+                         f"  버림 {cache.evictions}")
+        reports = sorted(_reports.items(), key=lambda item: -item[1]['time'])
+
+    lines.append(f"할당 추적: {'켜짐' if tracemalloc.is_tracing() else '꺼짐'}")
+    for name, report in reports:
+        stamp = datetime.datetime.fromtimestamp(report['time']).strftime('%m-%d %H:%M:%S')
+        line = f"{name} [{stamp}] {report['elapsed']:.2f}초, RSS {format_bytes(report['rss_delta'])}"
+        if report['peak'] is not None:
+            line += f", peak {format_bytes(report['peak'])}"
+        lines.append(line)
+        for where, size, count in report['top']:
+            lines.append(f"    {where:<28} +{format_bytes(size)} ({count:+,}개)")
+    return '\n'.join(lines)
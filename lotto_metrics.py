@@ -0,0 +1,242 @@
+"""
+===============================================================================
+        로또 봇 로컬 메트릭 (Prometheus 텍스트 형식)
+===============================================================================
+1. 히스토그램/카운터/게이지를 메모리에 모아둡니다. (라벨별로 분리)
+   - lotto_command_duration_seconds{command="!num"}   명령 처리 시간
+   - lotto_subprocess_duration_seconds{script="..."}  하위 프로세스 실행 시간
+   - lotto_scheduler_job_duration_seconds{job="..."}  스케줄 작업 시간
+   - lotto_pipeline_stage_duration_seconds{stage="..."} 파이프라인 단계 시간
+   - lotto_event_loop_lag_seconds                     asyncio 이벤트 루프 지연
+   - lotto_outbox_wait_seconds                        전송 대기열 대기 시간
+   - lotto_process_rss_bytes, lotto_cache_bytes{cache="..."} 메모리 (게이지, lotto_memory)
+2. 노출 방식 (둘 다 선택 사항)
+   - 로컬 HTTP 엔드포인트: http://127.0.0.1:<포트>/metrics
+   - 주기적으로 파일에 기록 (node_exporter textfile 수집기 등에서 사용 가능)
+3. 관리자 명령(!metrics)용 요약 문자열 제공
+===============================================================================
+"""
+
+import asyncio
+import bisect
+import os
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+METRIC_HELP = {
+    'lotto_command_duration_seconds': '디스코드 명령 처리 시간',
+    'lotto_subprocess_duration_seconds': '하위 프로세스 실행 시간',
+    'lotto_scheduler_job_duration_seconds': '스케줄 작업 실행 시간',
+    'lotto_pipeline_stage_duration_seconds': '업데이트 파이프라인 단계별 실행 시간',
+    'lotto_outbox_wait_seconds': '메시지가 전송 대기열에서 기다린 시간',
+    'lotto_outbox_retries_total': '속도 제한/서버 오류로 재전송한 횟수',
+    'lotto_outbox_failures_total': '전송에 끝내 실패한 메시지 묶음 수',
+    'lotto_event_loop_lag_seconds': 'asyncio 이벤트 루프 지연',
+    'lotto_process_rss_bytes': '봇 프로세스 RSS',
+    'lotto_cache_bytes': '캐시별 어림 크기',
+    'lotto_memory_budget_bytes': '캐시 메모리 예산 (0 = 제한 없음)',
+    'lotto_cache_evictions_total': '메모리 예산/개수 상한으로 버린 캐시 항목 수',
+    'lotto_traced_peak_bytes': '명령/단계 1회의 최대 추적 메모리 (tracemalloc)',
+    'lotto_fetch_seconds': '당첨번호 API 요청 1번의 응답 시간',
+    'lotto_fetch_requests_total': '당첨번호 조회 결과 (ok / pending / not_modified / error)',
+    'lotto_fetch_retries_total': '당첨번호 조회 재시도 횟수',
+    'lotto_commands_total': '처리한 명령 수',
+    'lotto_command_errors_total': '오류로 끝난 명령 수',
+}
+
+class Histogram:
+    """누적 버킷 히스토그램 (Prometheus 방식) + 최대값"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # 마지막 칸 = +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """버킷 안 선형 보간으로 분위수 추정 (histogram_quantile과 같은 방식)"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, cnt in enumerate(self.counts):
+            if cumulative + cnt >= rank and cnt > 0:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                estimate = lower + (upper - lower) * (rank - cumulative) / cnt
+                return min(estimate, self.max)
+            cumulative += cnt
+        return self.max
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}   # (이름, 라벨 튜플) -> Histogram
+        self.counters = {}     # (이름, 라벨 튜플) -> 값
+        self.gauges = {}       # (이름, 라벨 튜플) -> 마지막 값
+        self.started = time.time()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram(buckets)
+            hist.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.gauges[key] = value
+
+    def timed(self, name, **labels):
+        """with registry.timed('이름', 라벨=값): ... -> 걸린 시간 기록"""
+        return _Timer(self, name, labels)
+
+    # -----------------------------------------------------
+    #  출력
+    # -----------------------------------------------------
+
+    def render_prometheus(self):
+        """Prometheus 텍스트 노출 형식"""
+        lines = []
+        with self._lock:
+            seen = set()
+            for (name, labels), hist in sorted(self.histograms.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                    lines.append(f"# TYPE {name} histogram")
+                cumulative = 0
+                for bound, cnt in zip(list(hist.buckets) + ['+Inf'], hist.counts):
+                    cumulative += cnt
+                    le = bound if bound == '+Inf' else repr(float(bound))
+                    lines.append(f"{name}_bucket{_labels(labels, le=le)} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {hist.sum:.6f}")
+                lines.append(f"{name}_count{_labels(labels)} {hist.count}")
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                    lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name}{_labels(labels)} {value}")
+            for (name, labels), value in sorted(self.gauges.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                    lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name}{_labels(labels)} {value}")
+        lines.append(f"lotto_uptime_seconds {time.time() - self.started:.0f}")
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """사람이 읽는 요약 (!metrics 명령용)"""
+        lines = []
+        with self._lock:
+            items = sorted(self.histograms.items())
+        for (name, labels), hist in items:
+            label = ', '.join(f"{k}={v}" for k, v in labels) or '-'
+            short = name.replace('lotto_', '').replace('_seconds', '')
+            lines.append(f"{short} [{label}] n={hist.count} "
+                         f"p50={hist.quantile(0.5) * 1000:.0f}ms "
+                         f"p99={hist.quantile(0.99) * 1000:.0f}ms "
+                         f"max={hist.max * 1000:.0f}ms")
+        if not lines:
+            return '아직 수집된 메트릭이 없습니다.'
+        uptime = int(time.time() - self.started)
+        lines.insert(0, f"가동 시간: {uptime // 3600}시간 {uptime % 3600 // 60}분")
+        return '\n'.join(lines)
+
+    def write_file(self, path):
+        """원자적으로 파일 기록 (임시 파일 -> 교체)"""
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp, path)
+
+def _labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in items) + '}'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class _Timer:
+    __slots__ = ('registry', 'name', 'labels', 'start')
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+# 봇 전체에서 공유하는 기본 레지스트리
+registry = MetricsRegistry()
+
+def timed(name, **labels):
+    return registry.timed(name, **labels)
+
+# =========================================================
+#  백그라운드 작업 (이벤트 루프 지연 / 파일 기록 / HTTP 노출)
+# =========================================================
+
+async def monitor_event_loop_lag(interval=0.5, reg=registry):
+    """interval마다 잠들었다 깨어난 시각이 얼마나 늦었는지 기록"""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        reg.observe('lotto_event_loop_lag_seconds', lag, buckets=LAG_BUCKETS)
+
+async def flush_metrics_periodically(path, interval=60, reg=registry):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            reg.write_file(path)
+        except Exception as e:
+            print(f"[WARN] 메트릭 파일 기록 실패: {e}")
+
+async def start_metrics_server(port, host='127.0.0.1', reg=registry):
+    """로컬 /metrics 엔드포인트 시작 (aiohttp는 discord.py 의존성으로 설치됨)"""
+    from aiohttp import web
+
+    async def handle(request):
+        return web.Response(text=reg.render_prometheus(),
+                            content_type='text/plain', charset='utf-8')
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    return runner
@@ -0,0 +1,303 @@
+"""
+===============================================================================
+        디스코드 전송 대기열 (채널별, 길이 분할 + 속도 제한 대응)
+===============================================================================
+1. outbox.send(channel, text)는 대기열에 넣고 바로 돌아옵니다.
+   -> 명령 처리가 전송(속도 제한 대기 포함)을 기다리지 않음
+2. 2,000자 제한: 줄 단위로 나누고, 코드 블록(```)이 중간에 잘리면
+   앞 조각은 닫고 다음 조각에서 다시 엽니다.
+3. 짧은 시간(merge_window) 안에 같은 채널로 들어온 짧은 메시지는 하나로 합칩니다.
+   (한동안 조용하던 채널의 첫 메시지는 기다리지 않고 바로 전송)
+4. 속도 제한
+   - 채널별로 일정 시간당 전송 수를 제한 (디스코드 기본: 5초에 5개)
+   - 429 응답이면 Retry-After(또는 retry_after) 만큼 기다린 뒤 재시도
+   - 5xx 오류는 지수 백오프로 재시도
+5. 진행 상황 메시지 (ProgressMessage)
+   - 오래 걸리는 작업만 메시지를 하나 보내 두고, 일정 간격으로 그 메시지를 수정
+===============================================================================
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+
+from lotto_metrics import registry
+
+DISCORD_LIMIT = 2000
+FENCE = '```'
+
+# =========================================================
+#  메시지 분할
+# =========================================================
+
+def _hard_split(line, width):
+    """한 줄이 너무 길면 width씩 자름 (``` 표시 중간은 피함)"""
+    pieces = []
+    while len(line) > width:
+        cut = width
+        while cut > 0 and line[cut - 1] == '`' and line[cut] == '`':
+            cut -= 1
+        if cut == 0:
+            cut = width
+        pieces.append(line[:cut])
+        line = line[cut:]
+    pieces.append(line)
+    return pieces
+
+def split_message(text, limit=DISCORD_LIMIT):
+    """줄 단위로 limit 이하 조각으로 나눔 (코드 블록 균형 유지)"""
+    if len(text) <= limit:
+        return [text]
+
+    close = '\n' + FENCE
+    # 다시 연 조각(``` + 줄 + 닫는 ```)에도 한 줄이 들어가는 폭
+    width = limit - len(FENCE) - 1 - len(close)
+
+    chunks = []
+    lines = []
+    size = -1          # '\n'.join(lines) 길이
+    in_fence = False
+    for line in text.split('\n'):
+        for piece in _hard_split(line, width):
+            after = in_fence != (piece.count(FENCE) % 2 == 1)
+            # 이 줄 뒤에도 코드 블록이 열려 있으면 닫는 ``` 자리까지 확보
+            reserve = len(close) if after else 0
+            if lines and size + 1 + len(piece) + reserve > limit:
+                chunks.append('\n'.join(lines) + (close if in_fence else ''))
+                lines = [FENCE] if in_fence else []
+                size = len(FENCE) if in_fence else -1
+            lines.append(piece)
+            size += 1 + len(piece)
+            in_fence = after
+    chunks.append('\n'.join(lines))
+    return chunks
+
+# =========================================================
+#  채널별 대기열
+# =========================================================
+
+def _retry_after(error, attempt, base=1.0, cap=30.0):
+    """재시도까지 기다릴 시간 (재시도하면 안 되는 오류면 None)"""
+    status = getattr(error, 'status', None)
+    if status == 429 or hasattr(error, 'retry_after'):
+        value = getattr(error, 'retry_after', None)
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None) or {}
+        for key in ('Retry-After', 'X-RateLimit-Reset-After'):
+            if value is None and headers.get(key) is not None:
+                value = headers.get(key)
+        try:
+            return max(0.0, float(value))
+        except (TypeError, ValueError):
+            return min(cap, base * 2 ** attempt)
+    if isinstance(status, int) and status >= 500:
+        return min(cap, base * 2 ** attempt) * (1 + random.random() * 0.1)
+    return None
+
+class _ChannelState:
+    __slots__ = ('channel', 'queue', 'worker', 'sent_times')
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.queue = asyncio.Queue()
+        self.worker = None
+        self.sent_times = deque()
+
+class Outbox:
+    def __init__(self, limit=DISCORD_LIMIT, merge_window=0.3, rate=5, per=5.0, max_retries=5):
+        self.limit = limit
+        self.merge_window = merge_window
+        self.rate = rate
+        self.per = per
+        self.max_retries = max_retries
+        self.channels = {}
+
+    def _state(self, channel):
+        key = getattr(channel, 'id', None) or id(channel)
+        state = self.channels.get(key)
+        if state is None:
+            state = self.channels[key] = _ChannelState(channel)
+        return state
+
+    def send(self, channel, text):
+        """대기열에 추가 (전송 완료 시 True/실패 시 False가 되는 Future 반환)"""
+        state = self._state(channel)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        state.queue.put_nowait((str(text), future, time.monotonic()))
+        if state.worker is None or state.worker.done():
+            state.worker = loop.create_task(self._run(state))
+        return future
+
+    async def post(self, channel, text, files=None):
+        """
+        대기열/합치기 없이 바로 보내고 보낸 메시지 객체 반환 (나중에 edit으로 고칠 메시지용)
+        속도 제한/재시도는 send와 동일, limit을 넘는 부분은 잘라냄
+        files: 첨부 파일 목록을 만드는 함수 (discord.File은 한 번만 보낼 수 있어 재시도마다 새로 만듦)
+        """
+        return await self._deliver(self._state(channel), str(text)[:self.limit], files)
+
+    async def edit(self, message, text):
+        """보낸 메시지 수정 (실패하면 로그만 남기고 False)"""
+        try:
+            await self._pace(self._state(message.channel))
+            await message.edit(content=str(text)[:self.limit])
+            return True
+        except Exception as e:
+            logging.warning(f'메시지 수정 실패: {e}')
+            return False
+
+    async def flush(self):
+        """대기 중인 메시지가 모두 전송될 때까지 대기"""
+        for state in list(self.channels.values()):
+            await state.queue.join()
+
+    async def close(self):
+        for state in self.channels.values():
+            if state.worker is not None:
+                state.worker.cancel()
+        await asyncio.gather(*(s.worker for s in self.channels.values() if s.worker),
+                             return_exceptions=True)
+
+    def pending(self):
+        return sum(s.queue.qsize() for s in self.channels.values())
+
+    async def _next_batch(self, state, carry):
+        """첫 메시지 + merge_window 안에 들어온 짧은 메시지들 (limit 이내)"""
+        batch = [carry] if carry else [await state.queue.get()]
+        size = len(batch[0][0])
+        if size >= self.limit:
+            return batch, None
+        # 몰려드는 중이 아니면 바로 전송 (조용한 채널에 merge_window만큼 지연 추가 방지)
+        idle = not state.sent_times or time.monotonic() - state.sent_times[-1] > self.merge_window
+        if idle and state.queue.empty():
+            return batch, None
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.merge_window
+        while True:
+            remaining = deadline - loop.time()
+            try:
+                if remaining > 0:
+                    item = await asyncio.wait_for(state.queue.get(), remaining)
+                else:
+                    item = state.queue.get_nowait()
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                return batch, None
+            if size + 1 + len(item[0]) > self.limit:
+                return batch, item
+            batch.append(item)
+            size += 1 + len(item[0])
+
+    async def _run(self, state):
+        carry = None
+        while True:
+            batch, carry = await self._next_batch(state, carry)
+            ok = True
+            try:
+                for _, _, queued in batch:
+                    registry.observe('lotto_outbox_wait_seconds', time.monotonic() - queued)
+                text = '\n'.join(text for text, _, _ in batch)
+                for chunk in split_message(text, self.limit):
+                    await self._deliver(state, chunk)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                ok = False
+                registry.inc('lotto_outbox_failures_total')
+                logging.error(f'메시지 전송 실패: {e}')
+            finally:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_result(ok)
+                    state.queue.task_done()
+
+    async def _pace(self, state):
+        """채널별 전송 간격 제한 (per초 동안 최대 rate개)"""
+        while len(state.sent_times) >= self.rate:
+            wait = state.sent_times[0] + self.per - time.monotonic()
+            if wait <= 0:
+                state.sent_times.popleft()
+            else:
+                await asyncio.sleep(wait)
+        state.sent_times.append(time.monotonic())
+
+    async def _deliver(self, state, chunk, files=None):
+        for attempt in range(self.max_retries + 1):
+            await self._pace(state)
+            try:
+                if files is not None:
+                    return await state.channel.send(chunk, files=files())
+                return await state.channel.send(chunk)
+            except Exception as e:
+                delay = _retry_after(e, attempt)
+                if delay is None or attempt == self.max_retries:
+                    raise
+                registry.inc('lotto_outbox_retries_total', status=getattr(e, 'status', 'unknown'))
+                logging.warning(f'전송 재시도 {attempt + 1}/{self.max_retries} ({delay:.1f}초 후): {e}')
+                await asyncio.sleep(delay)
+
+# =========================================================
+#  진행 상황 메시지
+# =========================================================
+
+class ProgressMessage:
+    """
+    오래 걸리는 작업의 진행 상황을 메시지 하나로 표시
+    - show_after초 안에 끝나면 아무것도 보내지 않음
+    - 그 뒤로는 interval초마다 최신 상태로 수정 (내용이 같으면 생략)
+    - update(info)는 작업 스레드에서 불러도 됨 (최신 값만 기록, 전송은 이벤트 루프에서)
+    """
+
+    def __init__(self, outbox, channel, render, show_after=1.0, interval=2.0):
+        self.outbox = outbox
+        self.channel = channel
+        self.render = render
+        self.show_after = show_after
+        self.interval = interval
+        self.info = None
+        self.message = None
+        self._shown = None
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def update(self, info):
+        self.info = info
+
+    async def _refresh(self):
+        if self.info is None:
+            return
+        text = self.render(self.info)
+        if text == self._shown:
+            return
+        if self.message is None:
+            self.message = await self.outbox.post(self.channel, text)
+        else:
+            await self.outbox.edit(self.message, text)
+        self._shown = text
+
+    async def _run(self):
+        await asyncio.sleep(self.show_after)
+        try:
+            while True:
+                await self._refresh()
+                await asyncio.sleep(self.interval)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.warning(f'진행 상황 메시지 전송 실패: {e}')
+
+    async def finish(self):
+        """주기적 수정 중단 -> 메시지를 보냈다면 마지막 상태로 한 번 더 수정"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self.message is not None:
+            try:
+                await self._refresh()
+            except Exception as e:
+                logging.warning(f'진행 상황 메시지 수정 실패: {e}')
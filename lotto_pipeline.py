@@ -0,0 +1,119 @@
+"""
+===============================================================================
+        단계별 의존성 기반 파이프라인 실행기 (asyncio)
+===============================================================================
+1. 각 단계(stage)는 이름, 함수, 입력(앞 단계 이름 목록)을 선언합니다.
+   -> 함수는 입력 단계의 결과를 같은 이름의 키워드 인자로 받습니다.
+2. 입력이 모두 끝난 단계부터 바로 시작하므로, 서로 의존하지 않는 단계는
+   동시에 실행됩니다. (일반 함수는 스레드에서 실행 -> 이벤트 루프를 막지 않음)
+3. 단계마다 실행 시간을 기록합니다.
+   - 메트릭: lotto_pipeline_stage_duration_seconds{stage="..."}
+   - 프로파일(LOTTO_PROFILE=1): stage:<이름> 구간
+4. 실패한 단계에 의존하는 단계는 건너뜁니다. (always=True 단계는 예외:
+   실패/건너뜀 입력 자리에 그 예외 객체를 받아 실행 -> 결과 메시지 작성 등에 사용)
+===============================================================================
+"""
+
+import asyncio
+import inspect
+import time
+
+from lotto_memory import track
+from lotto_metrics import registry
+from lotto_profiler import span
+
+class PipelineError(Exception):
+    pass
+
+class Stage:
+    __slots__ = ('name', 'func', 'requires', 'always', 'timeout')
+
+    def __init__(self, name, func, requires=(), always=False, timeout=None):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+        self.always = always
+        self.timeout = timeout
+
+class PipelineRun:
+    """실행 1회의 결과 (단계별 결과/오류/소요 시간)"""
+
+    def __init__(self):
+        self.results = {}
+        self.errors = {}
+        self.skipped = []
+        self.timings = {}
+
+    def ok(self, name):
+        return name in self.results
+
+    def get(self, name, default=None):
+        return self.results.get(name, default)
+
+    def summary(self):
+        parts = []
+        for name, elapsed in self.timings.items():
+            state = 'ok' if name in self.results else 'error'
+            parts.append(f"{name}={elapsed * 1000:.0f}ms({state})")
+        parts.extend(f"{name}=skipped" for name in self.skipped)
+        return ', '.join(parts)
+
+class Pipeline:
+    def __init__(self, name='pipeline'):
+        self.name = name
+        self.stages = {}
+
+    def add(self, name, func, requires=(), always=False, timeout=None):
+        """단계 등록 (입력 단계는 먼저 등록되어 있어야 함 -> 순환 불가)"""
+        if name in self.stages:
+            raise PipelineError(f"중복된 단계 이름: {name}")
+        for req in requires:
+            if req not in self.stages:
+                raise PipelineError(f"{name}: 알 수 없는 입력 단계 {req}")
+        self.stages[name] = Stage(name, func, requires, always, timeout)
+        return self
+
+    def stage(self, name=None, requires=(), always=False, timeout=None):
+        """데코레이터 형식 등록"""
+        def decorator(func):
+            self.add(name or func.__name__, func, requires, always, timeout)
+            return func
+        return decorator
+
+    async def run(self):
+        run = PipelineRun()
+        done = {name: asyncio.Event() for name in self.stages}
+
+        async def execute(stage):
+            for req in stage.requires:
+                await done[req].wait()
+            try:
+                failed = [req for req in stage.requires if not run.ok(req)]
+                if failed and not stage.always:
+                    run.skipped.append(stage.name)
+                    run.errors[stage.name] = PipelineError(f"입력 단계 실패로 건너뜀: {', '.join(failed)}")
+                    return
+                kwargs = {req: run.results[req] if run.ok(req) else run.errors[req]
+                          for req in stage.requires}
+                start = time.perf_counter()
+                try:
+                    with span(f"stage:{stage.name}"), track(f"stage:{stage.name}"):
+                        if inspect.iscoroutinefunction(stage.func):
+                            call = stage.func(**kwargs)
+                        else:
+                            call = asyncio.to_thread(stage.func, **kwargs)
+                        if stage.timeout is not None:
+                            call = asyncio.wait_for(call, stage.timeout)
+                        run.results[stage.name] = await call
+                except Exception as e:
+                    run.errors[stage.name] = e
+                finally:
+                    elapsed = time.perf_counter() - start
+                    run.timings[stage.name] = elapsed
+                    registry.observe('lotto_pipeline_stage_duration_seconds', elapsed,
+                                     pipeline=self.name, stage=stage.name)
+            finally:
+                done[stage.name].set()
+
+        await asyncio.gather(*(execute(stage) for stage in self.stages.values()))
+        return run
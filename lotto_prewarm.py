@@ -0,0 +1,150 @@
+"""
+===============================================================================
+        새 회차 반영 직후 생성 상태 미리 준비 (백그라운드 prewarm)
+===============================================================================
+1. 새 당첨번호가 CSV에 반영되면(update_csv 성공) 바로 백그라운드 스레드에서
+   새 이력 버전 기준의 파생 데이터를 모두 만들어 둡니다.
+   - 이력 스냅샷, 과거 당첨 조합(중복 제외 집합), 직전 회차, 빈출/저빈출 순위
+   - 최근 패턴 유사성 인덱스, 동반 출현 통계
+   - 샘플러 준비물 (구성형 가능성 표 / 열거형 유효 조합 목록, 설정된 경우)
+   - 이미 쓰던 조건식 질의 특성 열(빈출/저빈출 개수 등), 분포 통계(!stats)
+2. 다 만든 뒤 한 번에 교체 (GenerationState 하나를 통째로 바꿈)
+   -> 요청은 항상 "이전 버전 전체" 또는 "새 버전 전체"만 보게 됨
+3. 같은 버전 준비는 한 번만 (singleflight)
+   - 준비 중에 들어온 요청(업데이트 파이프라인 등)은 새로 만들지 않고 끝나기를 기다림
+   - 준비된 버전이 현재 CSV와 같으면 바로 사용, 다르면 그 자리에서 준비
+4. 준비 스레드는 봇 프로세스 안에서 GIL을 나눠 쓰므로 우선순위를 따로 낮추지 않습니다.
+   모듈별 캐시(유사성 인덱스/빈출 순위/동반 출현/규칙)는 지역 변수에 만든 뒤
+   한 번에 교체하므로 준비 중에도 요청은 이전 값 또는 새 값 전체만 봅니다.
+5. !num은 매번 새 프로세스에서 실행되므로 여기서 준비한 메모리 상태는
+   봇 프로세스 안의 작업(업데이트 파이프라인, !query, !stats)에 쓰입니다.
+===============================================================================
+"""
+
+import threading
+import time
+
+import lotto_generator
+from lotto_cooccurrence import get_cooccurrence
+from lotto_history import TOTAL_CSV, get_history_version, load_history
+from lotto_metrics import registry
+from lotto_similarity import get_similarity_index
+
+class GenerationState:
+    """한 이력 버전의 준비된 생성 입력 (읽기 전용으로 공유)"""
+    __slots__ = ('version', 'inputs', 'elapsed', 'ready_at')
+
+    def __init__(self, version, inputs, elapsed):
+        self.version = version
+        self.inputs = inputs
+        self.elapsed = elapsed
+        self.ready_at = time.time()
+
+def build_state(csv_file=TOTAL_CSV, args=None):
+    """새 이력 버전 기준 파생 데이터 전체 생성 -> GenerationState (CSV가 없으면 None)"""
+    started = time.perf_counter()
+    history = load_history(csv_file)
+    get_similarity_index(csv_file)
+    get_cooccurrence(csv_file)
+    # 과거 조합/직전 회차/빈출 순위/샘플러 준비물
+    inputs = lotto_generator.prepare_generation(args or lotto_generator.parse_args([]))
+    if inputs is None:
+        return None
+    # 이미 쓰던 질의 특성 열 / 분포 통계
+    from lotto_charts import get_stats
+    from lotto_query import refresh_columns
+    refresh_columns(csv_file)
+    get_stats(csv_file)
+    return GenerationState(history['version'], inputs, time.perf_counter() - started)
+
+class Prewarmer:
+    """이력 버전별 생성 상태 (한 번만 준비, 준비 중이면 기다림)"""
+
+    def __init__(self, csv_file=TOTAL_CSV, args=None):
+        self.csv_file = csv_file
+        self.args = args
+        self.state = None
+        self._lock = threading.Lock()
+        self._pending = {}      # 버전 -> threading.Event (준비 중)
+
+    def _build(self, version):
+        try:
+            state = build_state(self.csv_file, self.args)
+            if state is not None:
+                # 한 번에 교체. 단, 늦게 끝난 이전 버전 준비가 이미 들어간 현재 버전을 덮지 않도록
+                # 이 상태가 현재 CSV 버전이거나, 들어 있는 상태도 현재 버전이 아닐 때만 교체
+                current = get_history_version(self.csv_file)
+                with self._lock:
+                    installed = self.state
+                    swap = (state.version == current or installed is None
+                            or installed.version != current)
+                    if swap:
+                        self.state = state
+                registry.observe('lotto_prewarm_seconds', state.elapsed)
+                if swap:
+                    print(f"[INFO] 생성 상태 준비 완료 ({state.elapsed:.2f}초, 이력 {state.version})")
+                else:
+                    print(f"[INFO] 이전 버전 생성 상태는 버림 (이력 {state.version})")
+            registry.inc('lotto_prewarm_total', result='ok')
+        except Exception as e:
+            registry.inc('lotto_prewarm_total', result='error')
+            print(f"[WARN] 생성 상태 준비 실패: {e}")
+        finally:
+            with self._lock:
+                event = self._pending.pop(version, None)
+            if event is not None:
+                event.set()
+
+    def _claim(self, version):
+        """(이 버전 준비를 맡았는지, 기다릴 Event)"""
+        with self._lock:
+            event = self._pending.get(version)
+            if event is not None:
+                return False, event
+            event = self._pending[version] = threading.Event()
+            return True, event
+
+    def start(self):
+        """현재 CSV 버전 준비를 백그라운드로 시작 (이미 준비됐거나 준비 중이면 그대로)"""
+        version = get_history_version(self.csv_file)
+        if self.state is not None and self.state.version == version:
+            return None
+        owner, _ = self._claim(version)
+        if not owner:
+            return None
+        thread = threading.Thread(target=self._build, args=(version,),
+                                  name='lotto-prewarm', daemon=True)
+        thread.start()
+        return thread
+
+    def get(self, timeout=None):
+        """
+        현재 CSV 버전의 생성 상태 (준비돼 있으면 바로, 준비 중이면 기다림, 없으면 여기서 준비)
+        CSV가 없으면 None
+        """
+        version = get_history_version(self.csv_file)
+        state = self.state
+        if state is not None and state.version == version:
+            registry.inc('lotto_prewarm_requests_total', result='hit')
+            return state
+        owner, event = self._claim(version)
+        if owner:
+            registry.inc('lotto_prewarm_requests_total', result='miss')
+            self._build(version)
+        else:
+            registry.inc('lotto_prewarm_requests_total', result='wait')
+            event.wait(timeout)
+        state = self.state
+        return state if state is not None and state.version == version else None
+
+    def describe(self):
+        state = self.state
+        if state is None:
+            return '준비된 생성 상태 없음'
+        current = state.version == get_history_version(self.csv_file)
+        age = time.time() - state.ready_at
+        return (f"생성 상태: {'최신' if current else '이전 버전'} "
+                f"({age:.0f}초 전 준비, {state.elapsed:.2f}초 소요)")
+
+# 봇 프로세스 공용 인스턴스
+prewarmer = Prewarmer()
@@ -0,0 +1,265 @@
+"""
+===============================================================================
+        로또6/45 당첨 확률 / 기대값 계산기 (정확한 조합 계산)
+===============================================================================
+1. 1줄 기준: 초기하 분포로 등수별 확률을 정확히 계산 (2등 = 5개 + 보너스)
+2. 15줄 세트 기준: 줄끼리 겹치는 번호까지 반영한 "세트 최고 등수" 확률
+   -> 8,145,060가지 추첨 결과 전체를 비트마스크로 열거 (세트별 1회 계산 후 캐시)
+   -> 세트당 약 1초가 걸리므로 요청 처리 중에는 cached_block_probabilities로
+      이미 계산된 값만 사용
+3. 무작위 세트 기준: 서로 다른 무작위 15줄의 최고 등수 확률 (공식으로 계산)
+4. 이항계수는 메모이제이션해서 반복 계산을 피합니다.
+5. 등수/당첨금 기준은 로또6/45 전용입니다. (다른 게임은 lotto_game의 tiers=False)
+===============================================================================
+"""
+
+import json
+import math
+import os
+import threading
+from fractions import Fraction
+from functools import lru_cache
+from statistics import NormalDist
+
+import numpy as np
+
+POOL = 45
+PICK = 6
+TICKET_PRICE = 1000
+
+TIER_NAMES = {1: '1등', 2: '2등', 3: '3등', 4: '4등', 5: '5등', 0: '낙첨'}
+
+# 등수별 평균 당첨금 (1~3등은 회차마다 달라지므로 대략적인 평균값)
+DEFAULT_PRIZES = {1: 2000000000, 2: 55000000, 3: 1500000, 4: 50000, 5: 5000, 0: 0}
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BLOCK_CACHE_FILE = os.path.join(BASE_DIR, 'lotto_probability_cache.json')
+
+# 세트별 정확 확률 캐시 (메모리 + 디스크, 최근 사용 BLOCK_CACHE_SIZE개만 유지)
+BLOCK_CACHE_SIZE = 512
+_block_cache = None
+_block_lock = threading.Lock()
+
+@lru_cache(maxsize=None)
+def binom(n, k):
+    """이항계수 (메모이제이션)"""
+    return math.comb(n, k)
+
+def get_tier(matches, bonus_hit=False):
+    """적중 개수 + 보너스 일치 여부 -> 등수 (0 = 낙첨)"""
+    if matches == 6: return 1
+    if matches == 5: return 2 if bonus_hit else 3
+    if matches == 4: return 4
+    if matches == 3: return 5
+    return 0
+
+# =========================================================
+#  1줄 기준
+# =========================================================
+
+@lru_cache(maxsize=None)
+def match_probabilities(pool=POOL, pick=PICK):
+    """1줄이 당첨번호와 m개 일치할 확률 {m: Fraction}"""
+    total = binom(pool, pick)
+    return {m: Fraction(binom(pick, m) * binom(pool - pick, pick - m), total)
+            for m in range(pick + 1)}
+
+@lru_cache(maxsize=None)
+def line_tier_probabilities(pool=POOL, pick=PICK):
+    """1줄 기준 등수별 확률 {등수: Fraction}"""
+    pm = match_probabilities(pool, pick)
+    rest = pool - pick
+    probs = {
+        1: pm[6],
+        2: pm[5] / rest,              # 빠진 1개가 보너스 번호일 확률 1/39
+        3: pm[5] * (rest - 1) / rest,
+        4: pm[4],
+        5: pm[3],
+    }
+    probs[0] = 1 - sum(probs.values())
+    return probs
+
+def expected_value(probs, prizes=DEFAULT_PRIZES):
+    """등수별 확률 -> 기대 당첨금 (원)"""
+    return sum(float(probs[t]) * prizes.get(t, 0) for t in probs)
+
+# =========================================================
+#  무작위 세트 기준 (서로 다른 n_lines줄)
+# =========================================================
+
+@lru_cache(maxsize=None)
+def _lines_by_match(pool=POOL, pick=PICK):
+    """당첨번호 1개에 대해 m개 일치하는 줄의 수"""
+    return {m: binom(pick, m) * binom(pool - pick, pick - m) for m in range(pick + 1)}
+
+@lru_cache(maxsize=None)
+def random_block_probabilities(n_lines=15, pool=POOL, pick=PICK):
+    """
+    무작위 n_lines줄 세트의 (최고 적중 개수 분포, 최고 등수 분포)
+    - 당첨번호를 고정하면 'm개 이상 일치하는 줄'의 수가 정해지므로
+      P(최고 < m) = C(전체 - 그 줄 수, n) / C(전체, n)
+    """
+    total = binom(pool, pick)
+    rest = pool - pick
+    by_match = _lines_by_match(pool, pick)
+
+    def p_none_of(bad_lines):
+        return Fraction(binom(total - bad_lines, n_lines), binom(total, n_lines))
+
+    matches = {}
+    at_least = 0
+    prev_none = Fraction(1)
+    for m in range(pick, -1, -1):
+        at_least += by_match[m]
+        none = p_none_of(at_least)
+        matches[m] = prev_none - none
+        prev_none = none
+
+    # 등수 순서대로 (1등 -> 5등) 누적 줄 수
+    tier_lines = [(1, by_match[6]), (2, pick), (3, pick * (rest - 1)),
+                  (4, by_match[4]), (5, by_match[3])]
+    tiers = {}
+    at_least = 0
+    prev_none = Fraction(1)
+    for tier, n in tier_lines:
+        at_least += n
+        none = p_none_of(at_least)
+        tiers[tier] = prev_none - none
+        prev_none = none
+    tiers[0] = prev_none
+    return ({m: float(p) for m, p in matches.items()},
+            {t: float(p) for t, p in tiers.items()})
+
+# =========================================================
+#  특정 세트 기준 (줄끼리 겹침 반영, 정확 계산)
+# =========================================================
+
+def _block_key(lines):
+    return '|'.join(' '.join(str(n) for n in sorted(l)) for l in sorted(sorted(l) for l in lines))
+
+def _load_block_cache():
+    global _block_cache
+    if _block_cache is None:
+        _block_cache = {}
+        try:
+            with open(BLOCK_CACHE_FILE, encoding='utf-8') as f:
+                _block_cache = json.load(f)
+        except Exception:
+            pass
+    return _block_cache
+
+def _save_block_cache(snapshot):
+    """임시 파일에 쓴 뒤 교체 (중간에 죽어도 기존 파일 유지, 프로세스별 임시 파일)"""
+    try:
+        tmp = f"{BLOCK_CACHE_FILE}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp, BLOCK_CACHE_FILE)
+    except Exception as e:
+        print(f"[WARN] 확률 캐시 저장 실패: {e}")
+
+def _unpack(entry):
+    return ({int(m): p for m, p in entry['matches'].items()},
+            {int(t): p for t, p in entry['tiers'].items()})
+
+def cached_block_probabilities(lines):
+    """이미 계산해 둔 세트 확률 (없으면 None, 전체 열거는 하지 않음)"""
+    key = _block_key(lines)
+    with _block_lock:
+        cache = _load_block_cache()
+        entry = cache.pop(key, None)
+        if entry is None:
+            return None
+        cache[key] = entry      # 최근 사용 순서로
+    return _unpack(entry)
+
+def compute_block_probabilities(lines):
+    """
+    세트 전체의 (최고 적중 개수 분포, 최고 등수 분포)를 정확히 계산
+    모든 추첨 결과(6개)를 열거하고, 최고 5개 일치인 경우에는
+    5개 일치 줄들의 '빠진 번호' 중 하나가 보너스일 확률(k/39)로 2등/3등을 나눕니다.
+    """
+    from lotto_combinations import get_combination_masks, to_mask
+
+    masks = get_combination_masks()
+    total = len(masks)
+    rest = POOL - PICK
+    best = np.zeros(total, dtype=np.uint8)
+    five_idx, five_miss = [], []
+    for line in lines:
+        line_mask = np.uint64(to_mask(line))
+        m = np.bitwise_count(masks & line_mask)
+        np.maximum(best, m, out=best)
+        idx = np.flatnonzero(m == 5)
+        five_idx.append(idx)
+        five_miss.append(line_mask & ~masks[idx])
+
+    match_counts = np.bincount(best, minlength=PICK + 1)
+    matches = {m: int(match_counts[m]) / total for m in range(PICK + 1)}
+
+    # 최고 5개 일치 추첨별로 보너스가 될 수 있는 번호 수 합산
+    bonus_hits = 0
+    if five_idx:
+        idx = np.concatenate(five_idx)
+        miss = np.concatenate(five_miss)
+        keep = best[idx] == 5
+        idx, miss = idx[keep], miss[keep]
+        if len(idx):
+            order = np.argsort(idx, kind='stable')
+            idx, miss = idx[order], miss[order]
+            starts = np.flatnonzero(np.r_[True, idx[1:] != idx[:-1]])
+            merged = np.bitwise_or.reduceat(miss, starts)
+            bonus_hits = int(np.bitwise_count(merged).sum())
+
+    tiers = {
+        1: matches[6],
+        2: bonus_hits / rest / total,
+        3: matches[5] - bonus_hits / rest / total,
+        4: matches[4],
+        5: matches[3],
+    }
+    tiers[0] = 1 - sum(tiers.values())
+    return matches, tiers
+
+def block_probabilities(lines):
+    """세트 확률 (캐시 사용, 처음 한 번만 전체 열거)"""
+    cached = cached_block_probabilities(lines)
+    if cached is not None:
+        return cached
+    matches, tiers = compute_block_probabilities(lines)
+    with _block_lock:
+        cache = _load_block_cache()
+        cache[_block_key(lines)] = {'matches': matches, 'tiers': tiers}
+        # 오래 쓰지 않은 세트부터 버림 (dict 순서 = 사용 순서)
+        for old in list(cache)[:max(0, len(cache) - BLOCK_CACHE_SIZE)]:
+            del cache[old]
+        snapshot = dict(cache)
+    _save_block_cache(snapshot)
+    return matches, tiers
+
+# =========================================================
+#  신뢰 구간
+# =========================================================
+
+def poisson_interval(lam, level=0.95):
+    """기대 횟수 lam일 때 관측 횟수의 (하한, 상한) 범위"""
+    if lam <= 0:
+        return 0, 0
+    alpha = (1 - level) / 2
+    if lam > 500:
+        # 큰 값은 정규 근사 (exp(-lam) 언더플로 방지)
+        z = NormalDist().inv_cdf(1 - alpha)
+        sd = math.sqrt(lam)
+        return max(0, int(lam - z * sd)), int(math.ceil(lam + z * sd))
+    k = 0
+    pmf = math.exp(-lam)
+    cdf = pmf
+    lower = None
+    while True:
+        if lower is None and cdf >= alpha:
+            lower = k
+        if cdf >= 1 - alpha:
+            return lower, k
+        k += 1
+        pmf *= lam / k
+        cdf += pmf
@@ -0,0 +1,262 @@
+"""
+===============================================================================
+        로또 봇/생성기/분석기 공용 프로파일링 (선택 기능)
+===============================================================================
+환경변수 LOTTO_PROFILE=1 일 때만 동작합니다. (꺼져 있으면 비용 거의 없음)
+1. span('이름'): 구간 시간 측정. 중첩되면 트리로 쌓이고, 같은 이름은 합산(횟수/누적)
+   -> 최상위 구간이 끝나면 실행 1회분 트리를 JSON 한 줄로 기록
+   -> 기록 파일: LOTTO_PROFILE_FILE (기본 lotto_profile.log, 5MB x 3개 순환)
+2. @profiled: 함수 전체를 span으로 감쌈 (일반 함수/async 함수 모두 가능)
+3. capture_profile('이름', mode): 명령 1회를 cProfile 또는 샘플링 방식으로 기록
+   -> LOTTO_PROFILE_DIR (기본 profiles/) 아래 .prof/.txt 저장
+   (이 기능은 LOTTO_PROFILE 설정과 상관없이 요청 시 바로 사용 가능)
+===============================================================================
+"""
+
+import contextvars
+import cProfile
+import datetime
+import functools
+import inspect
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ENABLED = os.environ.get('LOTTO_PROFILE', '').lower() not in ('', '0', 'false', 'no')
+PROFILE_FILE = os.environ.get('LOTTO_PROFILE_FILE', os.path.join(BASE_DIR, 'lotto_profile.log'))
+PROFILE_DIR = os.environ.get('LOTTO_PROFILE_DIR', os.path.join(BASE_DIR, 'profiles'))
+
+# 현재 실행 중인 구간 (asyncio 태스크/스레드별로 분리됨)
+_current_span = contextvars.ContextVar('lotto_current_span', default=None)
+
+_logger = None
+
+def _get_logger():
+    global _logger
+    if _logger is None:
+        _logger = logging.getLogger('lotto_profile')
+        _logger.setLevel(logging.INFO)
+        _logger.propagate = False
+        handler = RotatingFileHandler(PROFILE_FILE, maxBytes=5 * 1024 * 1024,
+                                      backupCount=3, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        _logger.addHandler(handler)
+    return _logger
+
+# =========================================================
+#  구간(span) 측정
+# =========================================================
+
+class SpanNode:
+    """시간 트리의 한 노드 (같은 부모 아래 같은 이름은 합산)"""
+    __slots__ = ('name', 'count', 'total', 'children')
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.children = {}
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'children': [c.to_dict() for c in self.children.values()],
+        }
+
+class _Span:
+    __slots__ = ('name', 'node', 'token', 'start', 'is_root')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.is_root = parent is None
+        if self.is_root:
+            self.node = SpanNode(self.name)
+        else:
+            self.node = parent.children.get(self.name)
+            if self.node is None:
+                self.node = parent.children[self.name] = SpanNode(self.name)
+        self.token = _current_span.set(self.node)
+        self.start = time.perf_counter()
+        return self.node
+
+    def __exit__(self, exc_type, exc, tb):
+        self.node.total += time.perf_counter() - self.start
+        self.node.count += 1
+        _current_span.reset(self.token)
+        if self.is_root:
+            _write_tree(self.node)
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def span(name):
+    """구간 시간 측정 (with span('이름'): ...)"""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name)
+
+def _write_tree(node):
+    try:
+        record = {
+            'time': datetime.datetime.now().isoformat(timespec='seconds'),
+            'pid': os.getpid(),
+            'process': os.path.basename(sys.argv[0]) if sys.argv else '',
+            'tree': node.to_dict(),
+        }
+        _get_logger().info(json.dumps(record, ensure_ascii=False))
+    except Exception:
+        pass
+
+def profiled(name=None):
+    """함수 전체를 span으로 감싸는 데코레이터 (비활성 시 원래 함수 그대로)"""
+    def decorator(func):
+        if not ENABLED:
+            return func
+        module = func.__module__
+        if module == '__main__':
+            module = os.path.splitext(os.path.basename(sys.argv[0]))[0] if sys.argv else module
+        span_name = name or f"{module}.{func.__qualname__}"
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with _Span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# =========================================================
+#  명령 1회 프로파일 캡처 (cProfile / 샘플링)
+# =========================================================
+
+# cProfile 캡처는 한 번에 하나만 (동시에 enable 하면 ValueError)
+_cprofile_lock = threading.Lock()
+
+class ProfilerBusy(RuntimeError):
+    """이미 다른 cProfile 캡처가 진행 중"""
+
+class SamplingProfiler:
+    """대상 스레드의 호출 스택을 주기적으로 수집 (collapsed stack 형식)"""
+
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='lotto-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def summary(self, top=20):
+        """가장 많이 잡힌 함수(스택 맨 끝) 순위"""
+        leaf = Counter()
+        for stack, cnt in self.samples.items():
+            leaf[stack.rsplit(';', 1)[-1]] += cnt
+        total = sum(leaf.values()) or 1
+        lines = [f"샘플 {total}개 (간격 {self.interval * 1000:.0f}ms)"]
+        for func, cnt in leaf.most_common(top):
+            lines.append(f"{cnt / total * 100:5.1f}%  {func}")
+        return '\n'.join(lines)
+
+@contextmanager
+def capture_profile(name, mode='cprofile', top=25):
+    """
+    with capture_profile('!update') as result: ...
+    종료 후 result['path'] (저장 파일), result['summary'] (요약 텍스트)가 채워집니다.
+    asyncio 안에서 쓰면 같은 스레드에서 함께 돈 다른 작업도 포함됩니다.
+    """
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    safe_name = re.sub(r'[^0-9A-Za-z_-]+', '_', name).strip('_') or 'profile'
+    base = os.path.join(PROFILE_DIR, f"{safe_name}_{stamp}")
+    result = {'name': name, 'mode': mode}
+
+    if mode == 'sample':
+        profiler = SamplingProfiler()
+        profiler.start()
+        start = time.perf_counter()
+        try:
+            yield result
+        finally:
+            profiler.stop()
+            result['elapsed'] = time.perf_counter() - start
+            result['path'] = base + '.folded'
+            with open(result['path'], 'w', encoding='utf-8') as f:
+                for stack, cnt in profiler.samples.most_common():
+                    f.write(f"{stack} {cnt}\n")
+            result['summary'] = profiler.summary(top)
+    else:
+        # cProfile은 프로세스에 하나만 켤 수 있음 -> 이미 켜져 있으면 ProfilerBusy
+        if not _cprofile_lock.acquire(blocking=False):
+            raise ProfilerBusy('이미 프로파일링 중입니다.')
+        try:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError as e:
+                # 다른 도구가 프로파일러를 켜 둔 경우
+                raise ProfilerBusy(f'이미 프로파일링 중입니다: {e}') from e
+            start = time.perf_counter()
+            try:
+                yield result
+            finally:
+                profiler.disable()
+                result['elapsed'] = time.perf_counter() - start
+                result['path'] = base + '.prof'
+                profiler.dump_stats(result['path'])
+                out = io.StringIO()
+                stats = pstats.Stats(profiler, stream=out)
+                stats.sort_stats('cumulative').print_stats(top)
+                result['summary'] = out.getvalue()
+                with open(base + '.txt', 'w', encoding='utf-8') as f:
+                    f.write(result['summary'])
+        finally:
+            _cprofile_lock.release()
@@ -0,0 +1,481 @@
+"""
+===============================================================================
+        조건식 질의 (전체 8,145,060개 조합 + 역대 당첨번호)
+===============================================================================
+1. "120 <= sum <= 180 and odd == 3 and prime == 2" 같은 조건식을 받아
+   - 전체 조합 중 몇 개가 만족하는지 (비율)
+   - 역대 당첨번호 중 몇 회가 만족하는지 + 무작위라면 기대되는 횟수(95% 범위)
+   를 계산합니다. -> check_pattern_quality 기준값(합계/분산 구간 등) 조정용
+2. 조합별 특성 열(sum, odd, 구간별 개수, var, run ...)은 numpy 배열로
+   처음 쓰일 때 한 번만 계산해 두고 재사용합니다.
+   (소수 등 분류 개수는 lotto_rules 규칙 digest별, 빈출/저빈출 개수는 이력 버전별)
+3. 조건식은 파이썬 문법의 일부만 허용합니다. (ast로 검사, eval 사용 안 함)
+   - 비교: < <= > >= == != (연쇄 가능: 120 <= sum <= 180), in (2, 3)
+   - 논리: and / or / not, 산술: + - * // % (숫자는 절댓값 MAX_CONSTANT 이하)
+     정수 열은 int64로 계산하고, 결과가 MAX_VALUE를 넘을 수 있는 산술은 거부
+   - 함수: has(7, 13) 모두 포함, count(1, 2, 3) 포함 개수
+   - '='는 '=='로 취급
+4. 실행 중인 게임(lotto_game)의 전체 조합을 쓰므로 조합 수가 너무 큰 게임
+   (예: Powerball)에서는 사용할 수 없습니다. low/mid/high는 게임의 구간 배치 기준
+5. rules_mask(): 필터 규칙(lotto_rules)을 만족하는 조합 표시
+   -> 열거형 샘플러(lotto_sampler)가 같은 특성 열 캐시를 그대로 사용
+   -> 규칙 항목별 마스크(rule_mask)로 나눠 캐시하므로 일부 항목만 다른 규칙 변형
+      (lotto_strategies)은 바뀐 항목만 새로 계산
+===============================================================================
+"""
+
+import argparse
+import ast
+import re
+
+import numpy as np
+
+from lotto_combinations import get_all_combinations, get_combination_masks, to_mask
+from lotto_game import GAME
+from lotto_history import TOTAL_CSV, load_history
+from lotto_memory import BudgetCache
+from lotto_probability import poisson_interval
+from lotto_profiler import profiled
+from lotto_rules import get_rules
+
+MAX_EXPRESSION_LENGTH = 300
+# 조건식에 쓸 수 있는 숫자 크기 (특성 값은 모두 수천 이하, 계산 중 넘침 방지)
+MAX_CONSTANT = 10 ** 6
+# 산술 중간값 한도 (int64 넘침 전에 거부, 넘친 값으로 잘못된 결과를 내지 않도록)
+MAX_VALUE = 2 ** 62
+
+class QueryError(ValueError):
+    pass
+
+# =========================================================
+#  특성 열 (조합 배열 (N, 6), 행마다 오름차순 정렬)
+# =========================================================
+
+def _count_in(combos, numbers):
+    table = np.zeros(GAME.pool + 1, dtype=bool)
+    table[list(numbers)] = True
+    counts = np.zeros(len(combos), dtype=np.int8)
+    for j in range(combos.shape[1]):
+        counts += table[combos[:, j]]
+    return counts
+
+def _sum(combos):
+    return combos.sum(axis=1, dtype=np.int16)
+
+def _variance(combos):
+    """표본 분산 (statistics.variance와 동일, n-1로 나눔)"""
+    total = np.zeros(len(combos), dtype=np.int32)
+    squares = np.zeros(len(combos), dtype=np.int32)
+    for j in range(combos.shape[1]):
+        column = combos[:, j].astype(np.int32)
+        total += column
+        squares += column * column
+    n = combos.shape[1]
+    return ((n * squares - total * total) / (n * (n - 1))).astype(np.float32)
+
+def _max_run(combos):
+    """최대 연속 번호 길이 (1 = 연속 없음)"""
+    run = np.ones(len(combos), dtype=np.int8)
+    best = run.copy()
+    for j in range(1, combos.shape[1]):
+        step = combos[:, j] - combos[:, j - 1] == 1
+        run = np.where(step, run + 1, 1).astype(np.int8)
+        np.maximum(best, run, out=best)
+    return best
+
+def _class_count(name):
+    return lambda c, space: _count_in(c, space.rules.class_numbers(name))
+
+def _frequency_count(kind):
+    return lambda c, space: _count_in(c, space.rules.frequency(space.filename)[kind])
+
+# 이름 -> (설명, 계산 함수(조합 배열, 공간), 의존하는 규칙 항목, 이력 의존 여부)
+# 캐시 키에 의존 항목의 digest / 이력 버전이 들어가므로 바뀐 규칙에 걸린 열만 다시 계산
+FEATURE_SPECS = {
+    'sum': ('번호 합계', lambda c, space: _sum(c), (), False),
+    'odd': ('홀수 개수', lambda c, space: _count_in(c, range(1, GAME.pool + 1, 2)), (), False),
+    'even': ('짝수 개수', lambda c, space: _count_in(c, range(2, GAME.pool + 1, 2)), (), False),
+    'low': ('{0}~{1} 개수'.format(*GAME.zones[0]),
+            lambda c, space: _count_in(c, range(GAME.zones[0][0], GAME.zones[0][1] + 1)), (), False),
+    'mid': ('{0}~{1} 개수'.format(*GAME.zones[1]),
+            lambda c, space: _count_in(c, range(GAME.zones[1][0], GAME.zones[1][1] + 1)), (), False),
+    'high': ('{0}~{1} 개수'.format(*GAME.zones[-1]),
+             lambda c, space: _count_in(c, range(GAME.zones[-1][0], GAME.zones[-1][1] + 1)), (), False),
+    'prime': ('소수 개수 (규칙 classes.prime)', _class_count('prime'), ('classes',), False),
+    'fib': ('피보나치 수 개수 (규칙 classes.fibonacci)', _class_count('fibonacci'), ('classes',), False),
+    'tri': ('삼각수 개수 (규칙 classes.triangular)', _class_count('triangular'), ('classes',), False),
+    'pronic': ('직사각수 개수 (규칙 classes.pronic)', _class_count('pronic'), ('classes',), False),
+    'run': ('최대 연속 길이', lambda c, space: _max_run(c), (), False),
+    'var': ('표본 분산', lambda c, space: _variance(c), (), False),
+    'span': ('최대 - 최소', lambda c, space: (c[:, -1] - c[:, 0]).astype(np.int8), (), False),
+    'min': ('가장 작은 번호', lambda c, space: c[:, 0].copy(), (), False),
+    'max': ('가장 큰 번호', lambda c, space: c[:, -1].copy(), (), False),
+    'top': ('역대 빈출 Top N 개수 (규칙 frequent.top_n)', _frequency_count('top'), ('frequent',), True),
+    'cold': ('역대 저빈출 Bottom N 개수 (규칙 cold.bottom_n)', _frequency_count('cold'), ('cold',), True),
+}
+
+def get_feature_names():
+    return {name: spec[0] for name, spec in FEATURE_SPECS.items()}
+
+# 전체 조합 특성 열 캐시 ((이름, 규칙 digest, 이력 버전) -> 배열, 메모리 예산 LRU)
+_column_cache = BudgetCache('query_columns')
+
+class _Space:
+    """조건식을 계산할 조합 집합 (전체 조합 또는 역대 당첨번호)"""
+
+    def __init__(self, combos, filename, version, rules, cache=None, masks=None):
+        self.combos = combos
+        self.filename = filename
+        self.version = version
+        self.rules = rules
+        self.cache = cache if cache is not None else {}
+        self._masks = masks
+
+    def __len__(self):
+        return len(self.combos)
+
+    def masks(self):
+        if self._masks is None:
+            masks = np.zeros(len(self.combos), dtype=np.uint64)
+            for j in range(self.combos.shape[1]):
+                masks |= np.left_shift(np.uint64(1), (self.combos[:, j] - 1).astype(np.uint64))
+            self._masks = masks
+        return self._masks
+
+    def column(self, name):
+        if name not in FEATURE_SPECS:
+            raise QueryError(f'알 수 없는 이름: {name}')
+        _, build, sections, uses_history = FEATURE_SPECS[name]
+        key = (name, self.rules.digest(*sections), self.version if uses_history else None)
+        column = self.cache.get(key)
+        if column is None:
+            column = build(self.combos, self)
+            # 새 열을 다 만든 뒤 같은 이름의 이전 규칙/이력 버전 열을 버림
+            for old in [k for k in self.cache if k[0] == name]:
+                self.cache.pop(old, None)
+            self.cache[key] = column
+        return column
+
+def _all_space(filename, version, rules):
+    return _Space(get_all_combinations(), filename, version, rules, _column_cache,
+                  get_combination_masks())
+
+def _history_space(history, filename, rules):
+    return _Space(history['numbers'], filename, history['version'], rules)
+
+@profiled()
+def refresh_columns(filename=TOTAL_CSV):
+    """
+    이미 만들어 둔 이력 의존 열(빈출/저빈출 개수)을 현재 이력 버전으로 다시 계산
+    새 회차 반영 직후 미리 실행해 두면 다음 질의/열거형 샘플러는 캐시를 그대로 사용
+    """
+    if not GAME.enumerable or not _column_cache:
+        return []
+    names = {key[0] for key in _column_cache if FEATURE_SPECS[key[0]][3]}
+    space = _all_space(filename, load_history(filename)['version'], get_rules())
+    for name in sorted(names):
+        space.column(name)
+    return sorted(names)
+
+# =========================================================
+#  조건식 해석 / 계산
+# =========================================================
+
+_COMPARE = {ast.Lt: np.less, ast.LtE: np.less_equal, ast.Gt: np.greater,
+            ast.GtE: np.greater_equal, ast.Eq: np.equal, ast.NotEq: np.not_equal}
+_ARITH = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply,
+          ast.FloorDiv: np.floor_divide, ast.Mod: np.mod}
+_FUNCTIONS = ('has', 'count')
+
+def _is_number(node):
+    """in 목록 항목: 숫자 상수 (음수 포함)"""
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        node = node.operand
+    return isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) \
+        and not isinstance(node.value, bool)
+
+def parse_query(expression):
+    """조건식 문자열 -> 검사된 ast (허용하지 않는 문법이면 QueryError)"""
+    expression = (expression or '').strip()
+    if not expression:
+        raise QueryError('조건식이 비어 있습니다.')
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise QueryError(f'조건식이 너무 깁니다 (최대 {MAX_EXPRESSION_LENGTH}자).')
+    expression = re.sub(r'(?<![<>=!])=(?!=)', '==', expression)
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError as e:
+        raise QueryError(f'조건식 문법 오류: {e.msg}')
+    names = get_feature_names()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            if node.id not in names and node.id not in _FUNCTIONS:
+                raise QueryError(f'알 수 없는 이름: {node.id}')
+        elif isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS or node.keywords:
+                raise QueryError('사용할 수 있는 함수는 has(...), count(...) 뿐입니다.')
+            for arg in node.args:
+                if not (isinstance(arg, ast.Constant) and isinstance(arg.value, int)
+                        and 1 <= arg.value <= GAME.pool):
+                    raise QueryError(f'has/count에는 1~{GAME.pool} 번호만 넣을 수 있습니다.')
+        elif isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise QueryError(f'숫자만 사용할 수 있습니다: {node.value!r}')
+            if not abs(node.value) <= MAX_CONSTANT:
+                raise QueryError(f'숫자가 너무 큽니다 (최대 {MAX_CONSTANT:,}): {node.value!r}')
+        elif isinstance(node, ast.Compare):
+            for op, right in zip(node.ops, node.comparators):
+                if isinstance(op, (ast.In, ast.NotIn)):
+                    if not (isinstance(right, (ast.Tuple, ast.List, ast.Set))
+                            and all(_is_number(elt) for elt in right.elts)):
+                        raise QueryError("in 뒤에는 (2, 3, 4) 같은 숫자 목록이 와야 합니다.")
+                elif type(op) not in _COMPARE:
+                    raise QueryError('지원하지 않는 비교 연산입니다.')
+        elif isinstance(node, ast.BinOp):
+            if type(node.op) not in _ARITH:
+                raise QueryError('지원하지 않는 산술 연산입니다.')
+        elif isinstance(node, ast.UnaryOp):
+            if not isinstance(node.op, (ast.Not, ast.USub)):
+                raise QueryError('지원하지 않는 연산입니다.')
+        elif not isinstance(node, (ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.Load,
+                                   ast.Tuple, ast.List, ast.Set, ast.cmpop, ast.operator,
+                                   ast.unaryop)):
+            raise QueryError(f'지원하지 않는 문법: {type(node).__name__}')
+    return tree
+
+def _as_mask(value, space):
+    if isinstance(value, np.ndarray):
+        if value.dtype != bool:
+            raise QueryError('조건식의 결과가 참/거짓이 아닙니다 (비교식이 필요합니다).')
+        return value
+    if isinstance(value, (bool, np.bool_)):
+        return np.full(len(space), bool(value))
+    raise QueryError('조건식의 결과가 참/거짓이 아닙니다 (비교식이 필요합니다).')
+
+def _int64(value):
+    return value.astype(np.int64) if isinstance(value, np.ndarray) and value.dtype.kind in 'iub' else value
+
+def _magnitude(value):
+    """값(열 또는 숫자)의 절댓값 최대 (파이썬 수, 넘침 없이 비교용)"""
+    if isinstance(value, np.ndarray):
+        if not len(value):
+            return 0
+        return max(abs(int(value.max())), abs(int(value.min()))) if value.dtype.kind in 'iub' \
+            else float(np.abs(value).max())
+    return abs(value)
+
+def _check_range(op, left, right):
+    """+ - * 결과가 MAX_VALUE를 넘을 수 있으면 QueryError"""
+    a, b = _magnitude(left), _magnitude(right)
+    bound = a * b if op is ast.Mult else a + b if op in (ast.Add, ast.Sub) else max(a, b)
+    if bound > MAX_VALUE:
+        raise QueryError('계산 값이 너무 커집니다. 곱셈/덧셈 횟수를 줄여 주세요.')
+
+def _evaluate(node, space):
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body, space)
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.Name):
+        return space.column(node.id)
+    if isinstance(node, ast.BoolOp):
+        result = _as_mask(_evaluate(node.values[0], space), space)
+        for value in node.values[1:]:
+            other = _as_mask(_evaluate(value, space), space)
+            result = result & other if isinstance(node.op, ast.And) else result | other
+        return result
+    if isinstance(node, ast.UnaryOp):
+        value = _evaluate(node.operand, space)
+        if isinstance(node.op, ast.Not):
+            return ~_as_mask(value, space)
+        return -_int64(value)
+    if isinstance(node, ast.BinOp):
+        # int8/int32 열끼리 계산 시 넘침 방지 (int64로 올리고, 그래도 넘칠 수 있으면 거부)
+        left, right = _int64(_evaluate(node.left, space)), _int64(_evaluate(node.right, space))
+        _check_range(type(node.op), left, right)
+        return _ARITH[type(node.op)](left, right)
+    if isinstance(node, ast.Compare):
+        result = None
+        left = _evaluate(node.left, space)
+        for op, comparator in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                values = [_evaluate(elt, space) for elt in comparator.elts]
+                part = np.isin(left, values)
+                if isinstance(op, ast.NotIn):
+                    part = ~part
+                right = None
+            else:
+                right = _evaluate(comparator, space)
+                part = _COMPARE[type(op)](left, right)
+            result = part if result is None else result & part
+            left = right
+        return result
+    if isinstance(node, ast.Call):
+        numbers = [arg.value for arg in node.args]
+        if node.func.id == 'has':
+            mask = np.uint64(to_mask(numbers))
+            return (space.masks() & mask) == mask
+        return _count_in(space.combos, numbers)
+    raise QueryError(f'지원하지 않는 문법: {type(node).__name__}')
+
+@profiled()
+def query(expression, filename=TOTAL_CSV, recent=5):
+    """
+    조건식 -> 결과 dict
+    {'expression', 'combinations', 'total_combinations', 'ratio',
+     'history', 'history_total', 'expected_history', 'expected_low', 'expected_high',
+     'recent': [(회차, 번호 목록), ...] 최근 만족 회차}
+    """
+    if not GAME.enumerable:
+        raise QueryError(f'{GAME.title}: 조합 수가 너무 커서 조건식 질의를 사용할 수 없습니다.')
+    tree = parse_query(expression)
+    history = load_history(filename)
+    rules = get_rules()
+    all_space = _all_space(filename, history['version'], rules)
+    history_space = _history_space(history, filename, rules)
+    try:
+        with np.errstate(all='ignore'):
+            all_mask = _as_mask(_evaluate(tree, all_space), all_space)
+            history_mask = _as_mask(_evaluate(tree, history_space), history_space)
+    except QueryError:
+        raise
+    except (ArithmeticError, ValueError, TypeError) as e:
+        raise QueryError(f'조건식을 계산할 수 없습니다: {e}') from e
+
+    matched = int(all_mask.sum())
+    ratio = matched / len(all_space)
+    expected = len(history_space) * ratio
+    low, high = poisson_interval(expected)
+    hits = np.flatnonzero(history_mask)
+    return {
+        'expression': ast.unparse(tree),
+        'combinations': matched,
+        'total_combinations': len(all_space),
+        'ratio': ratio,
+        'history': int(len(hits)),
+        'history_total': len(history_space),
+        'expected_history': expected,
+        'expected_low': low,
+        'expected_high': high,
+        'recent': [(int(history['rounds'][i]), history['numbers'][i].tolist())
+                   for i in hits[-recent:][::-1]] if recent else [],
+    }
+
+# =========================================================
+#  필터 규칙 항목별 조합 마스크 (check_pattern_quality의 1~9번)
+# =========================================================
+
+def _ranges_mask(space):
+    rules = space.rules
+    mask = np.ones(len(space), dtype=bool)
+    for start, end in rules.ranges:
+        count = _count_in(space.combos, range(start, end + 1))
+        mask &= (rules.range_min <= count) & (count <= rules.range_max)
+    return mask
+
+def _between(column, low, high):
+    return (low <= column) & (column <= high)
+
+def _variance_mask(space):
+    # 분산은 정수 분자로 비교 (경계값에서 check_pattern_quality와 같은 결과)
+    rules, combos = space.rules, space.combos
+    n = combos.shape[1]
+    if n < 2:
+        return np.ones(len(space), dtype=bool)
+    squares = np.zeros(len(space), dtype=np.int64)
+    for j in range(n):
+        column = combos[:, j].astype(np.int64)
+        squares += column * column
+    numerator = n * squares - space.column('sum').astype(np.int64) ** 2
+    return _between(numerator, rules.var_min * n * (n - 1), rules.var_max * n * (n - 1))
+
+def _classes_mask(space):
+    mask = np.ones(len(space), dtype=bool)
+    for numbers, low, high in space.rules.classes.values():
+        mask &= _between(_count_in(space.combos, numbers), low, high)
+    return mask
+
+# 이름 -> (만드는 함수, 의존하는 규칙 항목, 이력 버전 의존 여부)
+RULE_MASKS = {
+    'ranges': (_ranges_mask, ('ranges', 'range_count'), False),
+    'odd': (lambda s: _between(s.column('odd'), s.rules.odd_min, s.rules.odd_max), ('odd_count',), False),
+    'run': (lambda s: s.column('run') <= s.rules.max_run, ('max_run',), False),
+    'sum': (lambda s: _between(s.column('sum'), s.rules.sum_min, s.rules.sum_max), ('sum',), False),
+    'variance': (_variance_mask, ('variance',), False),
+    'frequent': (lambda s: s.column('top') >= s.rules.frequent_min, ('frequent',), True),
+    'cold': (lambda s: s.column('cold') == 0, ('cold',), True),
+    'classes': (_classes_mask, ('classes',), False),
+}
+
+# 항목별 마스크 캐시 ((이름, 항목 digest, 이력 버전) -> bool 배열, 메모리 예산 LRU)
+# -> 규칙 변형(lotto_strategies)끼리 같은 항목 값이면 한 번만 계산
+_mask_cache = BudgetCache('rule_masks')
+
+def rule_mask(name, filename=TOTAL_CSV, rules=None):
+    """규칙 항목 1개를 만족하는 전체 조합 (bool 배열, 같은 항목 값이면 캐시)"""
+    rules = rules or get_rules()
+    build, sections, uses_history = RULE_MASKS[name]
+    version = load_history(filename)['version']
+    key = (name, rules.digest(*sections), version if uses_history else None)
+    mask = _mask_cache.get(key)
+    if mask is None:
+        mask = build(_all_space(filename, version, rules))
+        if uses_history:
+            # 같은 항목의 이전 이력 버전 마스크는 버림
+            for old in [k for k in _mask_cache if k[0] == name and k[2] != version]:
+                _mask_cache.pop(old)
+        _mask_cache.put(key, mask)
+    return mask
+
+@profiled()
+def rules_mask(filename=TOTAL_CSV, rules=None):
+    """
+    전체 조합 중 필터 규칙을 만족하는 조합 (bool 배열, check_pattern_quality의 1~9번)
+    항목별 마스크(rule_mask)의 AND, 최근 패턴 유사성 / Top5 강제 번호 / 중복 제외는
+    생성 단계에서 따로 확인합니다.
+    """
+    rules = rules or get_rules()
+    mask = None
+    for name in RULE_MASKS:
+        part = rule_mask(name, filename, rules)
+        mask = part.copy() if mask is None else np.logical_and(mask, part, out=mask)
+    return mask
+
+def render_query_result(result):
+    lines = [f"🔎 조건: {result['expression']}",
+             f"전체 조합: {result['combinations']:,} / {result['total_combinations']:,} "
+             f"({result['ratio'] * 100:.3f}%)",
+             f"역대 당첨: {result['history']} / {result['history_total']}회 "
+             f"(무작위 기대 {result['expected_history']:.1f}회, "
+             f"95% 범위 {result['expected_low']}~{result['expected_high']})"]
+    if result['recent']:
+        lines.append("최근 만족 회차:")
+        for round_no, numbers in result['recent']:
+            lines.append(f"  {round_no}회: {' '.join(map(str, numbers))}")
+    return '\n'.join(lines)
+
+def render_query_help():
+    names = get_feature_names()
+    lines = ["사용법: !query <조건식>",
+             "예: !query 120 <= sum <= 180 and odd == 3 and prime == 2",
+             "    !query has(7, 13) and run >= 3",
+             "비교 < <= > >= == != in (..), 논리 and/or/not, 산술 + - * // %",
+             "함수: has(번호...) 모두 포함, count(번호...) 포함 개수",
+             "이름:"]
+    lines.extend(f"  {name:<7}{desc}" for name, desc in names.items())
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='조건식 질의 (전체 조합 + 역대 당첨번호)')
+    parser.add_argument('expression', nargs='?', help='예: "120 <= sum <= 180 and odd == 3"')
+    args = parser.parse_args(argv)
+    if not args.expression:
+        print(render_query_help())
+        return
+    try:
+        print(render_query_result(query(args.expression)))
+    except QueryError as e:
+        print(f"[ERROR] {e}")
+
+if __name__ == '__main__':
+    main()
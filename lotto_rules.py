@@ -0,0 +1,275 @@
+"""
+===============================================================================
+        필터 규칙 설정 (lotto_rules.json -> 번호별 표/비트마스크로 컴파일)
+===============================================================================
+1. check_pattern_quality / 구성형 샘플러 / 조건식 질의의 기준값을
+   코드 대신 lotto_rules.json에서 읽습니다. (없는 항목은 DEFAULT_RULES 값)
+   - .yaml/.yml 파일도 지정 가능 (PyYAML 설치 시)
+2. 읽을 때 한 번 컴파일: 구간/홀수/소수 등 번호 분류는 비트마스크로,
+   빈출 Top N / 저빈출 Bottom N은 이력 버전별 비트마스크로 만들어 둡니다.
+   -> 티켓 검사는 (티켓 마스크 & 분류 마스크).bit_count() 비교만 수행
+3. 핫 리로드: get_rules()가 파일의 수정시각/크기를 확인해 바뀐 경우에만 다시 컴파일
+   - 봇을 재시작하지 않아도 다음 생성/질의부터 새 규칙 적용
+   - 파일이 잘못되면 경고 후 이전 규칙 유지
+4. 규칙 항목(section)별 digest -> 각 캐시는 자신이 쓰는 항목의 digest를 키에 넣어
+   바뀐 항목에 의존하는 캐시만 다시 만들어집니다.
+   (예: sum만 바꾸면 질의의 prime 열은 그대로, 샘플러 가능성 표만 다시 계산)
+5. 게임별 규칙 (lotto_game): 로또6/45가 아닌 게임은 <게임>_rules.json을 읽고,
+   기본값은 default_rules(game)이 번호 범위/개수에 맞춰 만듭니다.
+   (합계/분산 구간은 무작위 티켓 분포의 가운데 구간)
+===============================================================================
+"""
+
+import copy
+import hashlib
+import json
+import os
+import random
+from functools import lru_cache
+
+from lotto_game import DEFAULT_GAME, GAME
+from lotto_history import get_history_version
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RULES_FILE = os.environ.get('LOTTO_RULES_FILE', os.path.join(BASE_DIR, GAME.rules_file))
+
+DEFAULT_RULES = {
+    'top5': [1, 3, 7, 12, 13],
+    'ranges': [[1, 15], [16, 30], [31, 45]],
+    'range_count': {'min': 1, 'max': 4},
+    'odd_count': {'min': 1, 'max': 5},
+    'max_run': 3,
+    'sum': {'min': 120, 'max': 180},
+    'variance': {'min': 80, 'max': 250},
+    'frequent': {'top_n': 15, 'min': 2},
+    'cold': {'bottom_n': 5},
+    'classes': {
+        'prime': {'numbers': [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43], 'min': 1, 'max': 4},
+        'fibonacci': {'numbers': [1, 2, 3, 5, 8, 13, 21, 34], 'min': 0, 'max': 2},
+        'triangular': {'numbers': [1, 3, 6, 10, 15, 21, 28, 36, 45], 'min': 0, 'max': 2},
+        'pronic': {'numbers': [2, 6, 12, 20, 30, 42], 'min': 0, 'max': 2},
+    },
+}
+
+SECTIONS = tuple(DEFAULT_RULES)
+
+def _class_numbers(pool):
+    """1~pool 안의 소수/피보나치/삼각수/프로닉 수"""
+    primes = [n for n in range(2, pool + 1) if all(n % d for d in range(2, int(n ** 0.5) + 1))]
+    fibonacci, a, b = [], 1, 2
+    while a <= pool:
+        fibonacci.append(a)
+        a, b = b, a + b
+    triangular = [k * (k + 1) // 2 for k in range(1, pool + 1) if k * (k + 1) // 2 <= pool]
+    pronic = [k * (k + 1) for k in range(1, pool + 1) if k * (k + 1) <= pool]
+    return {'prime': primes, 'fibonacci': fibonacci, 'triangular': triangular, 'pronic': pronic}
+
+@lru_cache(maxsize=None)
+def _default_rules_json(game):
+    """다른 게임의 기본 규칙 (로또6/45 기준값을 번호 범위/개수에 맞춰 옮김)"""
+    pick, pool = game.pick, game.pool
+    # 합계/분산: 무작위 티켓 분포의 가운데 구간 (고정 시드 -> 항상 같은 값)
+    rng = random.Random(0)
+    sums, variances = [], []
+    for _ in range(20000):
+        nums = game.sample(rng)
+        total = sum(nums)
+        sums.append(total)
+        variances.append((pick * sum(x * x for x in nums) - total * total) / (pick * (pick - 1)))
+    sums.sort()
+    variances.sort()
+
+    def band(values, low, high):
+        return {'min': round(values[int(len(values) * low)], 1),
+                'max': round(values[int(len(values) * high)], 1)}
+
+    classes = {name: {'numbers': numbers, 'min': 0, 'max': 2}
+               for name, numbers in _class_numbers(pool).items()}
+    classes['prime'].update(min=1, max=max(1, pick - 2))
+    rules = {
+        'top5': [],
+        'ranges': [list(zone) for zone in game.zones],
+        'range_count': {'min': 1 if pick >= len(game.zones) else 0, 'max': max(1, pick - 2)},
+        'odd_count': {'min': 1, 'max': pick - 1},
+        'max_run': 3,
+        'sum': band(sums, 0.18, 0.82),
+        'variance': band(variances, 0.1, 0.9),
+        'frequent': {'top_n': pool // 3, 'min': max(1, pick // 3)},
+        'cold': {'bottom_n': pool // 9},
+        'classes': classes,
+    }
+    return json.dumps(rules)
+
+def default_rules(game=GAME):
+    """게임의 기본 규칙 (로또6/45 = DEFAULT_RULES)"""
+    if game.name == DEFAULT_GAME:
+        return copy.deepcopy(DEFAULT_RULES)
+    return json.loads(_default_rules_json(game))
+
+def to_mask(nums):
+    mask = 0
+    for n in nums:
+        mask |= 1 << (n - 1)
+    return mask
+
+def _merge(base, override):
+    """기본값 위에 설정 파일 값을 덮어씀 (dict는 항목별로)"""
+    merged = copy.deepcopy(base)
+    for key, value in (override or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+def _numbers(value, name):
+    if not isinstance(value, list) or not all(isinstance(n, int) and 1 <= n <= GAME.pool for n in value):
+        raise ValueError(f'{name}: 1~{GAME.pool} 번호 목록이어야 합니다.')
+    return sorted(set(value))
+
+def _bounds(section, name, low=0, high=None):
+    lo, hi = section.get('min', low), section.get('max', high)
+    if not isinstance(lo, (int, float)) or not isinstance(hi, (int, float)) or lo > hi:
+        raise ValueError(f'{name}: min/max가 잘못되었습니다 ({lo}, {hi})')
+    return lo, hi
+
+class CompiledRules:
+    """검증 + 컴파일된 규칙 (읽기 전용으로 공유)"""
+
+    def __init__(self, raw):
+        unknown = set(raw) - set(SECTIONS)
+        if unknown:
+            raise ValueError(f'알 수 없는 규칙 항목: {", ".join(sorted(unknown))}')
+        self.raw = raw
+        _numbers(raw['top5'], 'top5')
+        self.top5 = list(raw['top5'])
+
+        pool, pick = GAME.pool, GAME.pick
+        self.ranges = []
+        for item in raw['ranges']:
+            if not (isinstance(item, list) and len(item) == 2 and 1 <= item[0] <= item[1] <= pool):
+                raise ValueError(f'ranges: [시작, 끝] 목록이어야 합니다: {item}')
+            if item[0] != (self.ranges[-1][1] + 1 if self.ranges else 1):
+                raise ValueError('ranges: 1번부터 빈틈/겹침 없이 순서대로 이어져야 합니다.')
+            self.ranges.append((item[0], item[1]))
+        if not self.ranges or self.ranges[-1][1] != pool:
+            raise ValueError(f'ranges: 마지막 구간은 {pool}번에서 끝나야 합니다.')
+        self.range_min, self.range_max = _bounds(raw['range_count'], 'range_count', 0, pick)
+        self.odd_min, self.odd_max = _bounds(raw['odd_count'], 'odd_count', 0, pick)
+        if not isinstance(raw['max_run'], int) or raw['max_run'] < 1:
+            raise ValueError('max_run: 1 이상의 정수여야 합니다.')
+        self.max_run = raw['max_run']
+        self.sum_min, self.sum_max = _bounds(raw['sum'], 'sum', 0, pool * pick)
+        self.var_min, self.var_max = _bounds(raw['variance'], 'variance', 0, 1000)
+        self.top_n = int(raw['frequent'].get('top_n', 15))
+        self.frequent_min = int(raw['frequent'].get('min', 0))
+        self.cold_n = int(raw['cold'].get('bottom_n', 0))
+        if not (0 <= self.top_n <= pool and 0 <= self.cold_n <= pool):
+            raise ValueError(f'frequent.top_n / cold.bottom_n: 0~{pool} 범위여야 합니다.')
+
+        self.classes = {}
+        for name, spec in raw['classes'].items():
+            numbers = _numbers(spec.get('numbers'), f'classes.{name}')
+            lo, hi = _bounds(spec, f'classes.{name}', 0, pick)
+            self.classes[name] = (numbers, lo, hi)
+
+        # 번호 분류 -> 비트마스크 / 번호별 구간 표
+        self.range_masks = [to_mask(range(start, end + 1)) for start, end in self.ranges]
+        self.range_index = [-1] * (pool + 1)
+        for i, (start, end) in enumerate(self.ranges):
+            for n in range(start, end + 1):
+                self.range_index[n] = i
+        self.odd_mask = to_mask(range(1, pool + 1, 2))
+        self.class_masks = {name: to_mask(numbers) for name, (numbers, _, _) in self.classes.items()}
+        self.class_checks = [(self.class_masks[name], lo, hi) for name, (_, lo, hi) in self.classes.items()]
+
+        self.digests = {section: hashlib.sha1(json.dumps(raw[section], sort_keys=True).encode()).hexdigest()[:12]
+                        for section in SECTIONS}
+        self._frequency_cache = {}
+
+    def digest(self, *sections):
+        """지정한 항목들의 digest (캐시 키용)"""
+        return '-'.join(self.digests[s] for s in sections)
+
+    def class_numbers(self, name):
+        return self.classes[name][0] if name in self.classes else []
+
+    def odd_ok(self, nums):
+        return self.odd_min <= sum(1 for n in nums if n % 2) <= self.odd_max
+
+    def frequency(self, csv_filename):
+        """
+        빈출 Top N / 저빈출 Bottom N (이력 버전별 1회 계산)
+        -> {'top': [...], 'cold': [...], 'top_mask', 'cold_mask'}
+        """
+        key = get_history_version(csv_filename)
+        cached = self._frequency_cache.get(key)
+        if cached is None:
+            from lotto_generator import get_frequent_numbers_all_time
+            ranked = get_frequent_numbers_all_time(csv_filename, top_n=GAME.pool)
+            top = ranked[:self.top_n]
+            cold = ranked[len(ranked) - self.cold_n:] if self.cold_n else []
+            cached = {'top': top, 'cold': cold, 'top_mask': to_mask(top), 'cold_mask': to_mask(cold)}
+            self._frequency_cache = {key: cached}
+        return cached
+
+    def changed_sections(self, other):
+        if other is None:
+            return list(SECTIONS)
+        return [s for s in SECTIONS if self.digests[s] != other.digests[s]]
+
+    def summary(self):
+        lines = [f"top5: {self.top5}",
+                 f"구간: {self.ranges} (구간별 {self.range_min}~{self.range_max}개)",
+                 f"홀수: {self.odd_min}~{self.odd_max}개, 최대 연속: {self.max_run}",
+                 f"합계: {self.sum_min}~{self.sum_max}, 분산: {self.var_min}~{self.var_max}",
+                 f"빈출 Top{self.top_n} {self.frequent_min}개 이상, 저빈출 Bottom{self.cold_n} 제외"]
+        for name, (numbers, lo, hi) in self.classes.items():
+            lines.append(f"{name}: {lo}~{hi}개 ({len(numbers)}개 번호)")
+        return '\n'.join(lines)
+
+def load_rules_file(filename=RULES_FILE):
+    """설정 파일 -> dict (없으면 빈 dict)"""
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, encoding='utf-8') as f:
+        if filename.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError('YAML 규칙 파일을 쓰려면 PyYAML이 필요합니다 (pip install pyyaml).')
+            data = yaml.safe_load(f) or {}
+        else:
+            data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError('규칙 파일 최상위는 객체(dict)여야 합니다.')
+    return data
+
+def compile_rules(data=None):
+    return CompiledRules(_merge(default_rules(), data))
+
+# 캐싱 ((파일명 + 수정시각/크기), 규칙) - 키와 값을 한 번에 교체
+_rules_entry = None
+
+def get_rules(filename=RULES_FILE):
+    """현재 규칙 (파일이 바뀌었을 때만 다시 읽고 컴파일)"""
+    global _rules_entry
+    key = (filename, get_history_version(filename))
+    entry = _rules_entry
+    if entry is not None and entry[0] == key:
+        return entry[1]
+    previous = entry[1] if entry is not None else None
+    try:
+        rules = compile_rules(load_rules_file(filename))
+    except (OSError, ValueError, TypeError, KeyError) as e:
+        print(f"[WARN] 규칙 파일 오류 ({filename}): {e} -> {'이전' if previous else '기본'} 규칙 사용")
+        rules = previous or compile_rules()
+    if previous is not None and rules is not previous:
+        changed = rules.changed_sections(previous)
+        if changed:
+            print(f"[INFO] 규칙 변경 적용: {', '.join(changed)}")
+        # 빈출/저빈출 기준이 그대로면 이력별 마스크 재사용
+        if not set(changed) & {'frequent', 'cold'}:
+            rules._frequency_cache = previous._frequency_cache
+    _rules_entry = (key, rules)
+    return rules
@@ -0,0 +1,263 @@
+"""
+===============================================================================
+        구성형 / 열거형 샘플러 (기본: 로또6/45)
+===============================================================================
+무작위 6개를 뽑고 99%를 버리는 대신, 1~45번을 차례로 보면서
+"이 번호를 넣을지/뺄지"를 결정해 한 장씩 조립합니다.
+1. 각 단계에서 규칙을 더 이상 만족할 수 없는 선택은 잘라냅니다.
+   - 남은 합계 예산 (120 ~ 180), 구간별 개수 (1~4개), 홀짝 (6:0, 0:6 제외)
+   - 4연속 금지, 소수 1~4개, 피보나치/삼각수/프로닉 각 2개 이하
+   - 저빈출(Cold) 번호 제외, Top 15 빈출 번호 2개 이상
+2. 가능성 표(feasibility table): 각 상태에서 "완성 가능한 티켓 수"를 미리 세어두고,
+   그 개수에 비례해 넣기/빼기를 고르므로 결과는 유효 티켓 전체에서 정확히 균등합니다.
+3. 분산/유사성/중복 등 나머지 조건은 생성 후 check_pattern_quality로 한 번 더
+   거르며, 균등 분포에서의 거절이므로 균등성은 그대로 유지됩니다.
+4. apply_top5_rule의 강제 번호는 '반드시 넣는 번호'로 미리 지정할 수 있습니다.
+5. 기준값은 lotto_rules.json (get_rules()) 값을 따르며, 가능성 표는 샘플러가 쓰는
+   규칙 항목의 digest별로 캐시됩니다. (소수/피보나치/삼각수/프로닉 외에 추가한
+   분류는 표에서는 빼고 check_pattern_quality에서만 거름 -> 균등성 유지)
+6. 열거형 샘플러 (EnumeratedSampler, 조합 수가 작은 게임의 기본값 / --sampler enumerate)
+   - 전체 조합 중 규칙을 만족하는 조합을 한 번에 골라 두고(lotto_query.rules_mask)
+     그 안에서 균등하게 추출 -> 시도가 거의 버려지지 않음
+   - 규칙 digest + 이력 버전별로 캐시, 강제 번호별 후보는 그 안에서 다시 캐시
+===============================================================================
+"""
+
+import random
+from functools import lru_cache
+
+import numpy as np
+
+from lotto_game import GAME
+from lotto_memory import BudgetCache, estimate_size
+from lotto_rules import get_rules, to_mask
+
+POOL = GAME.pool
+PICK = GAME.pick
+
+# 가능성 표가 의존하는 규칙 항목 (이 항목이 바뀔 때만 표를 다시 계산)
+RULE_SECTIONS = ('ranges', 'range_count', 'odd_count', 'max_run', 'sum', 'frequent', 'classes')
+# 열거형 후보 목록이 의존하는 규칙 항목 (분산/저빈출 포함)
+ENUMERATED_SECTIONS = RULE_SECTIONS + ('variance', 'cold')
+
+# 캐싱 (cold/top15/강제번호 조합별, 최근 사용 16개 + 메모리 예산 LRU)
+_TABLE_CACHE_SIZE = 16
+_table_cache = BudgetCache('feasibility', maxsize=_TABLE_CACHE_SIZE)
+
+# 가능성 표 메모(lru_cache) 항목 1개 어림값 (상태 튜플 키 + dict 슬롯 + 값, tracemalloc 측정)
+MEMO_ENTRY_BYTES = 170
+
+# 캐싱 (열거형: 이력 파일 + 이력 버전 + 규칙 digest별, A/B 전략 수만큼 + 메모리 예산 LRU)
+_enumerated_cache = BudgetCache('enumerated', maxsize=4)
+
+class FeasibilityTable:
+    """
+    상태 = (다음 번호, 선택 개수, 합계, 연속 길이, 현재 구간 개수,
+            홀수, 소수, 피보나치, 삼각수, 프로닉, Top15(최대 2로 고정))
+    count(상태) = 이 상태에서 완성 가능한 유효 티켓 수
+    """
+
+    def __init__(self, cold=(), top15=(), forced=(), rules=None):
+        rules = rules or get_rules()
+        self.cold = frozenset(cold)
+        self.top15 = frozenset(top15)
+        self.forced = frozenset(forced)
+        self.range_ends = {end for _, end in rules.ranges}
+
+        # check_pattern_quality와 동일한 기준 (lotto_rules)
+        self.sum_min, self.sum_max = rules.sum_min, rules.sum_max
+        self.range_min, self.range_max = rules.range_min, rules.range_max
+        self.odd_min, self.odd_max = rules.odd_min, rules.odd_max
+        self.max_run = rules.max_run
+        self.top_min = rules.frequent_min
+        _, self.prime_min, self.prime_max = rules.classes.get('prime', ([], 0, PICK))
+        self.fib_max = rules.classes.get('fibonacci', ([], 0, PICK))[2]
+        self.tri_max = rules.classes.get('triangular', ([], 0, PICK))[2]
+        self.pronic_max = rules.classes.get('pronic', ([], 0, PICK))[2]
+
+        # 번호별 속성표 (인덱스 = 번호)
+        primes = set(rules.class_numbers('prime'))
+        fibonacci = set(rules.class_numbers('fibonacci'))
+        triangular = set(rules.class_numbers('triangular'))
+        pronic = set(rules.class_numbers('pronic'))
+        self.is_odd = [n % 2 == 1 for n in range(POOL + 2)]
+        self.is_prime = [n in primes for n in range(POOL + 2)]
+        self.is_fib = [n in fibonacci for n in range(POOL + 2)]
+        self.is_tri = [n in triangular for n in range(POOL + 2)]
+        self.is_pronic = [n in pronic for n in range(POOL + 2)]
+        self.is_top = [n in self.top15 for n in range(POOL + 2)]
+
+        # i번 이후 사용 가능한 번호로 m개를 골랐을 때 최소/최대 합계
+        self.min_sum = [[0] * (PICK + 1) for _ in range(POOL + 2)]
+        self.max_sum = [[0] * (PICK + 1) for _ in range(POOL + 2)]
+        self.n_avail = [0] * (POOL + 2)
+        self.n_forced = [0] * (POOL + 2)
+        self.n_odd = [0] * (POOL + 2)
+        self.n_even = [0] * (POOL + 2)
+        self.n_prime = [0] * (POOL + 2)
+        self.n_fib = [0] * (POOL + 2)
+        self.n_tri = [0] * (POOL + 2)
+        self.n_pronic = [0] * (POOL + 2)
+        self.n_top = [0] * (POOL + 2)
+        self.ranges_left = [0] * (POOL + 2)
+        for i in range(1, POOL + 1):
+            avail = [n for n in range(i, POOL + 1) if n not in self.cold]
+            self.n_avail[i] = len(avail)
+            self.n_forced[i] = sum(1 for n in self.forced if n >= i)
+            self.n_odd[i] = sum(1 for n in avail if self.is_odd[n])
+            self.n_even[i] = len(avail) - self.n_odd[i]
+            self.n_prime[i] = sum(1 for n in avail if self.is_prime[n])
+            self.n_fib[i] = sum(1 for n in avail if self.is_fib[n])
+            self.n_tri[i] = sum(1 for n in avail if self.is_tri[n])
+            self.n_pronic[i] = sum(1 for n in avail if self.is_pronic[n])
+            self.n_top[i] = sum(1 for n in avail if self.is_top[n])
+            # i번이 속한 구간 다음에 남은 구간 수
+            self.ranges_left[i] = len(rules.ranges) - 1 - rules.range_index[i]
+            for m in range(PICK + 1):
+                if m <= len(avail):
+                    self.min_sum[i][m] = sum(avail[:m])
+                    self.max_sum[i][m] = sum(avail[len(avail) - m:])
+
+        self.count = lru_cache(maxsize=None)(self._count)
+        self._base_bytes = estimate_size(vars(self))
+        self.total = self.count(1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+
+    def memory_size(self):
+        """표 크기 어림값 (바이트): 번호별 속성표 + 메모 항목 수 (샘플링하면서 조금씩 늘어남)"""
+        return self._base_bytes + self.count.cache_info().currsize * MEMO_ENTRY_BYTES
+
+    def _advance(self, i, k, s, run, rc, odds, pr, fb, tr, pn, tp):
+        """i번 처리 완료 -> 구간 경계 확인 후 다음 번호로"""
+        if i in self.range_ends:
+            if not (self.range_min <= rc <= self.range_max): return 0
+            rc = 0
+        # 상태 정규화: 남은 선택으로 더 이상 상한에 닿을 수 없는 값은 하나로 합침
+        # (같은 개수를 세는 상태를 줄여 표 크기/생성 시간을 줄임)
+        j = i + 1
+        need = PICK - k
+        if j <= POOL:
+            if fb + min(need, self.n_fib[j]) <= self.fib_max: fb = 0
+            if tr + min(need, self.n_tri[j]) <= self.tri_max: tr = 0
+            if pn + min(need, self.n_pronic[j]) <= self.pronic_max: pn = 0
+            if pr + min(need, self.n_prime[j]) <= self.prime_max: pr = min(pr, self.prime_min)
+            lo, hi = self.min_sum[j][need], self.max_sum[j][need]
+            if self.sum_min <= s + lo and s + hi <= self.sum_max:
+                s = self.sum_min - lo
+        return self.count(j, k, s, run, rc, odds, pr, fb, tr, pn, tp)
+
+    def branches(self, i, k, s, run, rc, odds, pr, fb, tr, pn, tp):
+        """i번을 (뺄 때, 넣을 때) 각각 완성 가능한 티켓 수"""
+        exclude = include = 0
+        if i not in self.forced:
+            exclude = self._advance(i, k, s, 0, rc, odds, pr, fb, tr, pn, tp)
+        if i not in self.cold and k < PICK and run < self.max_run and rc < self.range_max:
+            odds2 = odds + self.is_odd[i]
+            pr2 = pr + self.is_prime[i]
+            fb2 = fb + self.is_fib[i]
+            tr2 = tr + self.is_tri[i]
+            pn2 = pn + self.is_pronic[i]
+            if (odds2 <= self.odd_max and pr2 <= self.prime_max and fb2 <= self.fib_max and
+                    tr2 <= self.tri_max and pn2 <= self.pronic_max):
+                tp2 = min(tp + self.is_top[i], self.top_min)
+                include = self._advance(i, k + 1, s + i, run + 1, rc + 1,
+                                        odds2, pr2, fb2, tr2, pn2, tp2)
+        return exclude, include
+
+    def _count(self, i, k, s, run, rc, odds, pr, fb, tr, pn, tp):
+        if i == POOL + 1:
+            return int(k == PICK and self.sum_min <= s <= self.sum_max and
+                       self.odd_min <= odds <= self.odd_max and
+                       pr >= self.prime_min and tp >= self.top_min)
+        need = PICK - k
+        # 가지치기: 남은 번호 수 / 강제 번호 / 합계 예산
+        if need > self.n_avail[i] or self.n_forced[i] > need: return 0
+        if s + self.min_sum[i][need] > self.sum_max: return 0
+        if s + self.max_sum[i][need] < self.sum_min: return 0
+        # 가지치기: 최소 개수 조건 (홀/짝, 소수, Top15, 남은 구간마다 1개)
+        if odds + min(need, self.n_odd[i]) < self.odd_min: return 0
+        if (k - odds) + min(need, self.n_even[i]) < PICK - self.odd_max: return 0
+        if pr + min(need, self.n_prime[i]) < self.prime_min: return 0
+        if tp + min(need, self.n_top[i]) < self.top_min: return 0
+        if need < self.ranges_left[i] * self.range_min + max(0, self.range_min - rc): return 0
+        return sum(self.branches(i, k, s, run, rc, odds, pr, fb, tr, pn, tp))
+
+    def sample(self, rng=random):
+        """유효 티켓 1장을 균등하게 생성 (불가능하면 None)"""
+        if self.total == 0:
+            return None
+        state = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+        nums = []
+        for i in range(1, POOL + 1):
+            exclude, include = self.branches(i, *state)
+            k, s, run, rc, odds, pr, fb, tr, pn, tp = state
+            if rng.randrange(exclude + include) < include:
+                nums.append(i)
+                state = [k + 1, s + i, run + 1, rc + 1,
+                         odds + self.is_odd[i], pr + self.is_prime[i],
+                         fb + self.is_fib[i], tr + self.is_tri[i],
+                         pn + self.is_pronic[i], min(tp + self.is_top[i], self.top_min)]
+            else:
+                state[2] = 0
+            if i in self.range_ends:
+                state[3] = 0
+        return nums
+
+def get_feasibility_table(cold, top15, forced=(), rules=None):
+    """같은 조건(+ 샘플러가 쓰는 규칙 항목)이면 가능성 표를 재사용"""
+    rules = rules or get_rules()
+    key = (tuple(sorted(cold)), tuple(sorted(top15)), tuple(sorted(forced)),
+           rules.digest(*RULE_SECTIONS))
+    table = _table_cache.get(key)
+    if table is None:
+        table = _table_cache.put(key, FeasibilityTable(cold, top15, forced, rules))
+    return table
+
+class EnumeratedSampler:
+    """규칙을 만족하는 전체 조합 목록에서 균등 추출"""
+
+    def __init__(self, csv_filename, rules=None, index=None):
+        from lotto_combinations import get_all_combinations, get_combination_masks
+        from lotto_query import rules_mask
+        rules = rules or get_rules()
+        self.combos = get_all_combinations()
+        self.masks = get_combination_masks()
+        if index is None:
+            index = np.flatnonzero(rules_mask(csv_filename, rules))
+        self.index = index
+        self._forced_cache = {(): self.index}
+
+    @property
+    def total(self):
+        return len(self.index)
+
+    def candidates(self, forced=()):
+        """강제 번호를 모두 포함하는 후보 조합의 인덱스"""
+        key = tuple(sorted(forced))
+        index = self._forced_cache.get(key)
+        if index is None:
+            mask = np.uint64(to_mask(key))
+            index = self.index[(self.masks[self.index] & mask) == mask]
+            self._forced_cache[key] = index
+        return index
+
+    def sample(self, forced=(), rng=random):
+        """유효 티켓 1장 (불가능하면 None)"""
+        index = self.candidates(forced)
+        if len(index) == 0:
+            return None
+        return self.combos[index[rng.randrange(len(index))]].tolist()
+
+def get_enumerated_sampler(csv_filename, rules=None, index=None):
+    """
+    같은 이력 버전 + 같은 규칙이면 열거형 샘플러를 재사용
+    index: 이미 계산된 유효 조합 인덱스 (공유 메모리 등, 주면 마스크 계산 생략)
+    """
+    from lotto_history import get_history_version
+    rules = rules or get_rules()
+    key = (csv_filename, get_history_version(csv_filename), rules.digest(*ENUMERATED_SECTIONS))
+    sampler = _enumerated_cache.get(key)
+    if sampler is None:
+        sampler = EnumeratedSampler(csv_filename, rules, index)
+        # 전체 조합/비트마스크 배열은 공용이므로 유효 조합 인덱스 크기만 계산
+        _enumerated_cache.put(key, sampler, size=sampler.index.nbytes)
+    return sampler
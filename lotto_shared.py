@@ -0,0 +1,281 @@
+"""
+===============================================================================
+        작업 프로세스용 공유 메모리 이력 스냅샷 (multiprocessing.shared_memory)
+===============================================================================
+1. 여러 프로세스로 나눠 도는 작업(일괄 생성 --workers 등)은 작업마다
+   lotto_total.csv를 다시 읽고 파생 데이터를 다시 만들거나, 큰 표를 pickle로 받습니다.
+   (spawn/forkserver 시작 방식이면 작업 수만큼 시작 시간과 메모리가 늘어남)
+2. publish(): 부모가 한 번만 만들어 공유 메모리에 올림
+   - 이력 배열: 회차 / 당첨번호 / 보너스 / 추첨일
+   - 빈출 순위표 (get_frequent_numbers_all_time 순서 그대로)
+   - 제외 비트맵: 조합 순위(colex)마다 1비트 (과거 당첨 + 추천 기록 + 이미 만든 줄)
+   - (열거형 샘플러) 전체 조합 / 비트마스크 / 규칙을 통과한 조합 인덱스(survivors)
+   -> 작업에는 세그먼트 이름/dtype/모양만 담은 작은 descriptor(dict)만 전달
+3. attach(descriptor): 작업이 같은 메모리를 복사 없이 읽기 전용 numpy 배열로 연결
+   install(): 이 프로세스의 캐시(load_history, 빈출 순위, 열거형 샘플러)에 넣음
+   -> CSV를 다시 읽지 않고 규칙 마스크도 다시 계산하지 않음
+   (최근 패턴 유사성 인덱스는 dict라 공유하지 않고, 공유 이력 배열로 작업마다 만듦)
+4. 버전: descriptor에 이력 버전(get_history_version)을 기록
+   - refresh(): CSV가 바뀌었으면(새 회차 반영) 이력 파생 배열을 끊음(detach)
+     -> 이후에는 새 CSV를 읽는 평소 경로, 제외 집합은 일반 set으로 바뀜
+   - 전체 조합/비트마스크는 이력과 무관하므로 계속 사용
+5. 만든 프로세스(owner)만 close()에서 unlink합니다. (with 블록 사용 권장)
+===============================================================================
+"""
+
+import math
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from lotto_game import GAME
+from lotto_history import TOTAL_CSV, get_history_version, install_snapshot, load_history
+
+# 이력이 바뀌면 끊는 배열 (나머지는 이력과 무관)
+VERSIONED = ('rounds', 'numbers', 'bonus', 'dates', 'frequency', 'excluded',
+             'exclusion_bitmap', 'survivors')
+
+# colex 순위용 이항계수표: _BINOM[n][i] = C(n, i)
+_BINOM = [[math.comb(n, i) for i in range(GAME.pick + 1)] for n in range(GAME.pool + 1)]
+
+def combination_rank(comb):
+    """조합 -> 0 ~ C(pool, pick)-1 (colex 순위, 번호 순서 무관)"""
+    return sum(_BINOM[n - 1][i] for i, n in enumerate(sorted(comb), 1))
+
+def combination_ranks(combos):
+    """(N, pick) 정렬된 조합 배열 -> (N,) 순위"""
+    combos = np.asarray(combos, dtype=np.int64).reshape(-1, GAME.pick)
+    table = np.array(_BINOM, dtype=np.int64)
+    return table[combos - 1, np.arange(1, GAME.pick + 1)].sum(axis=1)
+
+def build_exclusion_bitmap(combos):
+    """조합 배열 -> 조합 공간 전체 비트맵 (uint8, 로또6/45: 약 1MB)"""
+    bitmap = np.zeros((GAME.space_size + 7) // 8, dtype=np.uint8)
+    ranks = combination_ranks(combos)
+    np.bitwise_or.at(bitmap, ranks >> 3, (1 << (ranks & 7)).astype(np.uint8))
+    return bitmap
+
+class SharedExclusion:
+    """
+    제외 집합 (공유 비트맵 + 이 프로세스에서 추가한 줄)
+    set처럼 in / add / update / | 사용 (generate_combinations의 past_combs 자리)
+    """
+
+    def __init__(self, bitmap, rows):
+        self.bitmap = bitmap
+        self.rows = rows
+        self.extra = set()
+
+    def __contains__(self, comb):
+        if comb in self.extra:
+            return True
+        if self.bitmap is None:
+            return False
+        rank = combination_rank(comb)
+        return bool(self.bitmap[rank >> 3] >> (rank & 7) & 1)
+
+    def add(self, comb):
+        self.extra.add(tuple(comb))
+
+    def update(self, combs):
+        self.extra.update(tuple(comb) for comb in combs)
+
+    def to_set(self):
+        rows = set() if self.rows is None else set(map(tuple, self.rows.tolist()))
+        return rows | self.extra
+
+    def __or__(self, other):
+        return self.to_set() | set(other)
+
+    def detach(self, extra=()):
+        """공유 배열 참조를 끊고 일반 set으로 전환 (extra: 새로 제외할 조합)"""
+        self.extra = self.to_set() | set(extra)
+        self.bitmap = None
+        self.rows = None
+
+def _attach_segment(name):
+    try:
+        # 3.13+: 연결만 하는 쪽은 resource_tracker에 등록하지 않음 (종료 시 unlink 방지)
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+class SharedSnapshot:
+    """공유 메모리 배열 묶음 (publish()로 만들거나 attach()로 연결)"""
+
+    def __init__(self, descriptor, segments, arrays, owner):
+        self.descriptor = descriptor
+        self.version = descriptor['version']
+        self.csv_file = descriptor['csv_file']
+        self.owner = owner
+        self.arrays = arrays
+        self.exclusion = None
+        self._segments = segments
+        self._lingering = []
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def __contains__(self, name):
+        return name in self.arrays
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def attached(self):
+        """이력 파생 배열이 아직 연결돼 있는지"""
+        return 'numbers' in self.arrays
+
+    def is_current(self):
+        return get_history_version(self.csv_file) == self.version
+
+    def history(self):
+        """load_history()와 같은 모양의 스냅샷 (배열은 공유 메모리 그대로)"""
+        return {
+            'version': self.version,
+            'filename': self.csv_file,
+            'rounds': self.arrays['rounds'],
+            'numbers': self.arrays['numbers'],
+            'bonus': self.arrays['bonus'],
+            'dates': [d.decode('utf-8') for d in self.arrays['dates'].tolist()],
+        }
+
+    def install(self, rules=None):
+        """
+        이 프로세스의 캐시에 공유 배열을 넣음 (CSV가 이미 바뀌었으면 넣지 않음)
+        -> self.exclusion: 작업에서 쓸 제외 집합
+        """
+        import lotto_generator
+        from lotto_combinations import install_combinations
+        if 'combos' in self.arrays:
+            install_combinations(self.arrays['combos'], self.arrays.get('masks'))
+        if not self.attached or not install_snapshot(self.history()):
+            self.detach()
+            return self
+        lotto_generator.seed_frequent_numbers(self.csv_file, self.arrays['frequency'].tolist(),
+                                              self.descriptor['frequency_mtime'])
+        self.exclusion = SharedExclusion(self.arrays['exclusion_bitmap'], self.arrays['excluded'])
+        if 'survivors' in self.arrays:
+            from lotto_rules import get_rules
+            from lotto_sampler import ENUMERATED_SECTIONS, get_enumerated_sampler
+            rules = rules or get_rules()
+            # 규칙 파일이 그 사이 바뀌었으면 이 작업에서 다시 계산
+            if rules.digest(*ENUMERATED_SECTIONS) == self.descriptor['rules_digest']:
+                get_enumerated_sampler(self.csv_file, rules, index=self.arrays['survivors'])
+        return self
+
+    def refresh(self):
+        """CSV가 바뀌었으면 이력 파생 배열을 끊음 -> 아직 공유 스냅샷을 쓰면 True"""
+        if self.attached and not self.is_current():
+            self.detach()
+        return self.attached
+
+    def detach(self):
+        """이력 파생 배열 연결 해제 (이후 이 프로세스는 CSV를 직접 읽는 평소 경로)"""
+        if self.exclusion is None and 'excluded' in self.arrays:
+            self.exclusion = SharedExclusion(None, self.arrays['excluded'])
+        if self.exclusion is not None and self.exclusion.rows is not None:
+            # 공유 제외 목록 + 새 CSV의 당첨 조합 (새 회차 포함)
+            from lotto_generator import load_past_combinations
+            self.exclusion.detach(load_past_combinations(self.csv_file))
+        for name in VERSIONED:
+            self.arrays.pop(name, None)
+            if name in self._segments:
+                self._release(self._segments.pop(name))
+
+    def _release(self, shm):
+        """세그먼트 연결 해제 (owner면 삭제도)"""
+        if self.owner:
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+        try:
+            shm.close()
+        except BufferError:
+            # 이 프로세스 캐시가 아직 배열을 참조 중 (버전이 달라 다시 쓰이지는 않음)
+            # -> close()에서 다시 시도, 그래도 안 되면 프로세스 종료 시 해제
+            self._lingering.append(shm)
+
+    def close(self):
+        """연결 해제 (owner면 세그먼트 삭제)"""
+        self.arrays = {}
+        self.exclusion = None
+        segments = list(self._segments.values()) + self._lingering
+        self._segments = {}
+        self._lingering = []
+        for shm in segments:
+            self._release(shm)
+
+def _publish_array(array):
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    view[...] = array
+    view.flags.writeable = False
+    return shm, view
+
+def publish(csv_file=TOTAL_CSV, excluded=(), sampler=None, rules=None):
+    """
+    이력 파생 배열을 공유 메모리에 올림 -> SharedSnapshot (owner)
+    excluded: 제외할 조합 (과거 당첨 + 추천 기록 등)
+    sampler='enumerate'면 전체 조합 / 비트마스크 / 유효 조합 인덱스도 올림
+    작업에는 snapshot.descriptor만 넘기고 attach()로 연결
+    """
+    import lotto_generator
+    history = load_history(csv_file)
+    dates = [d.encode('utf-8') for d in history['dates']]
+    rows = np.array(sorted(tuple(sorted(c)) for c in excluded), dtype=np.int8).reshape(-1, GAME.pick)
+    try:
+        frequency_mtime = os.path.getmtime(csv_file)
+    except OSError:
+        frequency_mtime = 0
+    arrays = {
+        'rounds': history['rounds'],
+        'numbers': history['numbers'],
+        'bonus': history['bonus'],
+        'dates': np.array(dates, dtype=bytes) if dates else np.zeros(0, dtype='S1'),
+        'frequency': np.array(lotto_generator.get_frequent_numbers_all_time(csv_file, top_n=GAME.pool),
+                              dtype=np.int16),
+        'excluded': rows,
+        'exclusion_bitmap': build_exclusion_bitmap(rows),
+    }
+    descriptor = {'version': history['version'], 'csv_file': csv_file,
+                  'frequency_mtime': frequency_mtime, 'rules_digest': None, 'arrays': {}}
+    if sampler == 'enumerate':
+        from lotto_rules import get_rules
+        from lotto_sampler import ENUMERATED_SECTIONS, get_enumerated_sampler
+        rules = rules or get_rules()
+        enumerated = get_enumerated_sampler(csv_file, rules)
+        arrays.update(combos=enumerated.combos, masks=enumerated.masks, survivors=enumerated.index)
+        descriptor['rules_digest'] = rules.digest(*ENUMERATED_SECTIONS)
+
+    segments, views = {}, {}
+    try:
+        for name, array in arrays.items():
+            segments[name], views[name] = _publish_array(array)
+            descriptor['arrays'][name] = (segments[name].name, views[name].dtype.str,
+                                          views[name].shape)
+    except Exception:
+        SharedSnapshot(descriptor, segments, {}, owner=True).close()
+        raise
+    return SharedSnapshot(descriptor, segments, views, owner=True)
+
+def attach(descriptor):
+    """descriptor의 세그먼트에 복사 없이 연결 -> SharedSnapshot (읽기 전용 배열)"""
+    segments, arrays = {}, {}
+    try:
+        for name, (shm_name, dtype, shape) in descriptor['arrays'].items():
+            segments[name] = _attach_segment(shm_name)
+            arrays[name] = np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=segments[name].buf)
+            arrays[name].flags.writeable = False
+    except Exception:
+        arrays.clear()
+        SharedSnapshot(descriptor, segments, {}, owner=False).close()
+        raise
+    return SharedSnapshot(descriptor, segments, arrays, owner=False)
@@ -0,0 +1,91 @@
+"""
+===============================================================================
+        과거 패턴 유사성 해시 인덱스
+===============================================================================
+과거 당첨번호와의 유사성 검사를 반복문 대신 해시 조회로 처리합니다.
+(아래 개수는 로또6/45 기준, 다른 게임은 pick에 맞춰 달라짐 -> lotto_game)
+1. 5개 부분집합 인덱스: 회차마다 6개의 5개-부분집합을 등록
+   -> "과거 당첨번호와 5개 이상(pick-1개 이상) 겹침" 검사 = 후보의 5개-부분집합 6번 조회
+2. 간격 패턴 인덱스: 간격 벡터(5칸) 중 3칸 위치/값 조합(10가지)을 등록
+   -> "간격 패턴 3칸 이상 일치" 검사 = 10번 조회
+각 키에는 가장 최근 회차 위치만 저장하므로, 검사 구간(최근 N회 ~ 전체)에
+상관없이 후보 1개당 비용이 일정합니다.
+인덱스는 이력 버전(lotto_history)마다 한 번만 생성합니다.
+===============================================================================
+"""
+
+from itertools import combinations
+
+from lotto_game import GAME
+from lotto_history import TOTAL_CSV, load_history
+
+# 겹침 검사 부분집합 크기 (6개 중 5개)
+SUBSET_SIZE = GAME.pick - 1
+
+# 간격 벡터 5칸 중 3칸을 고르는 위치 조합 (10가지)
+_GAP_POSITIONS = list(combinations(range(GAME.pick - 1), 3))
+
+# 캐싱 ((파일명, 이력 버전), 인덱스) - 미리 준비 스레드와 요청이 함께 읽으므로
+# 키와 값을 튜플 하나로 묶어 한 번에 교체
+_index_entry = None
+
+def get_gaps(nums):
+    """정렬된 6개 번호 -> 간격 벡터 (5칸)"""
+    return tuple(nums[i+1] - nums[i] for i in range(len(nums) - 1))
+
+def _gap_keys(gaps):
+    return [(pos, tuple(gaps[i] for i in pos)) for pos in _GAP_POSITIONS]
+
+def build_similarity_index(numbers):
+    """(R, pick) 정렬된 번호 배열 -> 해시 인덱스"""
+    subsets = {}
+    gaps = {}
+    draws = numbers.tolist() if hasattr(numbers, 'tolist') else list(numbers)
+    for idx, nums in enumerate(draws):
+        nums = sorted(nums)
+        # 나중 회차가 덮어쓰므로 항상 가장 최근 위치가 남음
+        for sub in combinations(nums, SUBSET_SIZE):
+            subsets[sub] = idx
+        for key in _gap_keys(get_gaps(nums)):
+            gaps[key] = idx
+    return {
+        'n_draws': len(draws),
+        'subsets': subsets,
+        'gaps': gaps,
+    }
+
+def get_similarity_index(filename=TOTAL_CSV):
+    """이력 버전별로 한 번만 인덱스 생성"""
+    global _index_entry
+    history = load_history(filename)
+    key = (filename, history['version'])
+    entry = _index_entry
+    if entry is None or entry[0] != key:
+        entry = (key, build_similarity_index(history['numbers']))
+        _index_entry = entry
+    return entry[1]
+
+def is_similar(numbers, index, recent_count=30):
+    """
+    최근 recent_count회(None = 전체) 당첨번호와 너무 흡사하면 True
+    - 5개(pick-1개) 이상 번호 겹침
+    - 간격 패턴 3칸 이상 일치
+    """
+    nums = sorted(numbers)
+    n_draws = index['n_draws']
+    if recent_count is None or recent_count >= n_draws:
+        oldest = 0
+    else:
+        oldest = n_draws - recent_count
+
+    subsets = index['subsets']
+    for sub in combinations(nums, SUBSET_SIZE):
+        idx = subsets.get(sub)
+        if idx is not None and idx >= oldest: return True
+
+    gaps = index['gaps']
+    for key in _gap_keys(get_gaps(nums)):
+        idx = gaps.get(key)
+        if idx is not None and idx >= oldest: return True
+
+    return False
@@ -0,0 +1,98 @@
+"""
+===============================================================================
+        추천 기록 저장 (파일 잠금 + 블록 단위 추가 + 번호 발급)
+===============================================================================
+!num 두 번이 동시에 들어오면 생성기 프로세스 두 개가 같은 추천 기록 파일에
+쓰게 됩니다. 잠금 없이 "개수 세기 -> 추가"를 하면 같은 추천 번호(NN번째)가
+두 번 나오거나 블록이 섞이고, 봇은 다른 사람의 블록을 최신 결과로 보여줄 수 있습니다.
+1. append_block(result_file, render)
+   - <기록 파일>.lock에 배타 잠금(flock)을 건 상태에서
+     다음 번호 계산 -> render(번호)로 블록 생성 -> 한 번의 write로 추가
+   - 생성(오래 걸림)은 잠금 밖에서 병렬로, 번호 발급/추가만 잠금 안에서
+   - 잠금은 열린 파일 단위이므로 프로세스끼리, 같은 프로세스의 스레드끼리 모두 유효
+2. read_block(result_file, sequence): 발급받은 번호의 블록만 읽음
+   -> 생성기는 '[SAVED] 번호' 줄을 출력하고, 봇은 그 번호의 블록을 보여줌
+3. 잠금 파일은 지우지 않습니다. (지우면 다른 프로세스가 다른 파일을 잠글 수 있음)
+===============================================================================
+"""
+
+import contextlib
+import os
+import re
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+HEADER = '번째 추천 번호에요~'
+_HEADER_RE = re.compile(r'^(\d+)' + HEADER, re.M)
+
+@contextlib.contextmanager
+def locked(result_file):
+    """추천 기록 파일 배타 잠금 (with 블록 동안, 다른 프로세스/스레드는 대기)"""
+    folder = os.path.dirname(os.path.abspath(result_file))
+    os.makedirs(folder, exist_ok=True)
+    fd = os.open(result_file + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        os.close(fd)
+
+def _read(result_file):
+    try:
+        with open(result_file, encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return ''
+
+def next_sequence(content):
+    """다음 추천 번호 (기존 방식: 지금까지의 블록 수 + 1)"""
+    return content.count(HEADER) + 1
+
+def append_block(result_file, render, sequence=None):
+    """
+    잠금 안에서 번호 발급 + 블록 추가 -> (번호, 추가한 블록 텍스트)
+    render(번호)는 블록 텍스트('\\n'으로 끝남)를 반환
+    sequence를 지정하면 그 번호를 그대로 사용
+    """
+    with locked(result_file):
+        if sequence is None:
+            sequence = next_sequence(_read(result_file))
+        text = render(sequence)
+        data = text.encode('utf-8')
+        fd = os.open(result_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            written = 0
+            while written < len(data):
+                written += os.write(fd, data[written:])
+        finally:
+            os.close(fd)
+    return sequence, text
+
+def read_block(result_file, sequence=None):
+    """번호의 블록 텍스트 (None = 마지막 블록, 없으면 None)"""
+    content = _read(result_file)
+    starts = list(_HEADER_RE.finditer(content))
+    if sequence is not None:
+        starts_for = [i for i, m in enumerate(starts) if int(m.group(1)) == sequence]
+        if not starts_for:
+            return None
+        # 같은 번호가 여러 번이면 (잠금 도입 전 기록) 마지막 것
+        index = starts_for[-1]
+    elif starts:
+        index = len(starts) - 1
+    else:
+        return None
+    end = starts[index + 1].start() if index + 1 < len(starts) else len(content)
+    return content[starts[index].start():end]
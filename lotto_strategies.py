@@ -0,0 +1,85 @@
+"""
+===============================================================================
+        생성 전략 A/B 비교 (규칙 변형 여러 개를 한 번에 생성 + 전략별 채점)
+===============================================================================
+1. 전략 = 현재 규칙(lotto_rules) 위에 덮어쓸 항목 + Top5 강제 여부
+   - current : 현재 규칙 그대로 (표시 없는 기존 추천 블록도 여기로 집계)
+   - wide_sum: 합계 구간을 양쪽으로 구간 폭의 1/3씩 넓힘 (기본 120~180 -> 100~200)
+   - no_top5 : 현재 규칙, Top5 번호 강제 포함 없음
+   - random  : 필터 없는 완전 무작위 (중복 제외만) -> 비교 기준
+2. 전략별 규칙은 항목 digest가 같으면 같은 값이므로
+   조합 공간 전체를 쓰는 게임(lotto_game.enumerable)에서는 항목별 조합 마스크
+   (lotto_query.rule_mask)를 전략끼리 공유합니다.
+   -> wide_sum은 합계 마스크만 새로 계산하고 나머지 항목은 current 것을 그대로 사용
+3. 생성기: lotto_generator.py --strategies current,wide_sum,no_top5,random
+   -> 전략마다 추천 블록 1개, 블록에 '[전략 이름]' 줄 표시
+4. 분석기(lotto_analyzer)는 이 표시로 전략별 등수/무작위 기대값을 따로 집계
+===============================================================================
+"""
+
+from lotto_rules import CompiledRules, _merge, get_rules
+
+DEFAULT_STRATEGY = 'current'
+
+class Strategy:
+    """생성 전략 1개 (읽기 전용으로 공유)"""
+
+    def __init__(self, name, title, override=None, top5=True, filtered=True):
+        self.name = name
+        self.title = title
+        # 현재 규칙 위에 덮어쓸 항목 (dict 또는 rules -> dict 함수)
+        self.override = override
+        self.top5 = top5
+        # False = 필터 없이 무작위 (중복 제외만)
+        self.filtered = filtered
+
+    def __repr__(self):
+        return f'Strategy({self.name!r})'
+
+def _wide_sum(rules):
+    widen = round((rules.sum_max - rules.sum_min) / 3)
+    return {'sum': {'min': max(0, rules.sum_min - widen), 'max': rules.sum_max + widen}}
+
+STRATEGIES = {
+    'current': Strategy('current', '현재 규칙'),
+    'wide_sum': Strategy('wide_sum', '합계 구간 완화', override=_wide_sum),
+    'no_top5': Strategy('no_top5', 'Top5 강제 없음', top5=False),
+    'random': Strategy('random', '완전 무작위', top5=False, filtered=False),
+}
+
+def parse_strategies(text):
+    """'current,wide_sum' -> [Strategy, ...] (알 수 없는 이름은 ValueError)"""
+    names = [name.strip() for name in (text or '').split(',') if name.strip()]
+    unknown = [name for name in names if name not in STRATEGIES]
+    if unknown:
+        raise ValueError(f'알 수 없는 전략: {", ".join(unknown)} (가능: {", ".join(STRATEGIES)})')
+    return [STRATEGIES[name] for name in dict.fromkeys(names)]
+
+# 캐싱 ((전략 이름, 기준 규칙 객체) -> 컴파일된 규칙)
+_rules_cache = {}
+
+def strategy_rules(strategy, rules=None):
+    """전략의 필터 규칙 (필터 없는 전략은 None, 덮어쓸 항목이 없으면 현재 규칙 그대로)"""
+    rules = rules or get_rules()
+    if not strategy.filtered:
+        return None
+    if strategy.override is None:
+        return rules
+    key = (strategy.name, id(rules))
+    cached = _rules_cache.get(key)
+    if cached is not None and cached[0] is rules:
+        return cached[1]
+    override = strategy.override(rules) if callable(strategy.override) else strategy.override
+    compiled = CompiledRules(_merge(rules.raw, override))
+    # 빈출/저빈출 기준이 같으면 이력별 빈출 표 공유
+    if not set(compiled.changed_sections(rules)) & {'frequent', 'cold'}:
+        compiled._frequency_cache = rules._frequency_cache
+    # 규칙이 다시 로드되면 이전 규칙 기준 항목은 버림
+    for old in [k for k, (base, _) in list(_rules_cache.items()) if base is not rules]:
+        _rules_cache.pop(old, None)
+    _rules_cache[key] = (rules, compiled)
+    return compiled
+
+def strategy_title(name):
+    strategy = STRATEGIES.get(name)
+    return strategy.title if strategy else name
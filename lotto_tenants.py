@@ -0,0 +1,88 @@
+"""
+===============================================================================
+        추천 기록 분리 (서버/채널/사용자별 테넌트)
+===============================================================================
+1. 범위(scope)에 따라 메시지를 테넌트로 나눕니다.
+   - 'global' : 모두 하나의 기록 (기존 lotto_result.txt 그대로)
+   - 'guild'  : 서버별       -> guild-<서버 ID>
+   - 'channel': 채널별       -> channel-<채널 ID>
+   - 'user'   : 사용자별     -> user-<사용자 ID>
+2. 테넌트마다 별도 폴더에 저장 (해시 앞 2자리로 한 번 더 나눔)
+   results/<해시 2자리>/<테넌트>/lotto_result.txt (+ 성과 리포트 캐시)
+   -> 한 테넌트의 기록이 커져도 다른 테넌트의 !anal/!num 비용은 그대로
+3. 과거 당첨번호 인덱스(lotto_total.csv 기반)는 모든 테넌트가 읽기 전용으로 공유하고,
+   테넌트별로는 자기 추천 기록만 중복 제외 대상에 더합니다.
+===============================================================================
+"""
+
+import hashlib
+import os
+import re
+
+from lotto_game import GAME
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.environ.get('LOTTO_RESULTS_DIR', os.path.join(BASE_DIR, 'results'))
+RESULT_FILENAME = GAME.result_file
+
+SCOPES = ('global', 'guild', 'channel', 'user')
+DEFAULT_TENANT = 'global'
+
+_TENANT_RE = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+def make_tenant(scope, guild_id=None, channel_id=None, user_id=None):
+    """범위 + ID -> 테넌트 이름 (해당 ID가 없으면 기본 테넌트)"""
+    if scope == 'guild' and guild_id:
+        return f'guild-{guild_id}'
+    if scope == 'channel' and channel_id:
+        return f'channel-{channel_id}'
+    if scope == 'user' and user_id:
+        return f'user-{user_id}'
+    return DEFAULT_TENANT
+
+def tenant_for_message(message, scope):
+    guild = getattr(message, 'guild', None)
+    channel = getattr(message, 'channel', None)
+    author = getattr(message, 'author', None)
+    return make_tenant(scope,
+                       guild_id=getattr(guild, 'id', None),
+                       channel_id=getattr(channel, 'id', None),
+                       user_id=getattr(author, 'id', None))
+
+def tenant_for_channel(channel, scope):
+    """채널 기준 테넌트 (정기 업데이트 등 사용자가 없는 경우, 'user' 범위면 기본 테넌트)"""
+    guild = getattr(channel, 'guild', None)
+    return make_tenant(scope if scope != 'user' else 'global',
+                       guild_id=getattr(guild, 'id', None),
+                       channel_id=getattr(channel, 'id', None))
+
+def tenant_dir(tenant):
+    if not _TENANT_RE.match(tenant):
+        raise ValueError(f'잘못된 테넌트 이름: {tenant!r}')
+    shard = hashlib.sha1(tenant.encode('utf-8')).hexdigest()[:2]
+    return os.path.join(RESULTS_DIR, shard, tenant)
+
+def result_file_for(tenant):
+    """
+    테넌트의 추천 기록 파일 경로
+    기본 테넌트는 None -> 각 모듈의 기존 lotto_result.txt 사용
+    """
+    if not tenant or tenant == DEFAULT_TENANT:
+        return None
+    directory = tenant_dir(tenant)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, RESULT_FILENAME)
+
+def list_tenants():
+    """기록이 있는 테넌트 목록 (기본 테넌트 제외)"""
+    tenants = []
+    if not os.path.isdir(RESULTS_DIR):
+        return tenants
+    for shard in sorted(os.listdir(RESULTS_DIR)):
+        shard_dir = os.path.join(RESULTS_DIR, shard)
+        if not os.path.isdir(shard_dir):
+            continue
+        for tenant in sorted(os.listdir(shard_dir)):
+            if os.path.exists(os.path.join(shard_dir, tenant, RESULT_FILENAME)):
+                tenants.append(tenant)
+    return tenants
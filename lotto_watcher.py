@@ -0,0 +1,259 @@
+"""
+===============================================================================
+        당첨번호 JSON 드롭 감시 (n8n -> lotto_latest.json -> 봇 즉시 반영)
+===============================================================================
+1. n8n 워크플로가 lotto_latest.json을 쓰는 순간 봇이 알아채도록
+   파일이 있는 폴더를 감시합니다.
+   - Linux: inotify (쓰기 완료 / 이름 변경으로 들어온 파일)
+   - 그 외 또는 inotify 사용 불가: 주기적 확인(polling)으로 대체
+2. 같은 내용이 여러 번 감지되면 한 번만 처리합니다. (내용 해시 비교)
+   짧게 나눠 쓰는 경우를 대비해 debounce 시간만큼 기다린 뒤 읽습니다.
+   callback이 실패하면(예외 또는 False 반환) 처리됨으로 기록하지 않고
+   retry_interval초 뒤 같은 내용을 다시 시도합니다. (최대 max_retries번)
+3. 로컬 테스트용 명령
+   - python lotto_watcher.py drop --round 1207 --date 2026.01.17 --numbers 1 2 3 4 5 6 --bonus 7
+     -> n8n과 같은 형식의 JSON을 감시 위치에 떨어뜨림
+   - python lotto_watcher.py watch [--poll] [--ingest]
+     -> 봇 없이 감시만 실행 (--ingest: 감지 즉시 CSV 반영)
+===============================================================================
+"""
+
+import argparse
+import asyncio
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import logging
+import os
+import struct
+import sys
+
+# inotify 상수 (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')   # wd, mask, cookie, len
+
+def _file_digest(path):
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+def _stat_signature(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+class _Inotify:
+    """ctypes로 만든 최소 inotify 래퍼 (폴더 1개 감시)"""
+
+    def __init__(self, directory, mask=IN_CLOSE_WRITE | IN_MOVED_TO):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 실패')
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f'inotify_add_watch 실패: {directory}')
+
+    def read_names(self):
+        """쌓인 이벤트의 파일 이름 목록 (없으면 빈 목록)"""
+        names = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return names
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                names.append(os.fsdecode(data[offset:offset + length].rstrip(b'\0')))
+                offset += length
+
+    def close(self):
+        os.close(self.fd)
+
+class DropWatcher:
+    """
+    path 파일이 새로 쓰이면 await callback(path) 호출
+    - 시작할 때 이미 있는 파일도 한 번 전달 (꺼져 있던 동안 들어온 회차 처리용)
+    - callback이 예외 없이 끝나고 False를 반환하지 않은 내용만 '처리됨'으로 기록
+    - 실패한 내용은 retry_interval초 뒤 다시 시도 (같은 내용 기준 최대 max_retries번)
+    """
+
+    def __init__(self, path, callback, poll_interval=2.0, debounce=0.3, use_inotify=True,
+                 retry_interval=60.0, max_retries=5):
+        self.path = os.path.abspath(path)
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.use_inotify = use_inotify
+        self.retry_interval = retry_interval
+        self.max_retries = max_retries
+        self.mode = None
+        self._inotify = None
+        self._poll_task = None
+        self._runner = None
+        self._pending = False
+        self._last_digest = None
+        self._failures = (None, 0)     # (실패한 내용 해시, 연속 실패 횟수)
+        self._retry = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        directory = os.path.dirname(self.path)
+        if self.use_inotify and sys.platform.startswith('linux'):
+            try:
+                self._inotify = _Inotify(directory)
+                loop.add_reader(self._inotify.fd, self._on_inotify)
+                self.mode = 'inotify'
+            except Exception as e:
+                logging.warning(f'inotify 사용 불가, 주기적 확인으로 대체: {e}')
+                self._inotify = None
+        if self._inotify is None:
+            self.mode = 'polling'
+            self._poll_task = loop.create_task(self._poll())
+        self.trigger()
+        return self.mode
+
+    def stop(self):
+        if self._inotify is not None:
+            asyncio.get_running_loop().remove_reader(self._inotify.fd)
+            self._inotify.close()
+            self._inotify = None
+        for task in (self._poll_task, self._runner, self._retry):
+            if task is not None:
+                task.cancel()
+
+    def trigger(self):
+        """변경 가능성 알림 (처리 중이면 끝난 뒤 한 번 더 확인)"""
+        self._pending = True
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.get_running_loop().create_task(self._run())
+
+    def _on_inotify(self):
+        name = os.path.basename(self.path)
+        if name in self._inotify.read_names():
+            self.trigger()
+
+    async def _poll(self):
+        last = _stat_signature(self.path)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            current = _stat_signature(self.path)
+            if current != last:
+                last = current
+                self.trigger()
+
+    async def _run(self):
+        while self._pending:
+            self._pending = False
+            await asyncio.sleep(self.debounce)
+            if self._pending:
+                continue   # 아직 쓰는 중 -> 조용해질 때까지 대기
+            digest = _file_digest(self.path)
+            if digest is None or digest == self._last_digest:
+                continue
+            try:
+                ok = await self.callback(self.path) is not False
+            except Exception as e:
+                logging.error(f'당첨번호 파일 처리 실패 ({self.path}): {e}')
+                ok = False
+            if ok:
+                self._last_digest = digest
+                self._failures = (None, 0)
+            else:
+                self._schedule_retry(digest)
+
+    def _schedule_retry(self, digest):
+        failed, count = self._failures
+        count = count + 1 if failed == digest else 1
+        self._failures = (digest, count)
+        if count > self.max_retries:
+            logging.error(f'당첨번호 파일 처리 {self.max_retries}회 재시도 실패, 파일이 바뀔 때까지 대기')
+            return
+        logging.warning(f'당첨번호 파일 처리 실패 -> {self.retry_interval:.0f}초 뒤 다시 시도 '
+                        f'({count}/{self.max_retries})')
+        if self._retry is not None:
+            self._retry.cancel()
+        self._retry = asyncio.get_running_loop().call_later(self.retry_interval, self.trigger)
+
+# =========================================================
+#  로컬 테스트용 드롭 / 감시
+# =========================================================
+
+def drop_draw(path, round_no, date, numbers, bonus, in_place=False):
+    """n8n 'Write Files To Disk'와 같은 형식으로 JSON 기록"""
+    content = json.dumps({'round': round_no, 'date': date, 'numbers': numbers, 'bonus': bonus},
+                         ensure_ascii=False, indent=2)
+    if in_place:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+def parse_args(argv=None):
+    import update_lotto
+    from lotto_game import GAME
+
+    parser = argparse.ArgumentParser(description='당첨번호 JSON 드롭 감시/테스트')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    drop = sub.add_parser('drop', help='감시 위치에 당첨번호 JSON 기록')
+    drop.add_argument('--file', default=update_lotto.JSON_FILE)
+    drop.add_argument('--round', type=int, required=True)
+    drop.add_argument('--date', required=True, help='예: 2026.01.17')
+    drop.add_argument('--numbers', type=int, nargs=GAME.pick, required=True)
+    drop.add_argument('--bonus', type=int, required=True)
+    drop.add_argument('--in-place', action='store_true',
+                      help='임시 파일 없이 바로 덮어쓰기 (n8n 기본 동작)')
+
+    watch = sub.add_parser('watch', help='봇 없이 감시만 실행')
+    watch.add_argument('--file', default=update_lotto.JSON_FILE)
+    watch.add_argument('--poll', action='store_true', help='inotify 대신 주기적 확인')
+    watch.add_argument('--interval', type=float, default=2.0)
+    watch.add_argument('--ingest', action='store_true', help='감지 즉시 lotto_total.csv 반영')
+    return parser.parse_args(argv)
+
+async def _watch_forever(args):
+    import update_lotto
+
+    async def on_drop(path):
+        draw = update_lotto.read_lotto_json(path)
+        print(f"[INFO] 감지: {draw['round']}회 {draw['numbers']} + {draw['bonus']}")
+        if args.ingest:
+            status = await asyncio.to_thread(update_lotto.update_csv, json_file=path)
+            print(f"[INFO] 반영 결과: {status}")
+            return status != 'error'
+
+    watcher = DropWatcher(args.file, on_drop, poll_interval=args.interval,
+                          use_inotify=not args.poll)
+    mode = await watcher.start()
+    print(f"[INFO] 감시 시작 ({mode}): {watcher.path}")
+    await asyncio.Event().wait()
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == 'drop':
+        drop_draw(args.file, args.round, args.date, args.numbers, args.bonus, args.in_place)
+        print(f"[INFO] 기록 완료: {args.file}")
+    else:
+        try:
+            asyncio.run(_watch_forever(args))
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == '__main__':
+    main()
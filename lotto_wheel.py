@@ -0,0 +1,129 @@
+"""
+===============================================================================
+        커버리지 최적화 선택 (휠링 모드)
+===============================================================================
+조건을 통과한 후보 풀에서 15줄을 고를 때, 줄끼리 많이 겹치지 않도록
+"얼마나 많은 것을 덮는지"를 기준으로 고릅니다.
+1. 목표(objective)
+   - 'numbers': 서로 다른 번호 개수 (최대 45개, 게임의 pool)
+   - 'pairs'  : 서로 다른 번호 쌍 개수  -> 그 2개가 나오면 2개 적중 보장
+   - 'triples': 서로 다른 3개 조합 개수 -> 그 3개가 나오면 3개 적중 보장
+2. 점수 계산: 줄마다 비트셋(정수)을 미리 만들고, OR 후 비트 개수로 계산
+3. 탐색: 탐욕(greedy) 선택 후, 시간 제한 안에서 한 줄씩 교체하는 지역 탐색
+===============================================================================
+"""
+
+import random
+import time
+from itertools import combinations
+from math import comb
+
+from lotto_game import GAME
+
+# 목표별 점수 계층 (앞쪽이 우선, 동점이면 다음 단계로 비교)
+OBJECTIVES = {
+    'numbers': (1, 2),
+    'pairs': (2, 1),
+    'triples': (3, 2),
+}
+
+def _subset_index(sub):
+    """정렬된 k개 번호 -> 고유 비트 위치 (46진법 = pool + 1)"""
+    idx = 0
+    for n in sub:
+        idx = idx * (GAME.pool + 1) + n
+    return idx
+
+def to_bitset(nums, k=1):
+    """한 줄의 k개 부분집합을 비트셋(정수)으로"""
+    bits = 0
+    for sub in combinations(sorted(nums), k):
+        bits |= 1 << _subset_index(sub)
+    return bits
+
+def coverage_score(bitsets):
+    """선택된 줄들의 단계별 커버리지 (OR 후 비트 개수)"""
+    return tuple(_or_all(level).bit_count() for level in zip(*bitsets)) if bitsets else ()
+
+def _or_all(items):
+    acc = 0
+    for b in items:
+        acc |= b
+    return acc
+
+def select_coverage(candidates, n_sets=15, objective='numbers', time_budget=2.0,
+                    slot_required=None, rng=random):
+    """
+    후보 풀에서 n_sets줄을 골라 커버리지를 최대화
+    - slot_required[p]: p번째 줄에 반드시 들어가야 하는 번호 (Top5 규칙 등)
+    - time_budget: 전체 탐색 시간 제한 (초)
+    반환: (선택된 줄 리스트, 단계별 커버리지 점수)
+    """
+    deadline = time.monotonic() + time_budget
+    levels = OBJECTIVES[objective]
+    pool = [sorted(c) for c in candidates]
+    bitsets = [tuple(to_bitset(c, k) for k in levels) for c in pool]
+    if slot_required is None:
+        slot_required = [()] * n_sets
+
+    allowed = []
+    for req in slot_required[:n_sets]:
+        req = set(req)
+        allowed.append([i for i, c in enumerate(pool) if req <= set(c)])
+
+    def score_with(acc, bits):
+        return tuple((a | b).bit_count() for a, b in zip(acc, bits))
+
+    # 1. 탐욕 선택: 빈 자리마다 커버리지를 가장 많이 늘리는 후보
+    chosen = []
+    used = set()
+    acc = tuple(0 for _ in levels)
+    for p in range(min(n_sets, len(slot_required))):
+        best, best_score = None, None
+        order = allowed[p][:]
+        rng.shuffle(order)
+        for scanned, i in enumerate(order):
+            if i in used: continue
+            s = score_with(acc, bitsets[i])
+            if best_score is None or s > best_score:
+                best, best_score = i, s
+            # 시간 초과 시 지금까지의 최선으로 확정
+            if scanned % 1024 == 1023 and time.monotonic() > deadline and best is not None:
+                break
+        if best is None:
+            break
+        chosen.append(best)
+        used.add(best)
+        acc = tuple(a | b for a, b in zip(acc, bitsets[best]))
+
+    # 2. 지역 탐색: 한 줄을 다른 후보로 바꿔서 점수가 오르면 교체
+    current = coverage_score([bitsets[i] for i in chosen])
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+        for p in range(len(chosen)):
+            others = tuple(_or_all(bitsets[chosen[q]][lv] for q in range(len(chosen)) if q != p)
+                           for lv in range(len(levels)))
+            for i in allowed[p]:
+                if i in used: continue
+                s = score_with(others, bitsets[i])
+                if s > current:
+                    used.discard(chosen[p])
+                    used.add(i)
+                    chosen[p] = i
+                    current = s
+                    improved = True
+                    break
+            if time.monotonic() > deadline:
+                break
+
+    return [pool[i] for i in chosen], current
+
+def describe_coverage(lines, objective='numbers'):
+    """커버리지 요약 문자열"""
+    levels = OBJECTIVES[objective]
+    score = coverage_score([tuple(to_bitset(c, k) for k in levels) for c in lines])
+    parts = []
+    for k, covered in zip(levels, score):
+        parts.append(f"{k}개 조합 {covered}/{comb(GAME.pool, k)}")
+    return ', '.join(parts)
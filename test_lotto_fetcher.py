@@ -0,0 +1,91 @@
+"""
+당첨번호 조회 검증 (python -m pytest -q)
+로컬 대역 서버(StubDrawServer)를 띄워 304 / Retry-After / 회차 불일치 처리를 확인합니다.
+"""
+
+import asyncio
+import socket
+import time
+from email.utils import formatdate
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from lotto_fetcher import DrawFetcher, FetchError, StubDrawServer, _retry_delay
+
+DRAW = {'round': 1207, 'date': '2026.01.17', 'numbers': [5, 11, 19, 25, 33, 40], 'bonus': 7}
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def run_with_server(scenario, **server_args):
+    """대역 서버 + DrawFetcher를 띄워 scenario(server, fetcher) 실행"""
+    async def main():
+        server = StubDrawServer(**server_args)
+        server.publish(dict(DRAW))
+        url = await server.start(port=_free_port())
+        fetcher = DrawFetcher(url, timeout=5.0, retries=2, backoff=0.01)
+        try:
+            return await scenario(server, fetcher)
+        finally:
+            await fetcher.close()
+            await server.stop()
+    return asyncio.run(main())
+
+def test_fetch_then_not_modified():
+    async def scenario(server, fetcher):
+        first = await fetcher.fetch(1207)
+        second = await fetcher.fetch(1207)
+        return server, first, second
+
+    server, first, second = run_with_server(scenario)
+    assert first['round'] == 1207 and first['numbers'] == DRAW['numbers'] and first['bonus'] == 7
+    # 두 번째 요청은 ETag를 보내고 304 -> 이전 결과 그대로
+    assert second == first
+    assert server.requests[0][1] is None and server.requests[1][1] is not None
+
+def test_pending_round_is_none():
+    async def scenario(server, fetcher):
+        return await fetcher.fetch(1208)
+
+    assert run_with_server(scenario) is None
+
+def test_retry_after_then_success():
+    async def scenario(server, fetcher):
+        started = time.monotonic()
+        draw = await fetcher.fetch(1207)
+        return server, draw, time.monotonic() - started
+
+    server, draw, elapsed = run_with_server(scenario, fail=2, retry_after=0)
+    assert draw['round'] == 1207
+    assert len(server.requests) == 3
+    assert elapsed < 2
+
+def test_retries_exhausted():
+    async def scenario(server, fetcher):
+        with pytest.raises(FetchError):
+            await fetcher.fetch(1207)
+        return server
+
+    server = run_with_server(scenario, fail=10, retry_after=0)
+    assert len(server.requests) == 3      # 처음 1번 + 재시도 2번
+
+def test_round_mismatch_is_error():
+    async def scenario(server, fetcher):
+        # 1300회를 물었는데 1207회 본문이 오는 경우
+        server.draws[1300] = dict(DRAW)
+        server.published[1300] = time.time()
+        with pytest.raises(FetchError, match='회차'):
+            await fetcher.fetch(1300)
+
+    run_with_server(scenario)
+
+def test_retry_delay_uses_retry_after():
+    assert _retry_delay(5, '2') == 2.0
+    assert _retry_delay(0, '999', cap=30.0) == 30.0
+    assert 0 <= _retry_delay(0, formatdate(time.time() + 3, usegmt=True)) <= 3
+    assert 0 <= _retry_delay(3, None, base=0.5) <= 4.0
+    assert 0 <= _retry_delay(3, 'soon', base=0.5) <= 4.0
@@ -0,0 +1,90 @@
+"""
+샘플러 가능성 표 / 확률 계산 검증 (python -m pytest -q)
+가능성 표의 티켓 수를 check_pattern_quality 전수 검사 결과와 비교합니다.
+"""
+
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+import lotto_generator
+from lotto_combinations import get_all_combinations
+from lotto_game import DEFAULT_GAME, GAME
+from lotto_history import TOTAL_CSV
+from lotto_probability import compute_block_probabilities, line_tier_probabilities, match_probabilities
+from lotto_query import RULE_MASKS, rule_mask
+from lotto_rules import compile_rules
+from lotto_sampler import FeasibilityTable
+
+pytestmark = pytest.mark.skipif(GAME.name != DEFAULT_GAME, reason='로또6/45 기준 검증')
+
+# 전수 검사 범위를 줄인 규칙 (합계 130~131만 -> 후보 약 20만 개)
+# 분산/최근 패턴 유사성은 가능성 표가 다루지 않으므로 비교에서 뺌
+REDUCED_RULES = {
+    'sum': {'min': 130, 'max': 131},
+    'variance': {'min': 0, 'max': 1000},
+    'odd_count': {'min': 2, 'max': 4},
+    'max_run': 2,
+}
+
+@pytest.fixture(scope='module')
+def reduced():
+    """(규칙, 저빈출, 빈출, check_pattern_quality를 통과한 조합 목록)"""
+    rules = compile_rules(REDUCED_RULES)
+    frequency = rules.frequency(TOTAL_CSV)
+    combos = get_all_combinations()
+    sums = combos.sum(axis=1, dtype=np.int16)
+    # 합계 조건은 check_pattern_quality에도 있으므로 미리 걸러도 결과는 같음
+    candidates = combos[(sums >= rules.sum_min) & (sums <= rules.sum_max)]
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(lotto_generator, 'check_similarity_with_recent_patterns', lambda *args, **kwargs: True)
+        passed = [tuple(int(n) for n in nums) for nums in candidates
+                  if lotto_generator.check_pattern_quality(nums.tolist(), TOTAL_CSV, rules)]
+    return rules, frequency['cold'], frequency['top'], passed
+
+def test_table_total_matches_check_pattern_quality(reduced):
+    rules, cold, top, passed = reduced
+    assert passed
+    assert FeasibilityTable(cold, top, (), rules).total == len(passed)
+
+@pytest.mark.parametrize('forced', [(3,), (3, 7), (1, 12, 13)])
+def test_forced_numbers_count(reduced, forced):
+    rules, cold, top, passed = reduced
+    expected = sum(1 for nums in passed if set(forced) <= set(nums))
+    assert FeasibilityTable(cold, top, forced, rules).total == expected
+
+def test_sample_passes_check_pattern_quality(reduced):
+    rules, cold, top, passed = reduced
+    table = FeasibilityTable(cold, top, (3, 7), rules)
+    valid = set(passed)
+    rng = random.Random(0)
+    for _ in range(20):
+        nums = tuple(table.sample(rng))
+        assert nums in valid and {3, 7} <= set(nums)
+
+def test_default_rules_total_matches_rule_masks():
+    """기본 규칙 전체: 가능성 표 = 항목별 마스크(분산 제외)의 AND"""
+    rules = compile_rules()
+    frequency = rules.frequency(TOTAL_CSV)
+    mask = np.ones(len(get_all_combinations()), dtype=bool)
+    for name in RULE_MASKS:
+        if name != 'variance':
+            mask &= rule_mask(name, TOTAL_CSV, rules)
+    assert FeasibilityTable(frequency['cold'], frequency['top'], (), rules).total == int(mask.sum())
+
+    combos = get_all_combinations()
+    for forced in itertools.combinations((3, 7, 12), 2):
+        has = mask & (np.isin(combos, forced).sum(axis=1) == len(forced))
+        table = FeasibilityTable(frequency['cold'], frequency['top'], forced, rules)
+        assert table.total == int(has.sum())
+
+@pytest.mark.parametrize('lines', [[[1, 2, 3, 4, 5, 6]], [[7, 13, 21, 30, 38, 45]] * 2])
+def test_one_line_block_matches_closed_form(lines):
+    """1줄(같은 줄 반복 포함) 세트 = 1줄 초기하 분포 공식"""
+    matches, tiers = compute_block_probabilities(lines)
+    for m, p in match_probabilities().items():
+        assert matches[m] == pytest.approx(float(p), rel=1e-12, abs=1e-15)
+    for tier, p in line_tier_probabilities().items():
+        assert tiers[tier] == pytest.approx(float(p), rel=1e-12, abs=1e-15)
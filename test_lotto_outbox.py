@@ -0,0 +1,56 @@
+"""
+디스코드 메시지 분할 검증 (python -m pytest -q)
+모든 조각이 제한 길이 이하이고, 코드 블록(```)이 조각마다 닫혀 있는지 확인합니다.
+"""
+
+import random
+
+import pytest
+
+from lotto_outbox import FENCE, split_message
+
+def _balanced(chunk):
+    return chunk.count(FENCE) % 2 == 0
+
+def test_short_message_is_unchanged():
+    assert split_message('hello\n```\ncode\n```', limit=100) == ['hello\n```\ncode\n```']
+
+@pytest.mark.parametrize('limit', [60, 200, 2000])
+def test_long_code_block_is_closed_and_reopened(limit):
+    body = '\n'.join(f'{i:03d} ' + 'x' * (i % 37) for i in range(300))
+    text = f'머리말\n```\n{body}\n```\n꼬리말'
+    chunks = split_message(text, limit=limit)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= limit for chunk in chunks)
+    assert all(_balanced(chunk) for chunk in chunks)
+    # 덧붙인 ```를 빼면 원문 내용이 순서대로 그대로 남음
+    joined = '\n'.join(chunks)
+    assert [line for line in joined.split('\n') if line != FENCE] == \
+        [line for line in text.split('\n') if line != FENCE]
+
+def test_overlong_line_is_hard_split():
+    text = 'a' * 450 + '\n```\n' + 'b' * 450 + '\n```'
+    chunks = split_message(text, limit=100)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert all(_balanced(chunk) for chunk in chunks)
+    assert ''.join(chunks).replace(FENCE, '').replace('\n', '') == 'a' * 450 + 'b' * 450
+
+def test_random_messages_keep_fences_balanced():
+    rng = random.Random(0)
+    for _ in range(200):
+        lines = []
+        for _ in range(rng.randint(1, 80)):
+            kind = rng.random()
+            if kind < 0.15:
+                lines.append(FENCE)
+            elif kind < 0.2:
+                lines.append(FENCE + 'py')
+            else:
+                lines.append('가' * rng.randint(0, 90))
+        text = '\n'.join(lines)
+        if text.count(FENCE) % 2:
+            text += '\n' + FENCE
+        limit = rng.choice([50, 120, 500])
+        chunks = split_message(text, limit=limit)
+        assert all(len(chunk) <= limit for chunk in chunks)
+        assert all(_balanced(chunk) for chunk in chunks)
@@ -0,0 +1,66 @@
+"""
+조건식 질의 검증 (python -m pytest -q)
+허용하지 않는 문법은 계산 전에 QueryError, 허용된 식은 numpy 직접 계산과 같은 개수
+"""
+
+import numpy as np
+import pytest
+
+from lotto_combinations import get_all_combinations
+from lotto_game import DEFAULT_GAME, GAME
+from lotto_query import QueryError, parse_query, query
+
+pytestmark = pytest.mark.skipif(GAME.name != DEFAULT_GAME, reason='로또6/45 기준 검증')
+
+@pytest.mark.parametrize('expression', [
+    "__import__('os').system('true')",
+    'sum.__class__',
+    '[x for x in (1, 2)]',
+    'lambda: 1',
+    'sum if odd else run',
+    'open',
+    "sum == 'a'",
+    'sum ** 2 > 1',
+    'sum / 2 > 1',
+    'sum in (odd, 2)',
+    'sum in range(10)',
+    'has(0)',
+    'has(sum)',
+    'count(1, n=2)',
+    'sum > 10000000',
+    'True',
+    'sum * sum * sum * sum * sum * sum * sum * sum > 0',
+    '',
+    'x' * 400,
+])
+def test_rejects_unsafe_or_unsupported(expression):
+    with pytest.raises(QueryError):
+        query(expression)
+
+def test_parse_accepts_supported_syntax():
+    parse_query('120 <= sum <= 180 and not (odd in (0, 6)) or has(7, 13) and count(1, 2) >= 1')
+    parse_query('sum % 2 == 0 and -run < -1 and sum // 3 != 40')
+    parse_query('odd = 3')
+
+def test_non_boolean_result_is_error():
+    with pytest.raises(QueryError):
+        query('sum + 1')
+
+@pytest.fixture(scope='module')
+def combos():
+    return get_all_combinations().astype(np.int64)
+
+def test_counts_match_numpy(combos):
+    sums = combos.sum(axis=1)
+    odds = (combos % 2).sum(axis=1)
+    has_7_13 = ((combos == 7).any(axis=1) & (combos == 13).any(axis=1))
+    assert query('120 <= sum <= 180 and odd == 3')['combinations'] == \
+        int(((sums >= 120) & (sums <= 180) & (odds == 3)).sum())
+    assert query('has(7, 13)')['combinations'] == int(has_7_13.sum())
+    assert query('odd in (0, 6)')['combinations'] == int(((odds == 0) | (odds == 6)).sum())
+
+def test_large_products_do_not_wrap(combos):
+    """sum^4은 int32를 넘음 -> int64로 계산해야 정확"""
+    sums = combos.sum(axis=1)
+    expected = int((sums ** 4 > 2 * 10 ** 9).sum())
+    assert query('sum * sum * sum * sum > 2000 * 1000000')['combinations'] == expected
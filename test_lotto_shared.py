@@ -0,0 +1,50 @@
+"""
+공유 메모리 제외 비트맵 검증 (python -m pytest -q)
+colex 순위가 조합 공간 전체에서 0 ~ C(pool, pick)-1 일대일 대응인지 확인합니다.
+"""
+
+import math
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+import lotto_shared
+from lotto_combinations import get_all_combinations
+from lotto_game import GAME, Game
+
+@pytest.fixture
+def tiny_game(monkeypatch):
+    """작은 게임 (10개 중 3개, 120가지)으로 순위표를 바꿔 끼움"""
+    game = Game('tiny', 'tiny 3/10', 10, 3)
+    monkeypatch.setattr(lotto_shared, 'GAME', game)
+    monkeypatch.setattr(lotto_shared, '_BINOM',
+                        [[math.comb(n, i) for i in range(game.pick + 1)] for n in range(game.pool + 1)])
+    return game
+
+def test_ranks_are_bijection_on_small_game(tiny_game):
+    combos = list(combinations(range(1, tiny_game.pool + 1), tiny_game.pick))
+    ranks = lotto_shared.combination_ranks(combos)
+    assert sorted(ranks.tolist()) == list(range(tiny_game.space_size))
+    # 스칼라 버전과 같은 값, 번호 순서와 무관
+    assert [lotto_shared.combination_rank(c) for c in combos] == ranks.tolist()
+    assert all(lotto_shared.combination_rank(c[::-1]) == r for c, r in zip(combos, ranks.tolist()))
+
+def test_exclusion_bitmap_marks_exactly_given_combinations(tiny_game):
+    combos = list(combinations(range(1, tiny_game.pool + 1), tiny_game.pick))
+    excluded = combos[::7]
+    bitmap = lotto_shared.build_exclusion_bitmap(np.array(excluded))
+    assert len(bitmap) == (tiny_game.space_size + 7) // 8
+    assert int(np.unpackbits(bitmap).sum()) == len(excluded)
+    exclusion = lotto_shared.SharedExclusion(bitmap, np.array(excluded))
+    assert all((c in exclusion) == (c in set(excluded)) for c in combos)
+    exclusion.add((1, 2, 10))
+    assert (1, 2, 10) in exclusion
+    assert exclusion.to_set() == set(excluded) | {(1, 2, 10)}
+
+@pytest.mark.skipif(not GAME.enumerable, reason='전체 조합을 열거할 수 있는 게임만')
+def test_ranks_are_bijection_on_current_game():
+    ranks = lotto_shared.combination_ranks(get_all_combinations())
+    assert len(ranks) == GAME.space_size
+    assert np.array_equal(np.bincount(ranks, minlength=GAME.space_size),
+                          np.ones(GAME.space_size, dtype=np.int64))
@@ -0,0 +1,47 @@
+"""
+생성 전략 규칙 검증 (python -m pytest -q)
+전략끼리 항목 마스크를 공유하고, 덮어쓴 항목(wide_sum의 합계)만 새로 계산되는지 확인합니다.
+"""
+
+import numpy as np
+import pytest
+
+from lotto_combinations import get_all_combinations
+from lotto_game import DEFAULT_GAME, GAME
+from lotto_history import TOTAL_CSV
+from lotto_query import RULE_MASKS, rule_mask
+from lotto_rules import compile_rules
+from lotto_strategies import STRATEGIES, parse_strategies, strategy_rules
+
+pytestmark = pytest.mark.skipif(GAME.name != DEFAULT_GAME, reason='로또6/45 기준 검증')
+
+@pytest.fixture(scope='module')
+def rules():
+    return compile_rules()
+
+def test_parse_strategies():
+    assert [s.name for s in parse_strategies('current, wide_sum,current')] == ['current', 'wide_sum']
+    assert parse_strategies('') == []
+    with pytest.raises(ValueError):
+        parse_strategies('current,nope')
+
+def test_strategy_rules(rules):
+    assert strategy_rules(STRATEGIES['current'], rules) is rules
+    assert strategy_rules(STRATEGIES['no_top5'], rules) is rules
+    assert strategy_rules(STRATEGIES['random'], rules) is None
+    wide = strategy_rules(STRATEGIES['wide_sum'], rules)
+    assert strategy_rules(STRATEGIES['wide_sum'], rules) is wide
+    widen = round((rules.sum_max - rules.sum_min) / 3)
+    assert (wide.sum_min, wide.sum_max) == (max(0, rules.sum_min - widen), rules.sum_max + widen)
+    assert wide.changed_sections(rules) == ['sum']
+
+@pytest.mark.skipif(not GAME.enumerable, reason='전체 조합을 열거할 수 있는 게임만')
+def test_masks_are_shared_between_strategies(rules):
+    wide = strategy_rules(STRATEGIES['wide_sum'], rules)
+    for name in RULE_MASKS:
+        if name != 'sum':
+            assert rule_mask(name, TOTAL_CSV, wide) is rule_mask(name, TOTAL_CSV, rules)
+    sums = get_all_combinations().sum(axis=1, dtype=np.int64)
+    for compiled in (rules, wide):
+        expected = (sums >= compiled.sum_min) & (sums <= compiled.sum_max)
+        assert np.array_equal(rule_mask('sum', TOTAL_CSV, compiled), expected)